@@ -0,0 +1,132 @@
+# The board as NumPy arrays, for whole-board state checks and heuristic scores on large boards
+try:
+    import numpy as np
+except ImportError:
+    np = None # Optional, heuristic scores are counted cell by cell without it
+
+####################################
+# Globals
+####################################
+
+USE_ARRAY_BOARD = False # Check states and find unlit spaces on a NumPy copy of the board with whole-board array operations, for large boards
+
+####################################
+# Classes
+####################################
+
+# The board as NumPy arrays, checked as a whole with array operations instead of cell by cell
+# StateCounters keeps the bulb and empty planes in step with each change, the lit plane is refreshed when checked
+class ArrayBoard:
+    CELL = 0
+    WALL = 1
+    WALL0 = 2 # Numbered walls follow, WALL0 + number
+
+    # segments = SegmentIndex: runs of the board
+    # wallNumbers = dict: numbered wall position -> required adjacent bulbs
+    def __init__(self, segments, wallNumbers):
+        self.types = np.full((segments.height, segments.width), ArrayBoard.WALL, dtype=np.uint8)
+        for (x, y) in segments.segmentsOf:
+            self.types[y, x] = ArrayBoard.CELL
+        for (x, y), number in wallNumbers.items():
+            self.types[y, x] = ArrayBoard.WALL0 + number
+
+        self.openMask = self.types == ArrayBoard.CELL
+        self.numberedMask = self.types >= ArrayBoard.WALL0
+        self.wallNumbers = self.types[self.numberedMask].astype(np.int32) - ArrayBoard.WALL0
+
+        # Run labels of every position, walls included, so bulb counts per run are a bincount
+        self.rowLabels = getRowRunLabels(self.openMask)
+        self.columnLabels = getRowRunLabels(self.openMask.T).T
+        self.rowLabelCount = int(self.rowLabels.max()) + 1
+        self.columnLabelCount = int(self.columnLabels.max()) + 1
+
+        self.bulbs = np.zeros_like(self.openMask)
+        self.canEmpty = self.openMask.copy()
+        self.lit = np.zeros_like(self.openMask)
+    # __init__ end
+
+    def setCellStatus(self, position, isBulb, canBeEmpty):
+        x, y = position
+        self.bulbs[y, x] = isBulb
+        self.canEmpty[y, x] = canBeEmpty
+    # setCellStatus end
+
+    # Returns the bulbs in each row run and each column run, by label, and lights the cells of runs holding one
+    def refreshLit(self):
+        rowBulbs = np.bincount(self.rowLabels[self.bulbs], minlength=self.rowLabelCount)
+        columnBulbs = np.bincount(self.columnLabels[self.bulbs], minlength=self.columnLabelCount)
+        self.lit = self.openMask & ((rowBulbs[self.rowLabels] > 0) | (columnBulbs[self.columnLabels] > 0))
+        return rowBulbs, columnBulbs
+    # refreshLit end
+
+    # Cells that could be empty with no bulb in either run, as of the last refreshLit
+    def getUnlitMask(self):
+        return self.canEmpty & ~self.lit
+    # getUnlitMask end
+
+    # Returns whether a run holds two bulbs or a wall is over its number, and whether every space is lit and
+    # every wall exactly satisfied, which StateCounters.checkState turns into a state
+    def checkBoard(self):
+        rowBulbs, columnBulbs = self.refreshLit()
+        wallBulbs = countAdjacentArray(self.bulbs.astype(np.int32))[self.numberedMask]
+
+        # No bulbs in row or column until wall, and no wall over its number
+        invalid = (rowBulbs > 1).any() or (columnBulbs > 1).any() or (wallBulbs > self.wallNumbers).any()
+
+        # No unlit spaces left and every wall exactly satisfied
+        complete = not self.getUnlitMask().any() and (wallBulbs == self.wallNumbers).all()
+        return bool(invalid), bool(complete)
+    # checkBoard end
+# ArrayBoard end
+
+####################################
+# Utility Functions
+####################################
+
+# Copy of a grid array holding at each entry its neighbour dy rows down and dx columns right, 0 past the border
+def shiftArray(array, dy, dx):
+    height, width = array.shape
+    shifted = np.zeros_like(array)
+    shifted[max(-dy, 0):height - max(dy, 0), max(-dx, 0):width - max(dx, 0)] = \
+        array[max(dy, 0):height + min(dy, 0), max(dx, 0):width + min(dx, 0)]
+    return shifted
+# shiftArray end
+
+# Sum of each entry's neighbours up, right, down and left
+def countAdjacentArray(array):
+    return shiftArray(array, -1, 0) + shiftArray(array, 0, 1) + shiftArray(array, 1, 0) + shiftArray(array, 0, -1)
+# countAdjacentArray end
+
+# openMask = bool array: cells that aren't walls
+# Label of the row run through each position, shared by the cells of a run
+def getRowRunLabels(openMask):
+    height, width = openMask.shape
+
+    # Every wall starts a new run label, and every row its own range of labels
+    return np.cumsum(~openMask, axis=1) + np.arange(height)[:, None] * (width + 1)
+# getRowRunLabels end
+
+# openMask = bool array: cells that aren't walls
+# Length of the row run through each open cell, 0 on walls
+def getRowRunLengths(openMask):
+    height, width = openMask.shape
+    labels = getRowRunLabels(openMask)
+    runLengths = np.bincount(labels[openMask], minlength=height * (width + 1))
+    return np.where(openMask, runLengths[labels], 0)
+# getRowRunLengths end
+
+# openMask = bool array: cells that aren't walls
+# numberedMask = bool array: walls with a number
+# PuzzleBoard.countIlluminatedSpaces for every position of the grid at once
+def scoreIlluminatedArray(openMask, numberedMask):
+    rowRuns = getRowRunLengths(openMask)
+    columnRuns = getRowRunLengths(openMask.T).T
+
+    # A bulb in a cell lights the rest of its row and column runs
+    rayCells = np.where(openMask, rowRuns + columnRuns - 2, 0)
+
+    # A numbered wall counts the run leading away from it on each side
+    wallRuns = shiftArray(columnRuns, -1, 0) + shiftArray(rowRuns, 0, 1) + shiftArray(columnRuns, 1, 0) + shiftArray(rowRuns, 0, -1)
+
+    return countAdjacentArray(np.where(openMask, rayCells, np.where(numberedMask, wallRuns, 0)))
+# scoreIlluminatedArray end
@@ -1,286 +1,70 @@
-import os.path
-import csv
-import time
-
-####################################
-# Enums
-####################################
-
-class AnsiColors:
-    GRAY = "\033[90m"
-    RED = '\033[91m'
-    GREEN = "\033[92m"
-    YELLOW = "\033[93m"
-    BLUE = "\033[94m"
-    RESET = "\033[0m"
-# AnsiColors end
-
-class NodeStates:
-    BULB = "b"
-    WALL = "W"
-    WALL0 = "0"
-    WALL1 = "1"
-    WALL2 = "2"
-    WALL3 = "3"
-    WALL4 = "4"
-    EMPTY = "_"
-# NodeStates end
-
-class OverallStates:
-    INVALID = 0
-    VALID = 1
-    COMPLETE = 2
-    CANNOT_FINISH = 3
-# OverallStates end
-
-class HeuristicMode:
-    NONE = 0
-    MOST_CONSTRAINED = 1
-    MOST_CONSTRAINING = 2
-    HYBRID = 3
-# HeuristicMode end
+from puzzle_core import NodeStates, OverallStates, HeuristicMode, AnsiColors, WALL_COMPLETIONS
+from puzzle_search import PuzzleSolver, runSearchFrames, solveGrid
+from puzzle_cli import createArgumentParser, runFromArguments
 
 ####################################
 # Globals
 ####################################
 
-USE_COLOR_PRINT = True # Disable if terminal doesn't support ANSI escape codes (e.g. prints gibberish)
-MAX_SEARCH_ITERATIONS = 100000
 HEURISTIC_MODE = 1
-SAVE_CSV = True
 
 ####################################
 # Classes
 ####################################
 
-class Node:
-    def __init__(self, state, x, y):
-        self.state = state
-        self.x = x
-        self.y = y
-    # __init__ end
+class BacktrackingSolver(PuzzleSolver):
+    csvFileNames = {
+        HeuristicMode.NONE: "bt_no_h.csv",
+        HeuristicMode.MOST_CONSTRAINED: "bt_constrained.csv",
+        HeuristicMode.MOST_CONSTRAINING: "bt_constraining.csv",
+        HeuristicMode.HYBRID: "bt_hybrid.csv",
+    }
+
+    # heuristicMode = int: from HeuristicMode class, None for HEURISTIC_MODE
+    # config = SolverConfig: shared options, None for the globals' values
+    def __init__(self, graph, node2dArray, heuristicMode=None, config=None):
+        # Every space starts decided as empty, and the search swaps decisions between empty and bulb
+        for row in node2dArray:
+            for node in row:
+                if node.getDecision() is None:
+                    node.setDecision(NodeStates.EMPTY)
 
-    def __str__(self):
-        return self.state
-    # __str__ end
-
-    def __repr__(self):
-        return self.state
-    # __repr__ end
-
-    def __unicode__(self):
-        return self.state
-    # __unicode__ end
-# Node end
-
-class BacktrackingSolver:
-    def __init__(self, graph, node2dArray):
-        self.graph = graph
-        self.board = node2dArray
-        self.solved = False
-        self.searchSteps = 0
-        self.aborted = False
+        super().__init__(graph, node2dArray, HEURISTIC_MODE if heuristicMode is None else heuristicMode, config)
     # __init__ end
 
-    def solve(self):
-        # Get all numbered tiles
-        wallNode3Count, wallNode4Count = 0, 0
-        initWallNodes, initEmptyNodes, wallNodes = [], [], []
-        csv_file_name = ""
-        for n in self.graph:
-            if self.nodeStateIsWall(n):
-                if n.state == NodeStates.WALL4:
-                    initWallNodes.insert(0, n)
-                    wallNode4Count += 1
-                elif n.state != NodeStates.WALL0:
-                    initWallNodes.append(n)
-            else:
-                initEmptyNodes.append(n)
-
-        wallNodes.extend(initWallNodes[:wallNode4Count])
-
-        # Sort wall tiles for heuristic
-        if HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINED:
-            # combinations = [[1 combination], [2 combinations], [3 combinations], [4 combinations], [6 combinations]]
-            combinations = [[], [], [], [], []]
-            combinations[0].extend(wallNodes)
-            for node in initWallNodes:
-                adjEmptyCells = len([v for v in self.graph[node] if v.state == NodeStates.EMPTY])
-                if node.state == NodeStates.WALL3:
-                    if adjEmptyCells == 3:
-                        combinations[0].append(node)
-                    elif adjEmptyCells == 4:
-                        combinations[3].append(node)
-                elif node.state == NodeStates.WALL2:
-                    if adjEmptyCells == 4:
-                        combinations[4].append(node)
-                    elif adjEmptyCells == 3:
-                        combinations[2].append(node)
-                    elif adjEmptyCells == 2:
-                        combinations[0].append(node)
-                elif node.state == NodeStates.WALL1:
-                    combinations[adjEmptyCells-1].append(node)
-
-            for c in combinations:
-                wallNodes += c
-
-            csv_file_name = "bt_constrained.csv"
-
-        elif HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINING:
-            # Walls that could illuminate the most cells first
-            def countIlluminatedSpaces(node):
-                numLitCells = 0
-                adjNodes = self.graph[node]
-
-                for adjNode in adjNodes: # For each direction
-                    if adjNode.state == NodeStates.WALL:
-                        continue
-
-                    bulbAdjNodes = self.graph[adjNode]
-
-                    for idx, bulbAdjNode in enumerate(bulbAdjNodes): # For each direction around possible bulb
-                        rayNode = bulbAdjNode # Check each node outwards in a ray in that direction until wall
-
-                        while True: # Graph should be bordered by WALL, so this will always break eventually
-                            if rayNode.state == NodeStates.EMPTY:
-                                numLitCells += 1
-                            elif self.nodeStateIsWall(rayNode):
-                                break # If hit wall, we're done checking in this direction
-
-                            rayNode = self.graph[rayNode][idx] # Get next node in this direction
-
-                return numLitCells
-            # countIlluminatedSpaces end
-
-            wallNodes = sorted(initWallNodes, key=countIlluminatedSpaces, reverse=True)
-            csv_file_name = "bt_constraining.csv"
-
-        elif HEURISTIC_MODE == HeuristicMode.HYBRID:
-            # Combine both most constrained and most constraining by generating a score from both sorting methods
-
-            # Constrained
-            # Order of most possible combinations
-            # combinations = [[1 combination], [2 combinations], [3 combinations], [4 combinations], [6 combinations]]
-            combinations = [[], [], [], [], []]
-            combinations[0].extend(wallNodes)
-            for node in initWallNodes:
-                adjEmptyCells = len([v for v in self.graph[node] if v.state == NodeStates.EMPTY])
-                if node.state == NodeStates.WALL3:
-                    if adjEmptyCells == 3:
-                        combinations[0].append(node)
-                    elif adjEmptyCells == 4:
-                        combinations[3].append(node)
-                elif node.state == NodeStates.WALL2:
-                    if adjEmptyCells == 4:
-                        combinations[4].append(node)
-                    elif adjEmptyCells == 3:
-                        combinations[2].append(node)
-                    elif adjEmptyCells == 2:
-                        combinations[0].append(node)
-                elif node.state == NodeStates.WALL1:
-                    combinations[adjEmptyCells-1].append(node)
-
-            # Constraining
-            def countIlluminatedSpaces(node):
-                numLitCells = 0
-                adjNodes = self.graph[node]
-
-                for adjNode in adjNodes: # For each direction
-                    if adjNode.state == NodeStates.WALL:
-                        continue
-
-                    bulbAdjNodes = self.graph[adjNode]
-
-                    for idx, bulbAdjNode in enumerate(bulbAdjNodes): # For each direction around possible bulb
-                        rayNode = bulbAdjNode # Check each node outwards in a ray in that direction until wall
-
-                        while True: # Graph should be bordered by WALL, so this will always break eventually
-                            if rayNode.state == NodeStates.EMPTY:
-                                numLitCells += 1
-                            elif self.nodeStateIsWall(rayNode):
-                                break # If hit wall, we're done checking in this direction
-
-                            rayNode = self.graph[rayNode][idx] # Get next node in this direction
-
-                return numLitCells
-            # countIlluminatedSpaces end
-
-            maxLitSpaces = 0
-            litSpacesMap = {}
-            for node in self.graph:
-                litSpaces = countIlluminatedSpaces(node)
-                litSpacesMap[node] = litSpaces
-
-                if litSpaces > maxLitSpaces:
-                    maxLitSpaces = litSpaces
-
-            # Generate score via hybrid
-            def hybridSort(node):
-                totalScore = 0
-                litSpaces = countIlluminatedSpaces(node)
-                litSpacesPercentage = litSpaces / maxLitSpaces
-
-                for score, combo in enumerate(combinations):
-                    if node in combo:
-                        totalScore = (score + 1) * litSpacesPercentage
-                        break
-
-                return totalScore
-            # hybridSort end
-
-            wallNodes = sorted(initWallNodes, key=hybridSort, reverse=True)
-
-            csv_file_name = "bt_hybrid.csv"
-
-        elif HEURISTIC_MODE == HeuristicMode.NONE:
-            wallNodes = initWallNodes
-            csv_file_name = "bt_no_h.csv"
-
+    def runSearch(self, wallNodes):
         # Place bulbs around WALL4 tiles - there's no other choice
         for node in wallNodes:
-            if node.state == NodeStates.WALL4:
+            if node.getDecision() == NodeStates.WALL4:
                 for adjNode in self.graph[node]:
-                    if adjNode.state == NodeStates.EMPTY:
-                        adjNode.state = NodeStates.BULB
+                    if adjNode.getDecision() == NodeStates.EMPTY:
+                        self.placeBulb(adjNode)
 
         # Remove WALL4 tiles from list
-        wallNodes = [node for node in wallNodes if node.state != NodeStates.WALL4]
+        wallNodes = [node for node in wallNodes if node.getDecision() != NodeStates.WALL4]
 
         # Backtracking search for placement around rest of tiles
-        startTime = time.time()
-        result = self.backtrackingSolve(wallNodes, self.graph)
-        timeTaken = time.time() - startTime
+        return self.backtrackingSolve(wallNodes, self.graph)
+    # runSearch end
 
-        if result == OverallStates.CANNOT_FINISH:
-            colorPrint(AnsiColors.RED, "Exceeded allowed steps")
-        else:
-            colorPrint(AnsiColors.GREEN, "Finished")
+    # A finished wall phase isn't always reported as COMPLETE, so ask the board itself
+    def isSolved(self, result):
+        return self.checkOverallStates(self.graph) == OverallStates.COMPLETE
+    # isSolved end
 
-        # Write results to csv
-        if SAVE_CSV:
-            to_write = []
-            if self.searchSteps < 50002:
-                to_write = [len(self.board), self.searchSteps, "yes"]
-            else:
-                to_write = [len(self.board), self.searchSteps, "no"]
-
-            if not os.path.isfile(csv_file_name):
-                with open(csv_file_name, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["board_size", "steps_taken", "solved"])
-                    writer.writerow(to_write)
-            else:
-                with open(csv_file_name, 'a') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(to_write)
-
-        print("Steps taken:", self.searchSteps)
-        print("Seconds taken:", timeTaken)
-        self.printState()
-        print(flush=True)
-    # solve end
+    # A state only goes in the table once every bulb placement from it has failed, which holds whatever order
+    # the walls and ties are tried in, and every round draws the same Zobrist keys, so the table carries over
+    def keepLearned(self, previous):
+        if self.transpositions is not None and previous.transpositions is not None:
+            self.transpositions = previous.transpositions
+    # keepLearned end
 
     def backtrackingSolve(self, wallNodes, graphState):
+        return runSearchFrames(self.backtrackingFrame, wallNodes, graphState)
+    # backtrackingSolve end
+
+    # One level of the backtracking search, run by runSearchFrames
+    def backtrackingFrame(self, wallNodes, graphState):
         if self.aborted:
             return OverallStates.CANNOT_FINISH
 
@@ -291,284 +75,153 @@ class BacktrackingSolver:
         elif stateStatus == OverallStates.COMPLETE:
             return OverallStates.COMPLETE # Escape recursion and output solution
         else:
-            if self.searchSteps > MAX_SEARCH_ITERATIONS:
-                self.aborted = True
-            self.searchSteps += 1
+            stateKey = self.getStateKey(wallNodes)
+            if self.transpositions is not None and self.transpositions.contains(stateKey):
+                return OverallStates.INVALID # Searched from here before
+            startHash = self.stateHash
+
+            self.recordPartial(self.board)
+            self.countStep()
 
             while wallNodes:
                 node = wallNodes.pop()
 
-                # Get list of possible moves
-                possibleBulbNodes = []
-
-                if node.state == NodeStates.WALL1:
-                    for adjNode in graphState[node]:
-                        if adjNode.state == NodeStates.EMPTY:
-                            possibleBulbNodes.append([adjNode])
-                elif node.state == NodeStates.WALL2:
-                    adjacents = graphState[node]
-                    if adjacents[0].state == NodeStates.EMPTY and adjacents[1].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[0], adjacents[1]])
-                    if adjacents[1].state == NodeStates.EMPTY and adjacents[2].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[1], adjacents[2]])
-                    if adjacents[2].state == NodeStates.EMPTY and adjacents[3].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[2], adjacents[3]])
-                    if adjacents[3].state == NodeStates.EMPTY and adjacents[0].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[3], adjacents[0]])
-                    if adjacents[3].state == NodeStates.EMPTY and adjacents[1].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[3], adjacents[1]])
-                    if adjacents[0].state == NodeStates.EMPTY and adjacents[2].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[0], adjacents[2]])
-
-                elif node.state == NodeStates.WALL3:
-                    adjacents = graphState[node]
-                    if adjacents[3].state == NodeStates.EMPTY and adjacents[0].state == NodeStates.EMPTY and adjacents[1].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[3], adjacents[0], adjacents[1]])
-                    if adjacents[0].state == NodeStates.EMPTY and adjacents[1].state == NodeStates.EMPTY and adjacents[2].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[0], adjacents[1], adjacents[2]])
-                    if adjacents[1].state == NodeStates.EMPTY and adjacents[2].state == NodeStates.EMPTY and adjacents[3].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[1], adjacents[2], adjacents[3]])
-                    if adjacents[2].state == NodeStates.EMPTY and adjacents[3].state == NodeStates.EMPTY and adjacents[0].state == NodeStates.EMPTY:
-                        possibleBulbNodes.append([adjacents[2], adjacents[3], adjacents[0]])
+                # Get possible moves, as the sides of the wall to put bulbs on
+                adjacents = graphState[node]
+                possibleBulbSides = ()
+
+                if node.getDecision() in (NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3):
+                    allowed, bulbs = self.getWallMasks(adjacents)
+                    possibleBulbSides = WALL_COMPLETIONS[int(node.getDecision())][allowed][bulbs]
 
                 # Try possible bulb placements via backtracking search
-                for possibleNodeSet in possibleBulbNodes:
-                    for possibleNode in possibleNodeSet:
-                        possibleNode.state = NodeStates.BULB # Try these tiles as bulbs and recurse
+                for sides in possibleBulbSides:
+                    for side in sides:
+                        self.placeBulb(adjacents[side]) # Try these tiles as bulbs and recurse
 
-                    backtrackingResult = self.backtrackingSolve(wallNodes.copy(), graphState)
+                    backtrackingResult = yield wallNodes.copy(), graphState
 
                     if backtrackingResult == OverallStates.INVALID:
-                        for possibleNode in possibleNodeSet:
-                            possibleNode.state = NodeStates.EMPTY # Reset tile states if failure
+                        for side in sides:
+                            self.removeBulb(adjacents[side]) # Reset tile states if failure
                     elif backtrackingResult == OverallStates.CANNOT_FINISH:
                         return OverallStates.CANNOT_FINISH
 
             # Test open spaces with backtracking
             if not wallNodes:
-                # Get list of unlit unoccupied tiles
+                # Get list of unlit unoccupied tiles, in board order so runs are repeatable
                 unlits, lits = self.getUnlitSpaces(graphState)
-                unlits = list(unlits)
-                lits = list(lits)
+                unlits = [node for node in graphState if node in unlits]
 
                 # Sort unlits by heuristics
-                if HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINED:
-                    # Most adjacent lit spaces
-                    def countAdjacentLits(node):
-                        count = 0
-
-                        for adj in graphState[node]:
-                            if adj in lits:
-                                count += 1
-
-                        return count
-                    # countAdjacentLits end
-
-                    unlits.sort(key=countAdjacentLits, reverse=True)
-                elif HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINING:
-                    # Lights the most tiles
-                    def sortCountIlluminatedSpaces(node):
-                        return self.countIlluminatedSpaces(node, graphState)
-                    # sortCountIlluminatedSpaces end
-
-                    unlits.sort(key=sortCountIlluminatedSpaces, reverse=True)
-                elif HEURISTIC_MODE == HeuristicMode.HYBRID:
-                    # Combine scores
-                    def countAdjacentLits(node):
-                        count = 0
-
-                        for adj in graphState[node]:
-                            if adj in lits:
-                                count += 1
-
-                        return count
-                    # countAdjacentLits end
-
-                    def hybridSort(node):
-                        litSpaces = self.countIlluminatedSpaces(node, graphState)
-                        adjLitSpaces = countAdjacentLits(node)
-                        adjLitPercentage = adjLitSpaces/4
-
-                        return adjLitPercentage * litSpaces
-                    # hybridSort end
-
-                    unlits.sort(key=hybridSort, reverse=True)
+                self.sortUnlitSpaces(unlits, graphState)
 
                 # Backtracking search for bulb placement on unlit unoccupied non-wall-adjacent tiles
                 for possibleNode in unlits:
-                    possibleNode.state = NodeStates.BULB # Try this tile as bulb and recurse
+                    self.placeBulb(possibleNode) # Try this tile as bulb and recurse
 
-                    backtrackingResult = self.backtrackingSolve(wallNodes.copy(), graphState)
+                    backtrackingResult = yield wallNodes.copy(), graphState
 
                     if backtrackingResult == OverallStates.INVALID:
-                        possibleNode.state = NodeStates.EMPTY # Reset tile state if failure
+                        self.removeBulb(possibleNode) # Reset tile state if failure
                     elif backtrackingResult == OverallStates.COMPLETE:
                         return OverallStates.COMPLETE
                     elif backtrackingResult == OverallStates.CANNOT_FINISH:
                         return OverallStates.CANNOT_FINISH
 
-            return OverallStates.INVALID # The tip of this branch is invalid
-    # backtrackingSolve end
-
-    def nodeStateIsWall(self, node):
-        return node.state == NodeStates.WALL or \
-            node.state == NodeStates.WALL0 or \
-            node.state == NodeStates.WALL1 or \
-            node.state == NodeStates.WALL2 or \
-            node.state == NodeStates.WALL3 or \
-            node.state == NodeStates.WALL4
-    # nodeStateIsWall end
-
-    def countIlluminatedSpaces(self, node, graphState):
-        numLitCells = 0
-        adjNodes = graphState[node]
-
-        for adjNode in adjNodes: # For each direction
-            if adjNode.state == NodeStates.WALL: # Border walls aren't in graph
-                continue
-
-            bulbAdjNodes = graphState[adjNode]
-
-            for idx, bulbAdjNode in enumerate(bulbAdjNodes): # For each direction around possible bulb
-                rayNode = bulbAdjNode # Check each node outwards in a ray in that direction until wall
-
-                while True: # Graph should be bordered by WALL, so this will always break eventually
-                    if not self.nodeStateIsWall(rayNode):
-                        numLitCells += 1
-                    elif self.nodeStateIsWall(rayNode):
-                        break # If hit wall, we're done checking in this direction
-
-                    rayNode = graphState[rayNode][idx] # Get next node in this direction
-
-        return numLitCells
-    # countIlluminatedSpaces end
+            # Children that finished the board leave their bulbs behind, and those states aren't dead ends
+            if self.transpositions is not None and self.stateHash == startHash:
+                self.transpositions.add(stateKey)
 
-    def countUnlitSpaces(self, graphState, node):
-        count = 0
-        litMap = {}
-        empties, unlits, bulbs = [], [], []
-
-        for node in graphState:
-            if node.state == NodeStates.EMPTY:
-                litMap[node] = False # Initialize to unlit
-                empties.append(node)
-            elif node.state == NodeStates.BULB:
-                bulbs.append(node)
-
-        for bulb in bulbs:
-            adjNodes = graphState[bulb]
-
-            for idx, adjNode in enumerate(adjNodes): # For each direction
-                rayNode = adjNode # Check each node outwards in a ray in that direction until wall
-
-                while True: # Graph should be bordered by WALL, so this will always break eventually
-                    if rayNode.state == NodeStates.EMPTY:
-                        litMap[rayNode] = True
-                    elif self.nodeStateIsWall(rayNode):
-                        break # If hit wall, we're done checking in this direction
-
-                    rayNode = graphState[rayNode][idx] # Get next node in this direction
-
-        for node in empties:
-            if not litMap[node]:
-                unlits.append(node)
-
-        return count
-
-    def getUnlitSpaces(self, graphState):
-        litMap = {}
-        empties = set()
-        unlits = set()
-        lits = set()
-        bulbs = set()
-
-        for node in graphState:
-            if node.state == NodeStates.EMPTY:
-                litMap[node] = False # Initialize to unlit
-                empties.add(node)
-            elif node.state == NodeStates.BULB:
-                bulbs.add(node)
-
-        for bulb in bulbs:
-            adjNodes = graphState[bulb]
-
-            for idx, adjNode in enumerate(adjNodes): # For each direction
-                rayNode = adjNode # Check each node outwards in a ray in that direction until wall
-
-                while True: # Graph should be bordered by WALL, so this will always break eventually
-                    if self.nodeStateIsWall(rayNode):
-                        break # If hit wall, we're done checking in this direction
-                    elif rayNode.state == NodeStates.EMPTY:
-                        litMap[rayNode] = True
-
-                    rayNode = graphState[rayNode][idx] # Get next node in this direction
-
-        for node in empties:
-            if not litMap[node]:
-                unlits.add(node)
-            else:
-                lits.add(node)
+            return OverallStates.INVALID # The tip of this branch is invalid
+    # backtrackingFrame end
 
-        return unlits, lits
-    # getUnlitSpaces end
+    # adjacents = list: up, right, down and left neighbours of a wall
+    # Returns (sides that are empty, sides with a bulb) as 4 bit masks
+    def getWallMasks(self, adjacents):
+        allowed, bulbs = 0, 0
 
-    def countNodeAdjacentBulbs(self, graphState, node):
-        adjBulbs = 0
+        for side, adjNode in enumerate(adjacents):
+            adjState = adjNode.getDecision()
+            if adjState == NodeStates.EMPTY:
+                allowed |= 1 << side
+            elif adjState == NodeStates.BULB:
+                bulbs |= 1 << side
 
-        for adj in graphState[node]:
-            if adj.state == NodeStates.BULB:
-                adjBulbs += 1
+        return allowed, bulbs
+    # getWallMasks end
 
-        return adjBulbs
-    # countNodeAdjacentBulbs end
+    def nodeStateIsWall(self, node):
+        return self.stateIsWall(node.getDecision())
+    # nodeStateIsWall end
 
-    def checkOverallStates(self, graphState):
-        unlit, lit = self.getUnlitSpaces(graphState) # Not unlitSpacesList = no unlit spaces left
-        isComplete = not unlit
+    # Set node to a bulb, keeping the state counters in step
+    def placeBulb(self, node):
+        if node.getDecision() != NodeStates.BULB:
+            node.setDecision(NodeStates.BULB)
+            self.stateHash ^= self.zobristKeys[(node.x, node.y, NodeStates.BULB)]
+            self.counters.setCellStatus((node.x, node.y), *self.getCellStatus(node))
+    # placeBulb end
+
+    def removeBulb(self, node):
+        if node.getDecision() == NodeStates.BULB:
+            node.setDecision(NodeStates.EMPTY)
+            self.stateHash ^= self.zobristKeys[(node.x, node.y, NodeStates.BULB)]
+            self.counters.setCellStatus((node.x, node.y), *self.getCellStatus(node))
+    # removeBulb end
+
+    # Full rescan of the board by walking rays, independent of the counters it is checked against
+    def scanOverallStates(self, graphState):
+        isComplete = True
 
         for node in graphState:
-            if node.state == NodeStates.BULB:
+            nodeState = node.getDecision()
+            if nodeState == NodeStates.EMPTY:
+                # Lit if any ray from here reaches a bulb before a wall
+                isLit = False
+                for idx, adjNode in enumerate(graphState[node]):
+                    rayNode = adjNode
+                    while not self.nodeStateIsWall(rayNode) and not isLit:
+                        isLit = rayNode.getDecision() == NodeStates.BULB
+                        rayNode = graphState[rayNode][idx]
+                if not isLit:
+                    isComplete = False
+            elif nodeState == NodeStates.BULB:
                 # No bulbs in row or column until wall
-                adjNodes = graphState[node]
-
-                for idx, adjNode in enumerate(adjNodes): # For each direction
-                    rayNode = adjNode # Check each node outwards in a ray in that direction until wall
-
-                    while True: # Graph should be bordered by WALL, so this will always break eventually
-                        if rayNode.state == NodeStates.BULB:
-                            return OverallStates.INVALID # If hit bulb before wall, this state is invalid
-                        elif self.nodeStateIsWall(rayNode):
-                            break # If hit wall, we're done checking in this direction
-
-                        rayNode = graphState[rayNode][idx] # Get next node in this direction
+                for idx, adjNode in enumerate(graphState[node]):
+                    rayNode = adjNode
+                    while not self.nodeStateIsWall(rayNode):
+                        if rayNode.getDecision() == NodeStates.BULB:
+                            return OverallStates.INVALID
+                        rayNode = graphState[rayNode][idx]
             else:
                 adjBulbs = self.countNodeAdjacentBulbs(graphState, node)
 
-                if node.state == NodeStates.WALL0:
+                if nodeState == NodeStates.WALL0:
                     #Less than or equal to 0 adjacent bulbs
                     if adjBulbs > 0:
                         return OverallStates.INVALID
                     elif adjBulbs != 0:
                         isComplete = False
-                elif node.state == NodeStates.WALL1:
+                elif nodeState == NodeStates.WALL1:
                     # Less than or equal to 1 adjacent bulb
                     if adjBulbs > 1:
                         return OverallStates.INVALID
                     elif adjBulbs != 1:
                         isComplete = False
-                elif node.state == NodeStates.WALL2:
+                elif nodeState == NodeStates.WALL2:
                     # Less than or equal to 2 adjacent bulbs
                     if adjBulbs > 2:
                         return OverallStates.INVALID
                     elif adjBulbs != 2:
                         isComplete = False
-                elif node.state == NodeStates.WALL3:
+                elif nodeState == NodeStates.WALL3:
                     # Less than or equal to 3 adjacent bulbs
                     if adjBulbs > 3:
                         return OverallStates.INVALID
                     elif adjBulbs != 3:
                         isComplete = False
-                elif node.state == NodeStates.WALL4:
+                elif nodeState == NodeStates.WALL4:
                     # Less than or equal to 4 adjacent bulbs
                     if adjBulbs > 4:
                         return OverallStates.INVALID
@@ -578,160 +231,55 @@ class BacktrackingSolver:
             return OverallStates.COMPLETE
         else:
             return OverallStates.VALID
-    # stateIsInvalid end
+    # scanOverallStates end
 
     def printState(self):
         unlit, lit = self.getUnlitSpaces(self.graph)
 
         for row in self.board:
             for node in row:
-                if node.state == NodeStates.BULB:
-                    colorPrint(AnsiColors.YELLOW, node, end="")
-                elif node.state == NodeStates.EMPTY:
+                nodeState = node.getDecision()
+                if nodeState == NodeStates.BULB:
+                    self.colorPrint(AnsiColors.YELLOW, nodeState, end="")
+                elif nodeState == NodeStates.EMPTY:
                     if node in unlit:
-                        colorPrint(AnsiColors.GRAY, node, end="")
+                        self.colorPrint(AnsiColors.GRAY, nodeState, end="")
                     else:
-                        colorPrint(AnsiColors.YELLOW, node, end="")
+                        self.colorPrint(AnsiColors.YELLOW, nodeState, end="")
                 else:
-                    colorPrint("", node, end="")
+                    self.colorPrint("", nodeState, end="")
             print()
 
 # BacktrackingSolver end
 
-####################################
-# Utility Functions
-####################################
-
-# ansi = string: from AnsiColors class
-def colorPrint(ansi, *args, end=None, sep=" "):
-    if USE_COLOR_PRINT:
-        print(ansi, end="")
-        print(*args, end="", sep=sep)
-        print(AnsiColors.RESET, end="")
-        print(end=end)
-    else:
-        print(*args, end=end)
-# colorPrint end
-
 ####################################
 # Core Functions
 ####################################
 
-# mapData = list: strings representing each row of map; its initial state
-# mapSize = list: rows, columns
-def createGraphFromMapData(mapData, mapSize):
-    # Convert mapData to discrete nodes
-    nodes = []
-
-    for y, line in enumerate(mapData):
-        nodeRow = []
-        for x, char in enumerate(line):
-            nodeRow.append(Node(char, x, y))
-        nodes.append(nodeRow)
-
-    # Create graph from nodes
-    graph = {}
-
-    for rowIdx in range(mapSize[0]):
-        for columnIdx in range(mapSize[1]):
-            # Gather adjacent nodes of node
-            node = nodes[rowIdx][columnIdx]
-            adjacencyList = []
-
-            up = None
-            down = None
-            left = None
-            right = None
-
-            if rowIdx-1 >= 0:
-                up = nodes[rowIdx-1][columnIdx]
-            if rowIdx+1 < mapSize[0]:
-                down = nodes[rowIdx+1][columnIdx]
-            if columnIdx-1 >= 0:
-                left = nodes[rowIdx][columnIdx-1]
-            if columnIdx+1 < mapSize[1]:
-                right = nodes[rowIdx][columnIdx+1]
-
-            if up is not None:
-                adjacencyList.append(up)
-            else:
-                adjacencyList.append(Node(NodeStates.WALL, rowIdx, columnIdx))
-
-            if right is not None:
-                adjacencyList.append(right)
-            else:
-                adjacencyList.append(Node(NodeStates.WALL, rowIdx, columnIdx))
-
-            if down is not None:
-                adjacencyList.append(down)
-            else:
-                adjacencyList.append(Node(NodeStates.WALL, rowIdx, columnIdx))
-
-            if left is not None:
-                adjacencyList.append(left)
-            else:
-                adjacencyList.append(Node(NodeStates.WALL, rowIdx, columnIdx))
-
-            graph[node] = adjacencyList
-
-    return graph, nodes
-# createGraphFromMapData end
-
-# filename = string: filename of input file
-# SolverClass = class: constructor accepting dictionary graph as first argument, implementing solve method
-def parse(filename, SolverClass):
-    if not os.path.isfile(filename):
-        print("File does not exist:", filename)
-        return
-
-    file = open(filename, "r")
-
-    if file.mode == "r":
-        lines = file.readlines()
-        mapSize = [0,0] # Integers x, y
-        mapData = [] # List of strings denoting map rows
-        readingSize = False # Reading first line of map data
-
-        for line in lines:
-            line = line.strip()
-
-            if "# Start" in line:
-                # Begin reading map
-                readingSize = True
-
-            elif "# End" in line:
-                # Solve the puzzle
-                if SolverClass is not None:
-                    graph, board = createGraphFromMapData(mapData, mapSize)
-                    solver = SolverClass(graph, board)
-                    solver.solve()
-
-                # Reset for next map
-                mapSize = [0,0]
-                mapData = []
-                readingSize = False
-
-            elif len(line) > 0 and line[0] != "#":
-                if readingSize:
-                    # Read map size from first line
-                    split = line.split(" ")
-                    mapSize[0] = int(split[0])
-                    mapSize[1] = int(split[1])
-                    readingSize = False
-
-                else:
-                    # Read map data from rest of lines
-                    mapData.append(line)
-
-        file.close()
-    else:
-        print("Failed to read file:", filename)
-# parse end
+# grid = list: strings representing each row of map, or one string with a row per line
+# solver = class: solver to use, BacktrackingSolver or one taking the same arguments
+# heuristic = int: from HeuristicMode class, None for HEURISTIC_MODE
+# max_steps = int: search steps allowed before giving up, None for MAX_SEARCH_ITERATIONS
+# time_limit = number: seconds allowed before giving up with the best partial board, 0 for no limit, None for SEARCH_TIME_LIMIT
+# config = SolverConfig: shared options, None for the globals' values
+# options = keyword arguments naming SolverConfig options to change, e.g. splitComponents or useRestarts
+# Returns a SolveResult, printing and writing nothing
+def solve(grid, solver=BacktrackingSolver, heuristic=None, max_steps=None, time_limit=None, config=None, **options):
+    return solveGrid(grid, solver, heuristic, max_steps, time_limit, config, **options)
+# solve end
+
+# argv = list: command line arguments, None for sys.argv
+# Prompts for a filename like before when none are given
+def main(argv=None):
+    parser = createArgumentParser("Light-up puzzle solver using backtracking search", HEURISTIC_MODE)
+    args = parser.parse_args(argv)
+    runFromArguments(args, BacktrackingSolver)
+# main end
 
 ####################################
 # Main
 ####################################
 
-filename = input("Enter filename or press enter to use default (lightup puzzles.txt).\n") or "lightup puzzles.txt"
-parse(filename, BacktrackingSolver)
-#input("Completed. Press any key to exit.")
+if __name__ == "__main__":
+    main()
+    #input("Completed. Press any key to exit.")
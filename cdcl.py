@@ -0,0 +1,434 @@
+import heapq
+import time
+from itertools import combinations
+from puzzle_core import NodeStates, OverallStates, HeuristicMode
+from puzzle_search import solveGrid, DEADLINE_CHECK_STEPS
+from puzzle_cli import createArgumentParser, runFromArguments
+from backtrack import BacktrackingSolver
+
+####################################
+# Globals
+####################################
+
+HEURISTIC_MODE = 3 # Seeds the branching activity of cells around walls the heuristic would try first
+ACTIVITY_DECAY = 0.95 # Share of its activity a variable keeps per conflict
+MAX_ACTIVITY = 1e100 # Activities are scaled down once one passes this
+
+####################################
+# Classes
+####################################
+
+# Conflict-driven clause learning SAT solver over variables 1..variableCount
+# Literals are ints, v for a variable being true and -v for it being false
+class CdclEngine:
+    def __init__(self, variableCount):
+        self.variableCount = variableCount
+        self.values = [0] * (variableCount + 1) # Variable -> 1 true, -1 false, 0 unassigned
+        self.levels = [0] * (variableCount + 1) # Variable -> decision level it was assigned at
+        self.reasons = [None] * (variableCount + 1) # Variable -> clause that implied it, None for decisions
+        self.phases = [-1] * (variableCount + 1) # Variable -> value it last had, tried first when branching on it
+        self.activity = [0.0] * (variableCount + 1)
+        self.activityIncrement = 1.0
+        self.clauses = []
+        self.watches = [[] for _ in range(2 * variableCount + 2)] # Literal index -> clauses watching that literal
+        self.trail = [] # Literals in the order they were made true
+        self.trailLimits = [] # Decision level -> trail length when it began
+        self.propagateHead = 0 # Trail literals before this have been propagated
+        self.heap = [] # (-activity, variable), entries go stale when activities change and are skipped
+        self.unsatisfiable = False
+        self.decisions = 0
+        self.conflicts = 0
+    # __init__ end
+
+    # A literal and its negation get neighbouring indices
+    def getLiteralIndex(self, literal):
+        return 2 * literal if literal > 0 else -2 * literal + 1
+    # getLiteralIndex end
+
+    def getLiteralValue(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+    # getLiteralValue end
+
+    # Returns False if the clause makes the problem unsatisfiable on its own
+    def addClause(self, literals):
+        clause = []
+        for literal in literals:
+            if -literal in clause:
+                return True # Always satisfied
+            if literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            # Units are assigned straight away at level 0
+            value = self.getLiteralValue(clause[0])
+            if value == -1:
+                self.unsatisfiable = True
+            elif value == 0:
+                self.enqueue(clause[0], None)
+        else:
+            self.attachClause(clause)
+
+        return not self.unsatisfiable
+    # addClause end
+
+    # Stores a clause and watches its first two literals
+    def attachClause(self, clause):
+        clauseIndex = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[self.getLiteralIndex(clause[0])].append(clauseIndex)
+        self.watches[self.getLiteralIndex(clause[1])].append(clauseIndex)
+        return clauseIndex
+    # attachClause end
+
+    def setActivity(self, variable, activity):
+        self.activity[variable] = activity
+    # setActivity end
+
+    def enqueue(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = 1 if literal > 0 else -1
+        self.levels[variable] = len(self.trailLimits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+    # enqueue end
+
+    # Unit propagation with two watched literals
+    # Returns the index of a clause with every literal false, or None
+    def propagate(self):
+        values = self.values
+        clauses = self.clauses
+        watches = self.watches
+
+        while self.propagateHead < len(self.trail):
+            falseLiteral = -self.trail[self.propagateHead]
+            self.propagateHead += 1
+
+            falseIndex = self.getLiteralIndex(falseLiteral)
+            watchList = watches[falseIndex]
+            keptWatches = []
+            conflict = None
+
+            for position, clauseIndex in enumerate(watchList):
+                clause = clauses[clauseIndex]
+
+                # Keep the false watch in the second slot
+                if clause[0] == falseLiteral:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                first = clause[0]
+                firstValue = values[first] if first > 0 else -values[-first]
+                if firstValue == 1:
+                    keptWatches.append(clauseIndex) # Satisfied by the other watch
+                    continue
+
+                # Move the watch to any literal that isn't false
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[literal] if literal > 0 else -values[-literal]) != -1:
+                        clause[1], clause[k] = literal, clause[1]
+                        watches[self.getLiteralIndex(literal)].append(clauseIndex)
+                        break
+                else:
+                    keptWatches.append(clauseIndex)
+
+                    if firstValue == -1:
+                        conflict = clauseIndex
+                        keptWatches.extend(watchList[position + 1:])
+                        break
+
+                    self.enqueue(first, clauseIndex) # Only the first literal can still be true
+
+            watches[falseIndex] = keptWatches
+
+            if conflict is not None:
+                return conflict
+
+        return None
+    # propagate end
+
+    # First unique implication point analysis of a conflict
+    # Returns the learnt clause, asserting literal first, and the level to jump back to
+    def analyzeConflict(self, conflict):
+        seen = set()
+        learnt = [None]
+        currentLevel = len(self.trailLimits)
+        pathCount = 0 # Seen literals from the current level not yet resolved away
+        trailIndex = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        literal = None
+
+        while True:
+            # The first literal of a reason clause is the one it implied
+            for reasonLiteral in (clause if literal is None else clause[1:]):
+                variable = abs(reasonLiteral)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bumpActivity(variable)
+
+                    if self.levels[variable] == currentLevel:
+                        pathCount += 1
+                    else:
+                        learnt.append(reasonLiteral)
+
+            # Resolve on the latest assigned literal involved
+            while abs(self.trail[trailIndex]) not in seen:
+                trailIndex -= 1
+            literal = self.trail[trailIndex]
+            trailIndex -= 1
+            pathCount -= 1
+
+            if pathCount == 0:
+                break
+
+            seen.discard(abs(literal))
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learnt[0] = -literal
+
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal from the highest remaining level second so it's the first undone
+        deepest = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+
+        return learnt, self.levels[abs(learnt[1])]
+    # analyzeConflict end
+
+    # VSIDS: variables in recent conflicts get branched on first
+    def bumpActivity(self, variable):
+        self.activity[variable] += self.activityIncrement
+
+        if self.activity[variable] > MAX_ACTIVITY:
+            for v in range(1, self.variableCount + 1):
+                self.activity[v] /= MAX_ACTIVITY
+            self.activityIncrement /= MAX_ACTIVITY
+            self.rebuildHeap()
+        else:
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+    # bumpActivity end
+
+    # Growing the increment decays every earlier bump without touching them
+    def decayActivity(self):
+        self.activityIncrement /= ACTIVITY_DECAY
+    # decayActivity end
+
+    def rebuildHeap(self):
+        self.heap = [(-self.activity[v], v) for v in range(1, self.variableCount + 1) if self.values[v] == 0]
+        heapq.heapify(self.heap)
+    # rebuildHeap end
+
+    # Returns the unassigned variable with the highest activity, or 0 if all are assigned
+    def pickBranchVariable(self):
+        if len(self.heap) > 4 * self.variableCount + 64:
+            self.rebuildHeap() # Too many stale entries
+
+        while self.heap:
+            negativeActivity, variable = heapq.heappop(self.heap)
+            if self.values[variable] == 0 and -negativeActivity == self.activity[variable]:
+                return variable
+
+        return 0
+    # pickBranchVariable end
+
+    # Undoes every assignment above level
+    def cancelUntil(self, level):
+        if len(self.trailLimits) <= level:
+            return
+
+        for literal in self.trail[self.trailLimits[level]:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = 0
+            self.reasons[variable] = None
+            heapq.heappush(self.heap, (-self.activity[variable], variable))
+
+        del self.trail[self.trailLimits[level]:]
+        del self.trailLimits[level:]
+        self.propagateHead = len(self.trail)
+    # cancelUntil end
+
+    # maxDecisions = int: branching decisions allowed before giving up
+    # deadline = number: time.time() to give up at, looked at every DEADLINE_CHECK_STEPS decisions, None for no limit
+    # Returns True if satisfiable, False if not, None if out of decisions or time
+    def solve(self, maxDecisions, deadline=None):
+        if self.unsatisfiable:
+            return False
+
+        self.rebuildHeap()
+
+        while True:
+            conflict = self.propagate()
+
+            if conflict is not None:
+                self.conflicts += 1
+                if not self.trailLimits:
+                    self.unsatisfiable = True
+                    return False # Conflict without any decisions
+
+                learnt, level = self.analyzeConflict(conflict)
+                self.cancelUntil(level)
+
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.enqueue(learnt[0], self.attachClause(learnt))
+
+                self.decayActivity()
+            else:
+                variable = self.pickBranchVariable()
+                if variable == 0:
+                    return True # Everything assigned without conflict
+
+                if self.decisions > maxDecisions:
+                    return None
+                if deadline is not None and self.decisions % DEADLINE_CHECK_STEPS == 0 and time.time() > deadline:
+                    return None
+                self.decisions += 1
+
+                self.trailLimits.append(len(self.trail))
+                self.enqueue(variable if self.phases[variable] > 0 else -variable, None)
+    # solve end
+
+    def isTrue(self, variable):
+        return self.values[variable] == 1
+    # isTrue end
+# CdclEngine end
+
+# Encodes the puzzle as CNF and solves it with CdclEngine, one variable per cell for whether it holds a bulb
+# Shares the backtracking solver's board, so only the search differs
+class CdclSolver(BacktrackingSolver):
+    csvFileNames = {
+        HeuristicMode.NONE: "cdcl_no_h.csv",
+        HeuristicMode.MOST_CONSTRAINED: "cdcl_constrained.csv",
+        HeuristicMode.MOST_CONSTRAINING: "cdcl_constraining.csv",
+        HeuristicMode.HYBRID: "cdcl_hybrid.csv",
+    }
+
+    # heuristicMode = int: from HeuristicMode class, None for HEURISTIC_MODE
+    # config = SolverConfig: shared options, its maxSteps counting branching decisions, None for the globals' values
+    def __init__(self, graph, node2dArray, heuristicMode=None, config=None):
+        super().__init__(graph, node2dArray, HEURISTIC_MODE if heuristicMode is None else heuristicMode, config)
+        self.engine = None
+        self.variableOf = {} # (x, y) -> variable
+    # __init__ end
+
+    def runSearch(self, wallNodes):
+        self.engine = self.encodeClauses()
+        self.seedActivities(wallNodes)
+
+        try:
+            # Search solvers give up at maxSteps + 2 steps, so count decisions the same way for the csv
+            satisfiable = self.engine.solve(self.maxSteps + 1, self.deadline)
+        finally:
+            self.searchSteps = self.engine.decisions
+
+        if satisfiable is None:
+            # The engine only gives up after propagating without a conflict, so its bulbs so far break no clause
+            self.placeTrueBulbs()
+            self.recordPartial(self.board)
+            return OverallStates.CANNOT_FINISH
+        elif not satisfiable:
+            return OverallStates.INVALID
+
+        self.placeTrueBulbs()
+        return self.checkOverallStates(self.graph)
+    # runSearch end
+
+    # Puts a bulb on every cell whose variable the engine has set true
+    def placeTrueBulbs(self):
+        for position, variable in self.variableOf.items():
+            if self.engine.isTrue(variable):
+                x, y = position
+                self.placeBulb(self.board[y][x])
+    # placeTrueBulbs end
+
+    def encodeClauses(self):
+        for position in self.segments.segmentsOf:
+            self.variableOf[position] = len(self.variableOf) + 1
+
+        engine = CdclEngine(len(self.variableOf))
+        variableOf = self.variableOf
+
+        # At most one bulb per row or column run
+        for run in self.segments.members:
+            for a, b in combinations(run, 2):
+                engine.addClause([-variableOf[a], -variableOf[b]])
+
+        # Every cell lit, by a bulb on itself or in one of its runs
+        for position, segments in self.segments.segmentsOf.items():
+            coverage = {variableOf[position]}
+            for segment in segments:
+                coverage.update(variableOf[member] for member in self.segments.members[segment])
+            engine.addClause(sorted(coverage))
+
+        # Exactly as many adjacent bulbs as each numbered wall says
+        for node in self.graph:
+            nodeState = node.getDecision()
+            if not self.stateIsWall(nodeState) or nodeState == NodeStates.WALL:
+                continue
+
+            number = int(nodeState)
+            adjVariables = [variableOf[(adj.x, adj.y)] for adj in self.graph[node] if (adj.x, adj.y) in variableOf and adj.getDecision() != NodeStates.WALL]
+
+            if number > len(adjVariables):
+                engine.addClause([]) # Not enough room around the wall
+                continue
+
+            # No number + 1 of them all bulbs, and no len - number + 1 of them all empty
+            for subset in combinations(adjVariables, number + 1):
+                engine.addClause([-v for v in subset])
+            if number > 0:
+                for subset in combinations(adjVariables, len(adjVariables) - number + 1):
+                    engine.addClause(list(subset))
+
+        return engine
+    # encodeClauses end
+
+    # Start branching next to the walls the heuristic orders first, before conflicts take over
+    def seedActivities(self, wallNodes):
+        if self.heuristicMode == HeuristicMode.NONE:
+            return
+
+        for rank, node in enumerate(wallNodes):
+            activity = (len(wallNodes) - rank) / (len(wallNodes) + 1)
+            for adj in self.graph[node]:
+                variable = self.variableOf.get((adj.x, adj.y))
+                if variable is not None and adj.getDecision() != NodeStates.WALL and self.engine.activity[variable] < activity:
+                    self.engine.setActivity(variable, activity)
+    # seedActivities end
+# CdclSolver end
+
+####################################
+# Core Functions
+####################################
+
+# grid = list: strings representing each row of map, or one string with a row per line
+# solver = class: solver to use, CdclSolver or one taking the same arguments
+# heuristic = int: from HeuristicMode class, None for HEURISTIC_MODE
+# max_steps = int: branching decisions allowed before giving up, None for MAX_SEARCH_ITERATIONS
+# time_limit = number: seconds allowed before giving up with the best partial board, 0 for no limit, None for SEARCH_TIME_LIMIT
+# config = SolverConfig: shared options, None for the globals' values
+# options = keyword arguments naming SolverConfig options to change, e.g. splitComponents or useRestarts
+# Returns a SolveResult, printing and writing nothing
+def solve(grid, solver=CdclSolver, heuristic=None, max_steps=None, time_limit=None, config=None, **options):
+    return solveGrid(grid, solver, heuristic, max_steps, time_limit, config, **options)
+# solve end
+
+# argv = list: command line arguments, None for sys.argv
+# Prompts for a filename like before when none are given
+def main(argv=None):
+    parser = createArgumentParser("Light-up puzzle solver using clause learning SAT solving", HEURISTIC_MODE)
+    args = parser.parse_args(argv)
+    runFromArguments(args, CdclSolver)
+# main end
+
+####################################
+# Main
+####################################
+
+if __name__ == "__main__":
+    main()
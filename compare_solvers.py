@@ -0,0 +1,64 @@
+import argparse
+import time
+from puzzle_search import MAX_SEARCH_ITERATIONS, solveGrid
+from puzzle_batch import readPuzzles
+from backtrack import BacktrackingSolver
+from forward_checking import ForwardCheckingSolver
+from dancing_links import DancingLinksSolver
+from cdcl import CdclSolver
+
+####################################
+# Globals
+####################################
+
+SOLVERS = {
+    "bt": BacktrackingSolver,
+    "fc": ForwardCheckingSolver,
+    "dlx": DancingLinksSolver,
+    "cdcl": CdclSolver,
+}
+
+####################################
+# Core Functions
+####################################
+
+# filenames = list: puzzle files, read once and given to every solver in the same order
+# solverNames = list: keys of SOLVERS
+# heuristic = int: from HeuristicMode class, None for each solver's default
+# maxSteps = int: search steps allowed per puzzle
+# Prints puzzles solved, steps and puzzles per second for each solver
+def compareSolvers(filenames, solverNames, heuristic=None, maxSteps=MAX_SEARCH_ITERATIONS):
+    puzzles = [puzzle.mapData for filename in filenames for puzzle in readPuzzles(filename)]
+
+    print("%-12s %8s %8s %12s %10s %12s" % ("solver", "puzzles", "solved", "steps", "seconds", "puzzles/s"))
+    for name in solverNames:
+        solvedCount, totalSteps = 0, 0
+        startTime = time.time()
+
+        for mapData in puzzles:
+            result = solveGrid(mapData, SOLVERS[name], heuristic, maxSteps)
+            totalSteps += result.steps
+            if result.solved:
+                solvedCount += 1
+
+        seconds = time.time() - startTime
+        print("%-12s %8d %8d %12d %10.2f %12.2f" % (name, len(puzzles), solvedCount, totalSteps, seconds, len(puzzles) / seconds if seconds else 0), flush=True)
+# compareSolvers end
+
+# argv = list: command line arguments, None for sys.argv
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the throughput of the solvers on the same puzzles")
+    parser.add_argument("filenames", nargs="+", help="puzzle files to solve")
+    parser.add_argument("--solvers", nargs="+", choices=SOLVERS, default=list(SOLVERS), help="solvers to run")
+    parser.add_argument("--heuristic", type=int, choices=range(4), default=None, help="heuristic for every solver, each solver's default if not given")
+    parser.add_argument("--max-steps", type=int, default=MAX_SEARCH_ITERATIONS, help="search steps allowed per puzzle")
+    args = parser.parse_args(argv)
+    compareSolvers(args.filenames, args.solvers, args.heuristic, args.max_steps)
+# main end
+
+####################################
+# Main
+####################################
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+from puzzle_core import NodeStates, OverallStates, HeuristicMode
+from puzzle_search import SolverConfig, runSearchFrames, solveGrid, createSolver
+from puzzle_cli import createArgumentParser, runFromArguments
+from backtrack import BacktrackingSolver
+
+####################################
+# Globals
+####################################
+
+HEURISTIC_MODE = 2 # Orders the bulb options within each column
+COUNT_SOLUTIONS = False # Keep searching after the first solution and report how many there are
+
+####################################
+# Classes
+####################################
+
+# Knuth's dancing links, generalized so primary columns are covered between a lower and upper number of times
+# and secondary columns at most their upper number of times
+# Node indices below the first row are column headers, and header 0 is the root of the list of columns still needing cover
+class DancingLinks:
+    def __init__(self):
+        self.left = [0] # Header list of primary columns with unmet lower bounds
+        self.right = [0]
+        self.up = [0] # Vertical lists of the rows still available in each column
+        self.down = [0]
+        self.columnOf = [0] # Node -> column header
+        self.rowOf = [None] # Node -> row
+        self.lengths = [0] # Column -> rows still available
+        self.needs = [0] # Column -> covers still required
+        self.rooms = [0] # Column -> covers still allowed
+        self.primary = [False]
+        self.counted = [False] # Column -> whether it counts towards unmetCount
+        self.unmetCount = 0 # Counted columns whose lower bound isn't met yet
+        self.rowNodes = [] # Row -> its nodes, one per column
+    # __init__ end
+
+    # lower, upper = int: times the column must and may be covered
+    # Secondary columns have no lower bound and aren't chosen to branch on
+    # counted = bool: count it in unmetCount while its lower bound isn't met
+    # Returns the column
+    def addColumn(self, lower, upper, primary=True, counted=False):
+        column = len(self.up)
+        self.up.append(column)
+        self.down.append(column)
+        self.columnOf.append(column)
+        self.rowOf.append(None)
+        self.lengths.append(0)
+        self.needs.append(lower if primary else 0)
+        self.rooms.append(upper)
+        self.primary.append(primary)
+        self.counted.append(counted)
+        self.left.append(column)
+        self.right.append(column)
+
+        if primary and lower > 0:
+            self.linkColumn(column, self.left[0])
+            if counted:
+                self.unmetCount += 1
+
+        return column
+    # addColumn end
+
+    # columns = list: columns the row covers, all added before the first row
+    # Returns the row
+    def addRow(self, columns):
+        row = len(self.rowNodes)
+        nodes = []
+
+        for column in columns:
+            node = len(self.up)
+            self.up.append(self.up[column])
+            self.down.append(column)
+            self.down[self.up[column]] = node
+            self.up[column] = node
+            self.columnOf.append(column)
+            self.rowOf.append(row)
+            self.left.append(node)
+            self.right.append(node)
+            self.lengths[column] += 1
+            nodes.append(node)
+
+        self.rowNodes.append(nodes)
+        return row
+    # addRow end
+
+    # Puts column back into the header list after previous
+    def linkColumn(self, column, previous):
+        self.left[column] = previous
+        self.right[column] = self.right[previous]
+        self.left[self.right[previous]] = column
+        self.right[previous] = column
+    # linkColumn end
+
+    def unlinkColumn(self, column):
+        self.right[self.left[column]] = self.right[column]
+        self.left[self.right[column]] = self.left[column]
+    # unlinkColumn end
+
+    def relinkColumn(self, column):
+        self.right[self.left[column]] = column
+        self.left[self.right[column]] = column
+    # relinkColumn end
+
+    # Takes row out of every column it covers; its own links are kept so unhideRow can dance it back in
+    def hideRow(self, row):
+        for node in self.rowNodes[row]:
+            self.down[self.up[node]] = self.down[node]
+            self.up[self.down[node]] = self.up[node]
+            self.lengths[self.columnOf[node]] -= 1
+    # hideRow end
+
+    # Rows must be unhidden in the reverse order they were hidden
+    def unhideRow(self, row):
+        for node in reversed(self.rowNodes[row]):
+            self.down[self.up[node]] = node
+            self.up[self.down[node]] = node
+            self.lengths[self.columnOf[node]] += 1
+    # unhideRow end
+
+    # Hides the rows of every column that can't be covered again
+    # Returns the hidden rows, for showRows
+    def hideRowsOfFullColumns(self):
+        hiddenRows = []
+
+        for column in range(1, len(self.rooms)):
+            if self.rooms[column] <= 0:
+                while self.down[column] != column:
+                    row = self.rowOf[self.down[column]]
+                    self.hideRow(row)
+                    hiddenRows.append(row)
+
+        return hiddenRows
+    # hideRowsOfFullColumns end
+
+    # Adds row to the partial solution
+    # Returns the rows hidden and columns unlinked, for deselectRow
+    def selectRow(self, row):
+        self.hideRow(row)
+        hiddenRows = [row]
+        unlinkedColumns = []
+
+        for node in self.rowNodes[row]:
+            column = self.columnOf[node]
+            self.needs[column] -= 1
+            self.rooms[column] -= 1
+
+            if self.needs[column] == 0 and self.primary[column]:
+                self.unlinkColumn(column)
+                unlinkedColumns.append(column)
+                if self.counted[column]:
+                    self.unmetCount -= 1
+
+            # A full column rules out every other row in it
+            if self.rooms[column] == 0:
+                while self.down[column] != column:
+                    otherRow = self.rowOf[self.down[column]]
+                    self.hideRow(otherRow)
+                    hiddenRows.append(otherRow)
+
+        return hiddenRows, unlinkedColumns
+    # selectRow end
+
+    def deselectRow(self, row, hiddenRows, unlinkedColumns):
+        for column in reversed(unlinkedColumns):
+            self.relinkColumn(column)
+            if self.counted[column]:
+                self.unmetCount += 1
+
+        for node in self.rowNodes[row]:
+            column = self.columnOf[node]
+            self.needs[column] += 1
+            self.rooms[column] += 1
+
+        self.showRows(hiddenRows)
+    # deselectRow end
+
+    def showRows(self, hiddenRows):
+        for row in reversed(hiddenRows):
+            self.unhideRow(row)
+    # showRows end
+
+    # The column still needing cover with the fewest spare rows, Knuth's MRV rule
+    # Returns 0 if every lower bound is met
+    def chooseColumn(self):
+        bestColumn, bestSlack = 0, None
+        column = self.right[0]
+
+        while column != 0:
+            slack = self.lengths[column] - self.needs[column]
+            if bestSlack is None or slack < bestSlack:
+                bestColumn, bestSlack = column, slack
+                if slack <= 0:
+                    break # Forced or already impossible
+            column = self.right[column]
+
+        return bestColumn
+    # chooseColumn end
+# DancingLinks end
+
+# Solves the puzzle as a generalized exact cover problem with Algorithm X
+# Rows are bulb placements, primary columns are cells (lit 1+ times) and numbered walls (exactly their number of adjacent bulbs),
+# and secondary columns are row and column runs (at most one bulb)
+# Shares the backtracking solver's board, so only the search differs
+class DancingLinksSolver(BacktrackingSolver):
+    csvFileNames = {
+        HeuristicMode.NONE: "dlx_no_h.csv",
+        HeuristicMode.MOST_CONSTRAINED: "dlx_constrained.csv",
+        HeuristicMode.MOST_CONSTRAINING: "dlx_constraining.csv",
+        HeuristicMode.HYBRID: "dlx_hybrid.csv",
+    }
+
+    # heuristicMode = int: from HeuristicMode class, None for HEURISTIC_MODE
+    # config = SolverConfig: shared options, None for the globals' values
+    # countSolutions = bool: search the whole tree counting solutions, None for COUNT_SOLUTIONS
+    def __init__(self, graph, node2dArray, heuristicMode=None, config=None, countSolutions=None):
+        super().__init__(graph, node2dArray, HEURISTIC_MODE if heuristicMode is None else heuristicMode, config)
+        self.countSolutions = COUNT_SOLUTIONS if countSolutions is None else countSolutions
+        self.splitComponents = self.splitComponents and not self.countSolutions # Counts of separate regions would have to be multiplied
+        self.useCache = self.useCache and not self.countSolutions # A cached solution says nothing of how many there are
+        self.links = None
+        self.cellOfRow = [] # Row -> node the row places a bulb on
+        self.chosenRows = []
+        self.firstSolution = None # Rows of the first solution found
+        self.solutionCount = 0
+    # __init__ end
+
+    def runSearch(self, wallNodes):
+        self.links = self.createLinks()
+        self.links.hideRowsOfFullColumns() # Cells next to WALL0 tiles
+
+        result = runSearchFrames(self.dancingLinksFrame)
+
+        if self.firstSolution is None:
+            return result
+
+        for row in self.firstSolution:
+            self.placeBulb(self.cellOfRow[row])
+
+        if result == OverallStates.CANNOT_FINISH:
+            return result # Solved, but the count may be short
+        return self.checkOverallStates(self.graph)
+    # runSearch end
+
+    def createLinks(self):
+        links = DancingLinks()
+        cellColumns, wallColumns, segmentColumns = {}, {}, []
+
+        for position in self.segments.segmentsOf:
+            cellColumns[position] = links.addColumn(1, 2, counted=True) # One bulb in each of its runs at most, unlit until covered
+
+        for node in self.graph:
+            nodeState = node.getDecision()
+            if self.stateIsWall(nodeState) and nodeState != NodeStates.WALL:
+                wallColumns[node] = links.addColumn(int(nodeState), int(nodeState))
+
+        for _ in self.segments.members:
+            segmentColumns.append(links.addColumn(0, 1, primary=False))
+
+        # Rows in the order the heuristic would try open cells
+        cells = [node for node in self.graph if (node.x, node.y) in cellColumns]
+        self.sortUnlitSpaces(cells, self.graph)
+
+        for node in cells:
+            position = (node.x, node.y)
+            columns = [cellColumns[position]]
+
+            # Cells it lights
+            for litPosition in self.segments.getRayCells(node.x, node.y):
+                columns.append(cellColumns[litPosition])
+
+            # Walls it counts towards
+            for adj in self.graph[node]:
+                if adj in wallColumns:
+                    columns.append(wallColumns[adj])
+
+            # Runs it fills
+            for segment in self.segments.segmentsOf[position]:
+                columns.append(segmentColumns[segment])
+
+            links.addRow(columns)
+            self.cellOfRow.append(node)
+
+        return links
+    # createLinks end
+
+    # One level of Algorithm X, run by runSearchFrames
+    # Tries each row of the chosen column, ruling it out again before trying the next
+    def dancingLinksFrame(self):
+        if self.aborted:
+            return OverallStates.CANNOT_FINISH
+
+        self.recordLinksPartial()
+        self.countStep()
+
+        links = self.links
+        column = links.chooseColumn()
+
+        if column == 0:
+            # Every cell lit and every wall satisfied
+            self.solutionCount += 1
+            if self.firstSolution is None:
+                self.firstSolution = list(self.chosenRows)
+
+            return OverallStates.INVALID if self.countSolutions else OverallStates.COMPLETE
+
+        result = OverallStates.INVALID
+        excludedRows = []
+
+        while links.lengths[column] >= links.needs[column] and links.down[column] != column:
+            row = links.rowOf[links.down[column]]
+            hiddenRows, unlinkedColumns = links.selectRow(row)
+            self.chosenRows.append(row)
+
+            result = yield ()
+
+            self.chosenRows.pop()
+            links.deselectRow(row, hiddenRows, unlinkedColumns)
+
+            if result == OverallStates.COMPLETE or result == OverallStates.CANNOT_FINISH:
+                break
+
+            links.hideRow(row) # Solutions with this row have all been found
+            excludedRows.append(row)
+
+        links.showRows(excludedRows)
+
+        return result
+    # dancingLinksFrame end
+
+    # recordPartial for the rows chosen so far, which never break a run or overfill a wall
+    def recordLinksPartial(self):
+        unlitCount = self.links.unmetCount
+        if self.bestUnlit is None or unlitCount < self.bestUnlit:
+            self.bestUnlit = unlitCount
+            self.bestPartial = list(self.chosenRows)
+    # recordLinksPartial end
+
+    # Places the bulbs of the best partial rows, unless runSearch already placed a solution's
+    def restoreBestPartial(self):
+        if self.bestPartial is not None and self.firstSolution is None:
+            for row in self.bestPartial:
+                self.placeBulb(self.cellOfRow[row])
+    # restoreBestPartial end
+
+    # The count is the round's, as this solver never searched
+    def keepRound(self, solver):
+        self.solutionCount = solver.solutionCount
+    # keepRound end
+
+    def printState(self):
+        if self.countSolutions:
+            print("Solutions found:", self.solutionCount)
+        super().printState()
+    # printState end
+# DancingLinksSolver end
+
+####################################
+# Core Functions
+####################################
+
+# grid = list: strings representing each row of map, or one string with a row per line
+# solver = class: solver to use, DancingLinksSolver or one taking the same arguments
+# heuristic = int: from HeuristicMode class, None for HEURISTIC_MODE
+# max_steps = int: search steps allowed before giving up, None for MAX_SEARCH_ITERATIONS
+# time_limit = number: seconds allowed before giving up with the best partial board, 0 for no limit, None for SEARCH_TIME_LIMIT
+# config = SolverConfig: shared options, None for the globals' values
+# options = keyword arguments naming SolverConfig options to change, e.g. splitComponents or useRestarts,
+#   or countSolutions
+# Returns a SolveResult, printing and writing nothing
+def solve(grid, solver=DancingLinksSolver, heuristic=None, max_steps=None, time_limit=None, config=None, **options):
+    return solveGrid(grid, solver, heuristic, max_steps, time_limit, config, **options)
+# solve end
+
+# grid = list: strings representing each row of map, or one string with a row per line
+# max_steps = int: search steps allowed before giving up, None for MAX_SEARCH_ITERATIONS
+# Returns the number of solutions, or None if the steps ran out before all were found
+def countSolutions(grid, max_steps=None):
+    mapData = grid.split() if isinstance(grid, str) else list(grid)
+    solver = createSolver(DancingLinksSolver, mapData, [len(mapData), len(mapData[0]) if mapData else 0], SolverConfig(maxSteps=max_steps), countSolutions=True)
+
+    if solver.search() == OverallStates.CANNOT_FINISH:
+        return None
+    return solver.solutionCount
+# countSolutions end
+
+# argv = list: command line arguments, None for sys.argv
+# Prompts for a filename like before when none are given
+def main(argv=None):
+    parser = createArgumentParser("Light-up puzzle solver using Algorithm X with dancing links", HEURISTIC_MODE)
+    parser.add_argument("--count", action="store_true", default=COUNT_SOLUTIONS, help="search on after the first solution and print how many there are")
+    args = parser.parse_args(argv)
+    runFromArguments(args, DancingLinksSolver, countSolutions=args.count)
+# main end
+
+####################################
+# Main
+####################################
+
+if __name__ == "__main__":
+    main()
@@ -1,342 +1,192 @@
-import os.path
-import sys
-import csv
-import time
-
-####################################
-# Enums
-####################################
-
-class AnsiColors:
-    GRAY = "\033[90m"
-    RED = '\033[91m'
-    GREEN = "\033[92m"
-    YELLOW = "\033[93m"
-    BLUE = "\033[94m"
-
-    RESET = "\033[0m"
-# AnsiColors end
-
-class NodeStates:
-    BULB = "b"
-    WALL = "W"
-    WALL0 = "0"
-    WALL1 = "1"
-    WALL2 = "2"
-    WALL3 = "3"
-    WALL4 = "4"
-    EMPTY = "_"
-# NodeStates end
-
-class OverallStates:
-    INVALID = 0
-    VALID = 1
-    COMPLETE = 2
-    CANNOT_FINISH = 3
-# OverallStates end
-
-class HeuristicMode:
-    NONE = 0
-    MOST_CONSTRAINED = 1
-    MOST_CONSTRAINING = 2
-    HYBRID = 3
-# HeuristicMode end
+import heapq
+from collections import deque
+from puzzle_core import NodeStates, OverallStates, HeuristicMode, AnsiColors, WALL_COMPLETIONS, STATE_BITS, BULB_BIT, EMPTY_BIT, \
+    Node, createGraphFromNodeMatrix
+from puzzle_search import PuzzleSolver, runSearchFrames, solveGrid
+from puzzle_cli import createArgumentParser, runFromArguments
 
 ####################################
 # Globals
 ####################################
 
-USE_COLOR_PRINT = True # Disable if terminal doesn't support ANSI escape codes (e.g. prints gibberish)
-MAX_SEARCH_ITERATIONS = 100000
-MAX_RECURSION_DEPTH = 1400 # Default is around 997
 HEURISTIC_MODE = HeuristicMode.HYBRID
-SAVE_CSV = True
-
-sys.setrecursionlimit(MAX_RECURSION_DEPTH + 100)
+USE_TRAIL_UNDO = True # Undo recorded eliminations on backtrack instead of deep copying every branch
+USE_BACKJUMPING = True # Jump back to the decision behind a failure and record it as a nogood
+NOGOOD_LIMIT = 1000 # Most recent nogoods kept
+USE_VISIBILITY_PROPAGATION = True # Also propagate from which spaces could still light each space, not only around walls
+USE_DYNAMIC_ORDERING = False # Branch on the wall with the fewest bulb configurations left, then on the darkest space, instead of a fixed order
 
 ####################################
 # Classes
 ####################################
 
-class Node:
-    def __init__(self, possibilitySet, x, y):
-        self.possibilitySet = possibilitySet
-        self.x = x
-        self.y = y
+class ForwardCheckingSolver(PuzzleSolver):
+    csvFileNames = {
+        HeuristicMode.NONE: "fc_no_h.csv",
+        HeuristicMode.MOST_CONSTRAINED: "fc_constrained.csv",
+        HeuristicMode.MOST_CONSTRAINING: "fc_contraining.csv",
+        HeuristicMode.HYBRID: "fc_hybrid.csv",
+    }
+    dynamicCsvFileName = "fc_dynamic.csv" # Dynamic ordering ignores the heuristic, so its results go in a file of their own
+
+    # heuristicMode = int: from HeuristicMode class, None for HEURISTIC_MODE
+    # config = SolverConfig: shared options, None for the globals' values
+    # backjumping, visibility, dynamicOrdering, trailUndo = bool: None for USE_BACKJUMPING, USE_VISIBILITY_PROPAGATION,
+    #   USE_DYNAMIC_ORDERING and USE_TRAIL_UNDO
+    def __init__(self, graph, node2dArray, heuristicMode=None, config=None, backjumping=None, visibility=None, dynamicOrdering=None, trailUndo=None):
+        super().__init__(graph, node2dArray, HEURISTIC_MODE if heuristicMode is None else heuristicMode, config)
+        self.trailUndo = USE_TRAIL_UNDO if trailUndo is None else trailUndo
+        self.trail = [] # (node, possibility) eliminations since the search began, undone on backtrack
+
+        # Conflict-directed backjumping state, decision level n being bit n of a mask
+        self.backjump = USE_BACKJUMPING if backjumping is None else backjumping
+        self.reasons = {} # (x, y, possibility) -> levels that forced its last elimination
+        self.conflictLevels = 0 # Levels behind the last INVALID a frame returned
+        self.levelBulbs = [] # Level -> positions of the bulbs decided there
+        self.nogoods = deque(maxlen=NOGOOD_LIMIT) # Positions that can't all be bulbs
+
+        # Worklist propagation state
+        self.changedNodes = [] # Nodes that lost a possibility since the last propagation
+        self.propagateAll = True # First propagation has to look at every wall
+        self.propagatedWalls = [] # Positions of WALL1-3 tiles in board order
+        self.adjacentWalls = {} # Position -> positions of adjacent WALL1-3 tiles
+
+        for y, row in enumerate(node2dArray):
+            for x, node in enumerate(row):
+                if node.getDecision() in (NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3):
+                    self.propagatedWalls.append((x, y))
+                    for adjX, adjY in ((x, y-1), (x+1, y), (x, y+1), (x-1, y)):
+                        self.adjacentWalls.setdefault((adjX, adjY), []).append((x, y))
+
+        # Visibility propagation state
+        self.visibility = USE_VISIBILITY_PROPAGATION if visibility is None else visibility
+        self.sightLines = {} # Position -> itself and the spaces in its runs, the spaces that could light it
+        self.rayCellSets = {} # Position -> the spaces in its runs
+        for (x, y) in self.segments.segmentsOf:
+            rayCells = list(self.segments.getRayCells(x, y))
+            self.sightLines[(x, y)] = [(x, y)] + rayCells
+            self.rayCellSets[(x, y)] = frozenset(rayCells)
+        self.candidateCounts, self.deadCells = self.createCandidateCounts(self.graph)
+        self.recountedCells = [] # Positions whose candidate count dropped since the last propagation
+
+        # Dynamic ordering state
+        self.dynamicOrder = USE_DYNAMIC_ORDERING if dynamicOrdering is None else dynamicOrdering
+        self.wallTieScores = {} # Wall position -> spaces its bulbs could light, to break ties between walls
+        self.touchedWalls = set() # Walls whose neighbours changed since the last branch was applied
     # __init__ end
 
-    def getDecision(self):
-        numChoices = len(self.possibilitySet)
-        if numChoices == 1:
-            (possibility,) = self.possibilitySet
-            return possibility
-        elif numChoices <= 0:
-            return None
-        return None
-    # getDecision end
-
-    def isDecided(self):
-        return len(self.possibilitySet) > 1
-    # isDecided end
-
-    def __str__(self):
-        return "[" + "".join(self.possibilitySet) + "]"
-    # __str__ end
-
-    def __repr__(self):
-        return "[" + "".join(self.possibilitySet) + "]"
-    # __repr__ end
-
-    def __unicode__(self):
-        return "[" + "".join(self.possibilitySet) + "]"
-    # __unicode__ end
-# Node end
-
-class ForwardCheckingSolver:
-    def __init__(self, graph, node2dArray):
-        self.graph = graph
-        self.board = node2dArray
-        self.solved = False
-        self.searchSteps = 0
-        self.aborted = False
-
-        self.depth = 0
-    # __init__ end
+    def getCsvFileName(self):
+        if self.dynamicOrder:
+            return self.dynamicCsvFileName
+        return super().getCsvFileName()
+    # getCsvFileName end
 
-    def solve(self):
+    def prepareSearch(self):
         # Precalculate wall0 and wall4 states
-        self.initializePossibilities(self.graph)
-
-        # Get all numbered tiles
-        wallNode3Count, wallNode4Count = 0, 0
-        initWallNodes, initEmptyNodes, wallNodes = [], [], []
-        csv_file_name = ""
-        for n in self.graph:
-            if self.stateIsWall(n.getDecision()):
-                if n.getDecision() == NodeStates.WALL4:
-                    initWallNodes.insert(0, n)
-                    wallNode4Count += 1
-                elif n.getDecision() != NodeStates.WALL0:
-                    initWallNodes.append(n)
-            else:
-                initEmptyNodes.append(n)
-
-        wallNodes.extend(initWallNodes[:wallNode4Count])
-
-        # Sort wall tiles for heuristic
-        if HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINED:
-            # combinations = [[1 combination], [2 combinations], [3 combinations], [4 combinations], [6 combinations]]
-            combinations = [[], [], [], [], []]
-            combinations[0].extend(wallNodes)
-            for node in initWallNodes:
-                empty_cell = len([v for v in self.graph[node] if v.getDecision() == NodeStates.EMPTY])
-                if node.getDecision() == NodeStates.WALL3:
-                    if empty_cell == 3:
-                        combinations[0].append(node)
-                    elif empty_cell == 4:
-                        combinations[3].append(node)
-                elif node.getDecision() == NodeStates.WALL2:
-                    if empty_cell == 4:
-                        combinations[4].append(node)
-                    elif empty_cell == 3:
-                        combinations[2].append(node)
-                    elif empty_cell == 2:
-                        combinations[0].append(node)
-                elif node.getDecision() == NodeStates.WALL1:
-                    combinations[empty_cell-1].append(node)
-            for c in combinations:
-                wallNodes += c
-            csv_file_name = "fc_constrained.csv"
-        elif HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINING:
-            # Walls that could illuminate the most cells first
-            def sortCountIlluminatedSpaces(node):
-                return self.countIlluminatedSpaces(node, self.graph)
-            # sortCountIlluminatedSpaces end
-
-            wallNodes = sorted(initWallNodes, key=sortCountIlluminatedSpaces, reverse=True)
-            csv_file_name = "fc_contraining.csv"
-
-        elif HEURISTIC_MODE == HeuristicMode.HYBRID:
-            # Combine both most constrained and most constraining by generating a score from both sorting methods
-
-            # Constrained
-            # Order of most possible combinations
-            # combinations = [[1 combination], [2 combinations], [3 combinations], [4 combinations], [6 combinations]]
-            combinations = [[], [], [], [], []]
-            combinations[0].extend(wallNodes)
-            for node in initWallNodes:
-                empty_cell = len([v for v in self.graph[node] if v.getDecision() == NodeStates.EMPTY])
-                if node.getDecision() == NodeStates.WALL3:
-                    if empty_cell == 3:
-                        combinations[0].append(node)
-                    elif empty_cell == 4:
-                        combinations[3].append(node)
-                elif node.getDecision() == NodeStates.WALL2:
-                    if empty_cell == 4:
-                        combinations[4].append(node)
-                    elif empty_cell == 3:
-                        combinations[2].append(node)
-                    elif empty_cell == 2:
-                        combinations[0].append(node)
-                elif node.getDecision() == NodeStates.WALL1:
-                    combinations[empty_cell-1].append(node)
-
-            # Constraining
-            maxLitSpaces = 0
-            litSpacesMap = {}
-            for node in self.graph:
-                litSpaces = self.countIlluminatedSpaces(node, self.graph)
-                litSpacesMap[node] = litSpaces
-
-                if litSpaces > maxLitSpaces:
-                    maxLitSpaces = litSpaces
-
-            # Generate score via hybrid
-            def hybridSort(node):
-                totalScore = 0
-                litSpaces = self.countIlluminatedSpaces(node, self.graph)
-                litSpacesPercentage = litSpaces / maxLitSpaces
-
-                for score, combo in enumerate(combinations):
-                    if node in combo:
-                        totalScore = (score + 1) * litSpacesPercentage
-                        break
-
-                return totalScore
-            # hybridSort end
+        self.initializePossibilities(self.graph, self.board)
+    # prepareSearch end
 
-            wallNodes = sorted(initWallNodes, key=hybridSort, reverse=True)
+    def runSearch(self, wallNodes):
+        self.trail = []
+        self.changedNodes = []
+        self.propagateAll = True
+        self.levelBulbs = [[]]
 
-            csv_file_name = "fc_hybrid.csv"
+        if self.dynamicOrder:
+            # Only walls still short of bulbs are branched on
+            wallNodes = [node for node in wallNodes if node.getDecision() in (NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3)]
+            self.wallTieScores = {(node.x, node.y): self.countIlluminatedSpaces(node, self.graph) for node in wallNodes}
 
-        elif HEURISTIC_MODE == HeuristicMode.NONE:
-            wallNodes = initWallNodes
-            csv_file_name = "fc_no_h.csv"
-
-        # Do forward checking
-        startTime = time.time()
-        result = self.forwardCheckingSolve(self.graph, self.board, wallNodes)
-        timeTaken = time.time() - startTime
-
-        # Print results
-        if result == OverallStates.CANNOT_FINISH:
-            colorPrint(AnsiColors.RED, "Exceeded allowed steps or recursion depth")
-        else:
-            colorPrint(AnsiColors.GREEN, "Finished")
-
-        # Write results to csv
-        if SAVE_CSV:
-            to_write = []
-            if self.searchSteps < MAX_SEARCH_ITERATIONS + 2:
-                to_write = [len(self.board), self.searchSteps, "yes"]
-            else:
-                to_write = [len(self.board), self.searchSteps, "no"]
-
-            if not os.path.isfile(csv_file_name):
-                with open(csv_file_name, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(["board_size", "steps_taken", "solved"])
-                    writer.writerow(to_write)
-            else:
-                with open(csv_file_name, 'a') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(to_write)
-
-        print("Steps taken:", self.searchSteps)
-        print("Seconds taken:", timeTaken)
-        self.printState(self.graph, self.board)
-        print(flush=True)
-    # solve end
+        return self.forwardCheckingSolve(self.graph, self.board, wallNodes)
+    # runSearch end
 
     def forwardCheckingSolve(self, graphState, boardState, wallList):
-        # print(self.depth)
+        return runSearchFrames(self.forwardCheckingFrame, graphState, boardState, wallList)
+    # forwardCheckingSolve end
 
-        if self.aborted or self.depth > MAX_RECURSION_DEPTH:
+    # One level of the forward checking search, run by runSearchFrames
+    # level = int: decisions made above this frame
+    # wallQueue = list: heap of getWallEntry tuples for dynamic ordering, built by the first frame once propagated
+    # With backjumping, an INVALID result leaves conflictLevels holding the decisions that caused it
+    def forwardCheckingFrame(self, graphState, boardState, wallList, level=0, wallQueue=None):
+        if self.aborted:
             return OverallStates.CANNOT_FINISH
 
         self.propagateConstraints(graphState, boardState)
         stateStatus = self.checkOverallStates(graphState)
 
         if stateStatus == OverallStates.INVALID:
+            if self.backjump:
+                self.conflictLevels = self.explainInvalidState(boardState, level)
             return OverallStates.INVALID # Backtrack
         elif stateStatus == OverallStates.COMPLETE:
             return OverallStates.COMPLETE # Escape recursion and output solution
         else:
-            if self.searchSteps > MAX_SEARCH_ITERATIONS:
-                self.aborted = True
-            self.searchSteps += 1
+            if self.backjump:
+                nogoodLevels = self.matchNogoods(boardState)
+                if nogoodLevels is not None:
+                    self.conflictLevels = nogoodLevels
+                    return OverallStates.INVALID # Failed with these bulbs before
+
+            # Trying a bulb where there can't be one leaves the state as it was, so a state is marked as soon as
+            # it's entered and a repeat of one still being searched further up is cut as well
+            if self.transpositions is not None:
+                stateKey = self.getStateKey(wallList)
+                if self.transpositions.contains(stateKey):
+                    self.conflictLevels = (2 << level) - 1 # Why it failed isn't kept, so blame every decision
+                    return OverallStates.INVALID # Searched from here before
+                self.transpositions.add(stateKey)
+
+            if self.dynamicOrder and wallQueue is None:
+                wallQueue = [self.getWallEntry(graphState, node) for node in wallList]
+                heapq.heapify(wallQueue)
+
+            levelBit = 2 << level
+            unlitConflicts = {} # Unlit phase branch -> levels its failure came from
+            exhaustedWall = None # With dynamic ordering, the wall whose every configuration failed
+            wallConflicts = 0 # Levels the failures of exhaustedWall's configurations came from
+            self.recordPartial(boardState)
+            self.countStep()
 
             # For each wall, try placing bulbs around in each configuration
             while wallList:
-                node = wallList.pop()
+                if self.dynamicOrder:
+                    node = self.popMostConstrainedWall(graphState, boardState, wallList, wallQueue)
+                    if node is None:
+                        break
+                else:
+                    node = wallList.pop()
 
                 # Try setting bulbs and propagating constraints
-                # Get list of possible moves
-                possibleBulbNodes = []
-
-                if node.getDecision() == NodeStates.WALL1:
-                    # If there is already a bulb then skip
-                    hasBulb = False
-                    for adjNode in graphState[node]:
-                        if adjNode.getDecision() == NodeStates.BULB:
-                            hasBulb = True
-                            break
-
-                    if not hasBulb:
-                        for adjNode in graphState[node]:
-                            if NodeStates.BULB in adjNode.possibilitySet:
-                                possibleBulbNodes.append([adjNode])
+                # Get possible moves, as the sides of the wall to put bulbs on
+                adjacents = graphState[node]
+                possibleBulbSides = ()
 
-                elif node.getDecision() == NodeStates.WALL2:
-                    # If there is already a bulb then only take options containing it
-                    # If there are already two bulbs then skip
-                    bulbNodes = []
-                    for adjNode in graphState[node]:
-                        if adjNode.getDecision() == NodeStates.BULB:
-                            bulbNodes.append(adjNode)
-
-                    adjacents = graphState[node]
-                    if len(bulbNodes) == 1:
-                        for adjNode in graphState[node]:
-                            if adjNode not in bulbNodes:
-                                possibleBulbNodes.append([bulbNodes[0], adjNode])
-                    elif len(bulbNodes) == 0:
-                        for i in range(4):
-                            iNext = (i+1) % 4
-                            if NodeStates.BULB in adjacents[i].possibilitySet and NodeStates.BULB in adjacents[iNext].possibilitySet:
-                                possibleBulbNodes.append([adjacents[i], adjacents[iNext]])
-                        if NodeStates.BULB in adjacents[3].possibilitySet and NodeStates.BULB in adjacents[1].possibilitySet:
-                            possibleBulbNodes.append([adjacents[3], adjacents[1]])
-                        if NodeStates.BULB in adjacents[0].possibilitySet and NodeStates.BULB in adjacents[2].possibilitySet:
-                            possibleBulbNodes.append([adjacents[0], adjacents[2]])
+                if node.getDecision() in (NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3):
+                    allowed, bulbs = self.getWallMasks(adjacents)
+                    possibleBulbSides = WALL_COMPLETIONS[int(node.getDecision())][allowed][bulbs]
 
-                elif node.getDecision() == NodeStates.WALL3:
-                    # WIP do as above
-                    adjacents = graphState[node]
-                    if NodeStates.BULB in adjacents[3].possibilitySet and NodeStates.BULB in adjacents[0].possibilitySet and NodeStates.BULB in adjacents[1].possibilitySet:
-                        possibleBulbNodes.append([adjacents[3], adjacents[0], adjacents[1]])
-                    if NodeStates.BULB in adjacents[0].possibilitySet and NodeStates.BULB in adjacents[1].possibilitySet and NodeStates.BULB in adjacents[2].possibilitySet:
-                        possibleBulbNodes.append([adjacents[0], adjacents[1], adjacents[2]])
-                    if NodeStates.BULB in adjacents[1].possibilitySet and NodeStates.BULB in adjacents[2].possibilitySet and NodeStates.BULB in adjacents[3].possibilitySet:
-                        possibleBulbNodes.append([adjacents[1], adjacents[2], adjacents[3]])
-                    if NodeStates.BULB in adjacents[2].possibilitySet and NodeStates.BULB in adjacents[3].possibilitySet and NodeStates.BULB in adjacents[0].possibilitySet:
-                        possibleBulbNodes.append([adjacents[2], adjacents[3], adjacents[0]])
-
-                for possibleNodeSet in possibleBulbNodes:
-                    # Deep copy state
-                    newBoard, newGraph, newWallList = self.deepCopyState(boardState, wallList)
+                for sides in possibleBulbSides:
+                    possibleNodeSet = [adjacents[side] for side in sides]
+
+                    # A set that can't all be bulbs would leave the state as it is
+                    if not all(possibleNode.possibilities & BULB_BIT for possibleNode in possibleNodeSet):
+                        continue
+                    if self.backjump:
+                        self.recordDecision(possibleNodeSet, level)
+
+                    # Copy state, or just mark the trail
+                    newBoard, newGraph, newWallList, trailMark = self.branchState(boardState, graphState, wallList)
+                    hashMark = self.stateHash
+                    self.touchedWalls = set()
 
                     # Try set of bulbs
                     for possibleNode in possibleNodeSet:
-                        # Find copied version of current node
-                        for node in newGraph:
-                            if node.x == possibleNode.x and node.y == possibleNode.y:
-                                possibleNode = node
-                                break
-
-                        if NodeStates.BULB in possibleNode.possibilitySet:
-                            possibleNode.possibilitySet.discard(NodeStates.EMPTY) # Try these tiles as bulbs and propagate
-                            self.castLight(newGraph, possibleNode)
+                        possibleNode = self.findNode(newBoard, possibleNode)
+
+                        if possibleNode.possibilities & BULB_BIT:
+                            self.discardPossibility(possibleNode, NodeStates.EMPTY, levelBit) # Try these tiles as bulbs and propagate
+                            self.castLight(newGraph, newBoard, possibleNode)
                     self.propagateConstraints(newGraph, newBoard)
 
                     # Check if done
@@ -352,82 +202,58 @@ class ForwardCheckingSolver:
                     boardState = newBoard
                     graphState = newGraph
                     # print("1st - recurse", status)
-                    self.depth += 1
-                    result = self.forwardCheckingSolve(newGraph, newBoard, newWallList)
-                    self.depth -= 1
+                    newQueue = self.branchWallQueue(newGraph, newBoard, newWallList, wallQueue)
+                    result = yield newGraph, newBoard, newWallList, level + 1, newQueue
 
                     if result == OverallStates.COMPLETE:
                         return OverallStates.COMPLETE
                     elif result == OverallStates.INVALID:
                         boardState = oldBoard
                         graphState = oldGraph
+                        self.undoTrail(trailMark)
+                        self.stateHash = hashMark
+
+                        # The other options here can't help if this one failed without it
+                        if self.backjump and not self.conflictLevels & levelBit:
+                            return OverallStates.INVALID
+                        wallConflicts |= self.conflictLevels & ~levelBit
                     elif result == OverallStates.CANNOT_FINISH:
+                        self.undoTrail(trailMark)
                         return OverallStates.CANNOT_FINISH
 
-            # If state is ok and we have finished recursing, try placing bulbs in open unlit space
-            if not wallList:
-                # Get list of unlit unoccupied tiles
-                unlits, lits = self.getUnlitSpaces(graphState)
-                unlits = list(unlits)
-                lits = list(lits)
-
-                # Sort unlits by heuristics
-                if HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINED:
-                    # Most adjacent lit spaces
-                    def countAdjacentLits(node):
-                        count = 0
-
-                        for adj in graphState[node]:
-                            if adj in lits:
-                                count += 1
-
-                        return count
-                    # countAdjacentLits end
-
-                    unlits.sort(key=countAdjacentLits, reverse=True)
-                elif HEURISTIC_MODE == HeuristicMode.MOST_CONSTRAINING:
-                    # Lights the most tiles
-                    def sortCountIlluminatedSpaces(node):
-                        return self.countIlluminatedSpaces(node, graphState)
-                    # sortCountIlluminatedSpaces end
-
-                    unlits.sort(key=sortCountIlluminatedSpaces, reverse=True)
-                elif HEURISTIC_MODE == HeuristicMode.HYBRID:
-                    # Combine scores
-                    def countAdjacentLits(node):
-                        count = 0
-
-                        for adj in graphState[node]:
-                            if adj in lits:
-                                count += 1
-
-                        return count
-                    # countAdjacentLits end
-
-                    def hybridSort(node):
-                        litSpaces = self.countIlluminatedSpaces(node, graphState)
-                        adjLitSpaces = countAdjacentLits(node)
-                        adjLitPercentage = adjLitSpaces/4
-
-                        return adjLitPercentage * litSpaces
-                    # hybridSort end
+                # Every solution from here needs one of the configurations just tried
+                if self.dynamicOrder:
+                    exhaustedWall = node
+                    break
 
-                    unlits.sort(key=hybridSort, reverse=True)
+            # If state is ok and we have finished recursing, try placing bulbs in open unlit space
+            if not wallList and exhaustedWall is None:
+                if self.dynamicOrder:
+                    # Every solution lights the darkest space with one of its candidates
+                    unlits = self.getDarkestCandidates(graphState, boardState)
+                else:
+                    # Get list of unlit unoccupied tiles that could take a bulb, in board order so runs are repeatable
+                    unlits, lits = self.getUnlitSpaces(graphState)
+                    unlits = [node for node in graphState if node in unlits and node.possibilities & BULB_BIT]
 
+                    # Sort unlits by heuristics
+                    self.sortUnlitSpaces(unlits, graphState)
 
                 # Forward checking search for bulb placement on unlit unoccupied non-wall-adjacent tiles
                 for possibleNode in unlits:
-                    # Deep copy state
-                    newBoard, newGraph, newWallList = self.deepCopyState(boardState, wallList)
-                    # Find copied version of current node
-                    for node in newGraph:
-                        if node.x == possibleNode.x and node.y == possibleNode.y:
-                            possibleNode = node
-                            break
-
-                    if NodeStates.BULB in possibleNode.possibilitySet:
-                        possibleNode.possibilitySet.discard(NodeStates.EMPTY) # Try this tile as bulb and propagate
-                        self.castLight(newGraph, possibleNode)
+                    if self.backjump:
+                        self.recordDecision([possibleNode], level)
+
+                    # Copy state, or just mark the trail
+                    newBoard, newGraph, newWallList, trailMark = self.branchState(boardState, graphState, wallList)
+                    hashMark = self.stateHash
+                    self.touchedWalls = set()
+                    unlitNode = possibleNode
+                    possibleNode = self.findNode(newBoard, possibleNode)
+
+                    if possibleNode.possibilities & BULB_BIT:
+                        self.discardPossibility(possibleNode, NodeStates.EMPTY, levelBit) # Try this tile as bulb and propagate
+                        self.castLight(newGraph, newBoard, possibleNode)
                     self.propagateConstraints(newGraph, newBoard)
 
                     # Check if done
@@ -441,16 +267,22 @@ class ForwardCheckingSolver:
                     oldGraph = graphState
                     boardState = newBoard
                     graphState = newGraph
-                    self.depth += 1
-                    result = self.forwardCheckingSolve(newGraph, newBoard, newWallList)
-                    self.depth -= 1
+                    result = yield newGraph, newBoard, newWallList, level + 1, wallQueue
 
                     if result == OverallStates.COMPLETE:
                         return OverallStates.COMPLETE
                     elif result == OverallStates.INVALID:
                         boardState = oldBoard
                         graphState = oldGraph
+                        self.undoTrail(trailMark)
+                        self.stateHash = hashMark
+
+                        if self.backjump:
+                            if not self.conflictLevels & levelBit:
+                                return OverallStates.INVALID
+                            unlitConflicts[(unlitNode.x, unlitNode.y)] = self.conflictLevels & ~levelBit
                     elif result == OverallStates.CANNOT_FINISH:
+                        self.undoTrail(trailMark)
                         return OverallStates.CANNOT_FINISH
 
             # Check if done
@@ -460,203 +292,496 @@ class ForwardCheckingSolver:
                 self.graph = graphState
                 return OverallStates.COMPLETE
 
+            if self.backjump:
+                if exhaustedWall is not None:
+                    self.conflictLevels = self.explainExhaustedWall(graphState, boardState, exhaustedWall, wallConflicts)
+                else:
+                    self.conflictLevels = self.explainExhaustedState(graphState, boardState, unlitConflicts, level)
+                self.recordNogood(self.conflictLevels)
             return OverallStates.INVALID # The tip of this branch is invalid
-    # forwardCheckingSolve end
+    # forwardCheckingFrame end
+
+    # Heap entry for dynamic ordering: walls with the fewest bulb configurations left come first,
+    # then those whose bulbs could light the most spaces, then board order
+    def getWallEntry(self, graphState, node):
+        allowed, bulbs = self.getWallMasks(graphState[node])
+        count = len(WALL_COMPLETIONS[int(node.getDecision())][allowed][bulbs])
+        return (count, -self.wallTieScores[(node.x, node.y)], self.getTieRank(node.x, node.y), node.y, node.x)
+    # getWallEntry end
+
+    # Pops the most constrained wall off wallQueue and wallList, dropping walls that already have their bulbs
+    # Entries are only pushed again once their wall is touched, so one whose count has dropped since is requeued
+    # Returns None once no wall is left to branch on
+    def popMostConstrainedWall(self, graphState, boardState, wallList, wallQueue):
+        while wallQueue:
+            entry = heapq.heappop(wallQueue)
+            count, tieScore, tieRank, y, x = entry
+            node = boardState[y][x]
+            if node not in wallList:
+                continue # Branched on or dropped already
+
+            current = self.getWallEntry(graphState, node)
+            if current != entry:
+                heapq.heappush(wallQueue, current)
+                continue
 
+            wallList.remove(node)
+            if count == 0 and self.counters.wallBulbCounts[(x, y)] == int(node.getDecision()):
+                continue # Satisfied, so there's nothing to branch on
+            return node
+
+        return None
+    # popMostConstrainedWall end
+
+    # Returns the child's copy of wallQueue with the walls touched by the branch requeued, None without dynamic ordering
+    def branchWallQueue(self, graphState, boardState, wallList, wallQueue):
+        if wallQueue is None:
+            return None
+
+        newQueue = list(wallQueue)
+        for node in wallList:
+            if (node.x, node.y) in self.touchedWalls:
+                heapq.heappush(newQueue, self.getWallEntry(graphState, node))
+        return newQueue
+    # branchWallQueue end
+
+    # Returns the spaces that could light the unlit space with the fewest of them, those lighting the most spaces first
+    def getDarkestCandidates(self, graphState, boardState):
+        unlits, lits = self.getUnlitSpaces(graphState)
+        darkest = None
+        darkestCandidates = []
+
+        for node in graphState:
+            if node not in unlits:
+                continue
+
+            position = (node.x, node.y)
+            if self.visibility:
+                count = self.candidateCounts[position]
+            else:
+                count = len([1 for x, y in self.sightLines[position] if boardState[y][x].possibilities & BULB_BIT])
+
+            darkness = (count, self.getTieRank(node.x, node.y))
+            if darkest is None or darkness < darkest:
+                darkest = darkness
+                darkestCandidates = [boardState[y][x] for x, y in self.sightLines[position]]
+
+        candidates = [node for node in darkestCandidates if node.possibilities & BULB_BIT]
+        candidates.sort(key=lambda node: (-self.countIlluminatedSpaces(node, graphState), self.getTieRank(node.x, node.y), node.y, node.x))
+        return candidates
+    # getDarkestCandidates end
+
+    # Event driven, in the style of AC-3: only walls next to a cell that lost a possibility,
+    # or next to a cell whose lighting changed, are looked at again
     def propagateConstraints(self, graphState, boardState):
-        settled = False
+        self.syncCounters(graphState)
 
-        # Propagate effects of constraints until no more propagation occurs
-        # Assumes puzzle is solvable
-        while not settled:
-            settled = True
+        if self.propagateAll:
+            worklist = deque(self.propagatedWalls)
+            if self.visibility:
+                self.recountedCells = list(self.sightLines)
+            self.propagateAll = False
+        else:
+            worklist = deque()
+        queued = set(worklist)
+
+        while True:
+            # Queue walls affected by changes since the last wall was looked at
+            for changedNode in self.changedNodes:
+                affected = [(changedNode.x, changedNode.y)]
+                if changedNode.getDecision() == NodeStates.BULB:
+                    affected.extend(self.segments.getRayCells(changedNode.x, changedNode.y)) # Newly lit
+
+                for position in affected:
+                    for wallPosition in self.adjacentWalls.get(position, ()):
+                        if wallPosition not in queued:
+                            queued.add(wallPosition)
+                            worklist.append(wallPosition)
+                            self.touchedWalls.add(wallPosition)
+            self.changedNodes = []
+
+            # A dead state stays dead, so stop instead of propagating it to the end
+            if self.visibility and (self.deadCells or self.segments.conflicts or self.counters.overfullWalls):
+                self.recountedCells = []
+                break
 
-            for node in graphState:
-                nodeState = node.getDecision()
-                if not self.stateIsWall(nodeState):
+            if not worklist:
+                # Walls are settled, so look at the spaces that lost a way to be lit
+                if self.visibility and self.recountedCells:
+                    self.applyVisibilityRules(graphState, boardState, self.recountedCells.pop())
                     continue
+                break
 
-                # Check if walls can solidify bulb locations
-                adjBulbs = self.getNodeAdjacentBulbs(graphState, node)
-                unlitSpaces, litSpaces = self.getUnlitSpaces(graphState)
-                adjUnlitSpaces = set()
-                adjLitSpaces = set()
-                adjWalls = set()
-                adjBlocked = set()
-
-                for adj in graphState[node]:
-                    if adj in unlitSpaces:
-                        adjUnlitSpaces.add(adj)
-                    elif adj in litSpaces:
-                        adjLitSpaces.add(adj)
-
-                    if self.stateIsWall(adj.getDecision()):
-                        adjWalls.add(adj)
-
-                    if adj.getDecision() == NodeStates.EMPTY:
-                        adjBlocked.add(adj)
-
-                adjBlocked = adjBlocked.union(adjLitSpaces)
-                adjBlocked = adjBlocked.union(adjWalls)
-
-                if nodeState == NodeStates.WALL1:
-                    # If already has a bulb, other spaces must be empty/blocked
-                    if len(adjBulbs) >= 1:
-                        for adj in graphState[node]:
-                            if adj.getDecision() != NodeStates.BULB and (NodeStates.BULB in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.BULB)
-                                settled = False
-                            elif adj.getDecision() == NodeStates.BULB:
-                                self.castLight(graphState, adj)
-                    # If all but one side is lit/blocked, that side must be a bulb
-                    elif len(adjBlocked) == 3:
-                        for adj in graphState[node]:
-                            if NodeStates.BULB in adj.possibilitySet:
-                                adj.possibilitySet.discard(NodeStates.EMPTY)
-                                self.castLight(graphState, adj)
-                                settled = False
-                                break
-                elif nodeState == NodeStates.WALL2:
-                    # If already has one bulb and all but one space is lit/blocked, it must be a bulb
-                    if len(adjBulbs) == 1 and len(adjBlocked) == 2:
-                        for adj in graphState[node]:
-                            if (adj not in adjBulbs) and (adj not in adjBlocked) and (NodeStates.EMPTY in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.EMPTY)
-                                self.castLight(graphState, adj)
-                                settled = False
-                    # If already has two bulbs, other spaces must be empty/blocked
-                    elif len(adjBulbs) == 2:
-                        for adj in graphState[node]:
-                            if (adj not in adjBulbs) and (NodeStates.BULB in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.BULB)
-                                settled = False
-                            elif adj.getDecision() == NodeStates.BULB:
-                                self.castLight(graphState, adj)
-                    # If all but two side are lit/blocked, other sides must be bulbs
-                    elif len(adjBlocked) == 2:
-                        for adj in graphState[node]:
-                            if (adj not in adjBlocked) and (NodeStates.EMPTY in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.EMPTY)
-                                self.castLight(graphState, adj)
-                                settled = False
-                elif nodeState == NodeStates.WALL3:
-                    # If already has three bulbs, other spaces must be empty/blocked
-                    if len(adjBulbs) == 3:
-                        for adj in graphState[node]:
-                            if adj.getDecision() != NodeStates.BULB and (NodeStates.BULB in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.BULB)
-                                settled = False
-                            elif adj.getDecision() == NodeStates.BULB:
-                                self.castLight(graphState, adj)
-                    # If one side is lit/blocked, the rest must be bulbs
-                    elif len(adjBlocked) == 1:
-                        for adj in graphState[node]:
-                            if (adj not in adjBlocked) and (NodeStates.EMPTY in adj.possibilitySet):
-                                adj.possibilitySet.discard(NodeStates.EMPTY)
-                                self.castLight(graphState, adj)
-                                settled = False
+            x, y = worklist.popleft()
+            queued.discard((x, y))
+            self.applyWallRules(graphState, boardState, boardState[y][x])
     # propagateConstraints end
 
-    def initializePossibilities(self, graphState):
+    def applyWallRules(self, graphState, boardState, node):
+        nodeState = node.getDecision()
+
+        # Check if walls can solidify bulb locations
+        adjBulbs = self.getNodeAdjacentBulbs(graphState, node)
+        adjBlocked = set()
+
+        for adj in graphState[node]:
+            # Walls, decided empty spaces and lit spaces can't take a bulb
+            if self.stateIsWall(adj.getDecision()) or adj.getDecision() == NodeStates.EMPTY:
+                adjBlocked.add(adj)
+            elif adj.possibilities & EMPTY_BIT and self.counters.isLit((adj.x, adj.y)):
+                adjBlocked.add(adj)
+
+        # Whatever a rule concludes follows from the bulbs and blocked spaces around the wall
+        reason = 0
+        if self.backjump:
+            reason = self.getBulbReasons(boardState, [(adj.x, adj.y) for adj in adjBulbs])
+            for adj in adjBlocked:
+                reason |= self.getBlockedReason(boardState, adj)
+
+        if nodeState == NodeStates.WALL1:
+            # If already has a bulb, other spaces must be empty/blocked
+            if len(adjBulbs) >= 1:
+                for adj in graphState[node]:
+                    if adj.getDecision() != NodeStates.BULB and (adj.possibilities & BULB_BIT):
+                        self.discardPossibility(adj, NodeStates.BULB, reason)
+                    elif adj.getDecision() == NodeStates.BULB:
+                        self.castLight(graphState, boardState, adj)
+            # If all but one side is lit/blocked, that side must be a bulb
+            elif len(adjBlocked) == 3:
+                for adj in graphState[node]:
+                    if adj.possibilities & BULB_BIT:
+                        self.discardPossibility(adj, NodeStates.EMPTY, reason)
+                        self.castLight(graphState, boardState, adj)
+                        break
+        elif nodeState == NodeStates.WALL2:
+            # If already has one bulb and all but one space is lit/blocked, it must be a bulb
+            if len(adjBulbs) == 1 and len(adjBlocked) == 2:
+                for adj in graphState[node]:
+                    if (adj not in adjBulbs) and (adj not in adjBlocked) and (adj.possibilities & EMPTY_BIT):
+                        self.discardPossibility(adj, NodeStates.EMPTY, reason)
+                        self.castLight(graphState, boardState, adj)
+            # If already has two bulbs, other spaces must be empty/blocked
+            elif len(adjBulbs) == 2:
+                for adj in graphState[node]:
+                    if (adj not in adjBulbs) and (adj.possibilities & BULB_BIT):
+                        self.discardPossibility(adj, NodeStates.BULB, reason)
+                    elif adj.getDecision() == NodeStates.BULB:
+                        self.castLight(graphState, boardState, adj)
+            # If all but two side are lit/blocked, other sides must be bulbs
+            elif len(adjBlocked) == 2:
+                for adj in graphState[node]:
+                    if (adj not in adjBlocked) and (adj.possibilities & EMPTY_BIT):
+                        self.discardPossibility(adj, NodeStates.EMPTY, reason)
+                        self.castLight(graphState, boardState, adj)
+        elif nodeState == NodeStates.WALL3:
+            # If already has three bulbs, other spaces must be empty/blocked
+            if len(adjBulbs) == 3:
+                for adj in graphState[node]:
+                    if adj.getDecision() != NodeStates.BULB and (adj.possibilities & BULB_BIT):
+                        self.discardPossibility(adj, NodeStates.BULB, reason)
+                    elif adj.getDecision() == NodeStates.BULB:
+                        self.castLight(graphState, boardState, adj)
+            # If one side is lit/blocked, the rest must be bulbs
+            elif len(adjBlocked) == 1:
+                for adj in graphState[node]:
+                    if (adj not in adjBlocked) and (adj.possibilities & EMPTY_BIT):
+                        self.discardPossibility(adj, NodeStates.EMPTY, reason)
+                        self.castLight(graphState, boardState, adj)
+    # applyWallRules end
+
+    # Rules from the spaces that could still light the space at position
+    def applyVisibilityRules(self, graphState, boardState, position):
+        count = self.candidateCounts[position]
+
+        # Nothing can light it, which the state check reports, or it has spare candidates
+        if count == 0 or count > 2 or self.counters.isLit(position):
+            return
+
+        candidates = []
+        reason = 0
+        for x, y in self.sightLines[position]:
+            if boardState[y][x].possibilities & BULB_BIT:
+                candidates.append((x, y))
+            elif self.backjump:
+                reason |= self.getReason(boardState[y][x], NodeStates.BULB) # Whatever follows, follows from these being ruled out
+
+        if count == 1:
+            # Its only candidate must be a bulb
+            x, y = candidates[0]
+            self.discardPossibility(boardState[y][x], NodeStates.EMPTY, reason)
+            self.castLight(graphState, boardState, boardState[y][x])
+        elif position not in candidates:
+            # A bulb that sees both candidates without lighting this space would leave it dark
+            # With three or more, two share a run with the space, and only spaces lighting it see them both
+            for x, y in (self.rayCellSets[candidates[0]] & self.rayCellSets[candidates[1]]) - self.rayCellSets[position]:
+                self.discardPossibility(boardState[y][x], NodeStates.BULB, reason)
+    # applyVisibilityRules end
+
+    # Returns (position -> spaces that could light it, number of spaces nothing can light)
+    def createCandidateCounts(self, graphState):
+        candidateCounts = {}
+        deadCells = 0
+        canBulb = self.getBulbCandidates(graphState)
+
+        for position, sightLine in self.sightLines.items():
+            count = 0
+            for seen in sightLine:
+                if seen in canBulb:
+                    count += 1
+            candidateCounts[position] = count
+            if count == 0:
+                deadCells += 1
+
+        return candidateCounts, deadCells
+    # createCandidateCounts end
+
+    # Positions of the spaces that could still take a bulb
+    def getBulbCandidates(self, graphState):
+        return {(node.x, node.y) for node in graphState if node.possibilities & BULB_BIT}
+    # getBulbCandidates end
+
+    # A space at position gained or lost the bulb possibility, so every space it could light has one more or less candidate
+    def countCandidates(self, position, delta):
+        candidateCounts = self.candidateCounts
+        sightLine = self.sightLines[position]
+
+        if delta < 0:
+            self.recountedCells.extend(sightLine)
+            for seen in sightLine:
+                count = candidateCounts[seen] - 1
+                candidateCounts[seen] = count
+                if count == 0:
+                    self.deadCells += 1
+        else:
+            for seen in sightLine:
+                count = candidateCounts[seen] + 1
+                candidateCounts[seen] = count
+                if count == 1:
+                    self.deadCells -= 1
+    # countCandidates end
+
+    def initializePossibilities(self, graphState, boardState):
         # Eliminate bulb possibilities around WALL0
         # Eliminate empty possibilities around WALL4
         for node in graphState:
             if node.getDecision() == NodeStates.WALL0:
                 for adjNode in graphState[node]:
                     if not self.stateIsWall(adjNode.getDecision()):
-                        adjNode.possibilitySet.discard(NodeStates.BULB)
+                        self.discardPossibility(adjNode, NodeStates.BULB)
             elif node.getDecision() == NodeStates.WALL4:
                 for adjNode in graphState[node]:
                     if not self.stateIsWall(adjNode.getDecision()):
-                        adjNode.possibilitySet.discard(NodeStates.EMPTY)
-                        self.castLight(graphState, adjNode)
+                        self.discardPossibility(adjNode, NodeStates.EMPTY)
+                        self.castLight(graphState, boardState, adjNode)
     # initializePossibilities end
 
-    def countIlluminatedSpaces(self, node, graphState):
-        numLitCells = 0
-        adjNodes = graphState[node]
-
-        for adjNode in adjNodes: # For each direction
-            if adjNode.getDecision() == NodeStates.WALL: # Border walls aren't in graph
-                continue
-
-            bulbAdjNodes = graphState[adjNode]
-
-            for idx, bulbAdjNode in enumerate(bulbAdjNodes): # For each direction around possible bulb
-                rayNode = bulbAdjNode # Check each node outwards in a ray in that direction until wall
-
-                while True: # Graph should be bordered by WALL, so this will always break eventually
-                    if not self.stateIsWall(rayNode.getDecision()):
-                        numLitCells += 1
-                    elif self.stateIsWall(rayNode.getDecision()):
-                        break # If hit wall, we're done checking in this direction
-
-                    rayNode = graphState[rayNode][idx] # Get next node in this direction
-
-        return numLitCells
-    # countIlluminatedSpaces end
-
-    # Eliminate bulb from possibilitySets in + shape from given node
-    def castLight(self, graphState, node):
-        adjNodes = graphState[node]
+    # Eliminate bulb from possibilities in + shape from given node
+    def castLight(self, graphState, boardState, node):
+        reason = self.getReason(node, NodeStates.EMPTY)
+        for x, y in self.segments.getRayCells(node.x, node.y):
+            self.discardPossibility(boardState[y][x], NodeStates.BULB, reason)
+    # castLight end
 
-        for idx, adjNode in enumerate(adjNodes): # For each direction
-            rayNode = adjNode # Check each node outwards in a ray in that direction until wall
+    # Decision levels behind a possibility a node no longer has, none for walls and the puzzle's givens
+    def getReason(self, node, possibility):
+        return self.reasons.get((node.x, node.y, possibility), 0)
+    # getReason end
+
+    # Decision levels that stop a space next to a wall taking a bulb
+    def getBlockedReason(self, boardState, node):
+        if not node.possibilities & BULB_BIT:
+            return self.getReason(node, NodeStates.BULB)
+
+        # Lit by a bulb whose light hasn't been cast yet
+        for x, y in self.segments.getRayCells(node.x, node.y):
+            if boardState[y][x].getDecision() == NodeStates.BULB:
+                return self.getReason(boardState[y][x], NodeStates.EMPTY)
+        return 0
+    # getBlockedReason end
+
+    # Decision levels that put bulbs on every position given
+    def getBulbReasons(self, boardState, positions):
+        reason = 0
+        for x, y in positions:
+            reason |= self.getReason(boardState[y][x], NodeStates.EMPTY)
+        return reason
+    # getBulbReasons end
+
+    # Notes the nodes as the bulbs decided at the level below
+    def recordDecision(self, nodes, level):
+        del self.levelBulbs[level + 1:]
+        self.levelBulbs.append([(node.x, node.y) for node in nodes])
+    # recordDecision end
+
+    # Decision levels behind a wall none of whose configurations worked
+    # wallConflicts = int: levels the failures of the configurations tried came from
+    def explainExhaustedWall(self, graphState, boardState, node, wallConflicts):
+        reason = wallConflicts
 
-            while True: # Graph should be bordered by WALL, so this will always break eventually
-                if not self.stateIsWall(rayNode.getDecision()):
-                    rayNode.possibilitySet.discard(NodeStates.BULB)
+        for adj in graphState[node]:
+            if adj.getDecision() == NodeStates.BULB:
+                reason |= self.getReason(adj, NodeStates.EMPTY)
+            else:
+                reason |= self.getBlockedReason(boardState, adj)
+
+        return reason
+    # explainExhaustedWall end
+
+    # Decision levels behind the INVALID state the counters report, every level above if no cause is found
+    def explainInvalidState(self, boardState, level):
+        counters = self.counters
+        segments = self.segments
+
+        # Two bulbs in one run
+        if segments.conflicts:
+            for members, bulbCount in zip(segments.members, segments.bulbCounts):
+                if bulbCount > 1:
+                    return self.getBulbReasons(boardState, [position for position in members if counters.cellStatuses[position][0]])
+
+        # A wall with too many bulbs
+        if counters.overfullWalls:
+            for (x, y), number in counters.wallNumbers.items():
+                if counters.wallBulbCounts[(x, y)] > number:
+                    adjacents = [(adjX, adjY) for adjX, adjY in ((x, y-1), (x+1, y), (x, y+1), (x-1, y))
+                                 if (adjX, adjY) in counters.cellStatuses and counters.cellStatuses[(adjX, adjY)][0]]
+                    return self.getBulbReasons(boardState, adjacents)
+
+        # A space nothing can light any more
+        if self.visibility and self.deadCells:
+            for position, count in self.candidateCounts.items():
+                if count == 0:
+                    return self.getDarkReason(boardState, position)
+
+        # Every space decided with one left unlit, so nothing in its runs could take a bulb
+        for position, status in counters.cellStatuses.items():
+            if status[1] and not counters.isLit(position):
+                return self.getDarkReason(boardState, position)
+
+        return (2 << level) - 1
+    # explainInvalidState end
+
+    # Decision levels that ruled out bulbs in the runs of position, itself included
+    def getDarkReason(self, boardState, position):
+        reason = 0
+        for x, y in self.sightLines[position]:
+            if not boardState[y][x].possibilities & BULB_BIT:
+                reason |= self.getReason(boardState[y][x], NodeStates.BULB)
+        return reason
+    # getDarkReason end
+
+    # Decision levels behind a frame running out of options
+    # Every solution would have to light each unlit space from its runs, and each bulb that could do so was tried,
+    # so the space whose failed lighters and ruled out spaces name the fewest levels explains it
+    # unlitConflicts = dict: position -> levels behind the failure of a bulb tried there
+    def explainExhaustedState(self, graphState, boardState, unlitConflicts, level):
+        best = None
+        unlits, lits = self.getUnlitSpaces(graphState)
+
+        for node in unlits:
+            reason = 0
+            for x, y in [(node.x, node.y)] + list(self.segments.getRayCells(node.x, node.y)):
+                rayNode = boardState[y][x]
+                if rayNode.possibilities & BULB_BIT:
+                    reason |= unlitConflicts.get((x, y), (2 << level) - 1)
                 else:
-                    break # If hit wall, we're done checking in this direction
+                    reason |= self.getReason(rayNode, NodeStates.BULB)
 
-                rayNode = graphState[rayNode][idx] # Get next node in this direction
-    # castLight end
+            if best is None or bin(reason).count("1") < bin(best).count("1"):
+                best = reason
 
-    def stateIsWall(self, state):
-        return state == NodeStates.WALL or \
-            state == NodeStates.WALL0 or \
-            state == NodeStates.WALL1 or \
-            state == NodeStates.WALL2 or \
-            state == NodeStates.WALL3 or \
-            state == NodeStates.WALL4
-    # stateIsWall end
-
-    def getUnlitSpaces(self, graphState):
-        litMap = {}
-        empties = set()
-        unlits = set()
-        lits = set()
-        bulbs = set()
+        if best is not None:
+            return best
 
+        # Everything is lit, so a wall short of bulbs has no free space left beside it
         for node in graphState:
-            if NodeStates.EMPTY in node.possibilitySet:
-                litMap[node] = False # Initialize to unlit
-                empties.add(node)
-            elif node.getDecision() == NodeStates.BULB:
-                bulbs.add(node)
-
-        for bulb in bulbs:
-            adjNodes = graphState[bulb]
-
-            for idx, adjNode in enumerate(adjNodes): # For each direction
-                rayNode = adjNode # Check each node outwards in a ray in that direction until wall
-
-                while True: # Graph should be bordered by WALL, so this will always break eventually
-                    if self.stateIsWall(rayNode.getDecision()):
-                        break # If hit wall, we're done checking in this direction
-                    elif NodeStates.EMPTY in rayNode.possibilitySet:
-                        litMap[rayNode] = True
-
-                    rayNode = graphState[rayNode][idx] # Get next node in this direction
-
-        for node in empties:
-            if not litMap[node]:
-                unlits.add(node)
-            else:
-                lits.add(node)
-
-        return unlits, lits
-    # getUnlitSpaces end
+            if node.getDecision() in (NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3, NodeStates.WALL4):
+                if self.counters.wallBulbCounts[(node.x, node.y)] < int(node.getDecision()):
+                    reason = 0
+                    for adj in graphState[node]:
+                        if adj.getDecision() != NodeStates.BULB:
+                            reason |= self.getBlockedReason(boardState, adj)
+                    return reason
+
+        return (2 << level) - 1
+    # explainExhaustedState end
+
+    # Remember the bulbs decided at the given levels as a set that can't all be placed
+    def recordNogood(self, conflictLevels):
+        positions = []
+        for level, bulbPositions in enumerate(self.levelBulbs):
+            if conflictLevels >> level & 1:
+                positions.extend(bulbPositions)
+        self.nogoods.append(tuple(positions))
+    # recordNogood end
+
+    # Nogoods only name bulbs that can't all be placed on this board, so they hold for every later round
+    def keepLearned(self, previous):
+        self.nogoods = previous.nogoods
+    # keepLearned end
+
+    # Returns the decision levels behind the first nogood whose bulbs are all on the board, None if there isn't one
+    def matchNogoods(self, boardState):
+        cellStatuses = self.counters.cellStatuses
+        for nogood in self.nogoods:
+            if all(cellStatuses[position][0] for position in nogood):
+                return self.getBulbReasons(boardState, nogood)
+        return None
+    # matchNogoods end
+
+    # Copies don't share counts with the previous graph
+    def syncCounters(self, graphState):
+        if not self.trailUndo:
+            self.counters = self.createCounters(graphState)
+            if self.visibility:
+                self.candidateCounts, self.deadCells = self.createCandidateCounts(graphState)
+    # syncCounters end
+
+    # Remove a possibility from a node, recording it so undoTrail can put it back
+    # reason = int: mask of the decision levels that forced it
+    def discardPossibility(self, node, possibility, reason=0):
+        bit = STATE_BITS[possibility]
+        if node.possibilities & bit:
+            node.possibilities ^= bit
+            self.reasons[(node.x, node.y, possibility)] = reason
+            self.stateHash ^= self.zobristKeys[(node.x, node.y, possibility)]
+            self.counters.setCellStatus((node.x, node.y), *self.getCellStatus(node))
+            self.changedNodes.append(node)
+            if possibility == NodeStates.BULB and self.visibility:
+                self.countCandidates((node.x, node.y), -1)
+
+            if self.trailUndo:
+                self.trail.append((node, possibility))
+    # discardPossibility end
+
+    def undoTrail(self, trailMark):
+        if trailMark is None:
+            return
+
+        while len(self.trail) > trailMark:
+            node, possibility = self.trail.pop()
+            node.possibilities |= STATE_BITS[possibility]
+            self.counters.setCellStatus((node.x, node.y), *self.getCellStatus(node))
+            if possibility == NodeStates.BULB and self.visibility:
+                self.countCandidates((node.x, node.y), 1)
+    # undoTrail end
+
+    # Returns (board, graph, wall list, trail mark) for a child branch
+    # With the trail the child shares this state and backtracking undoes back to the mark
+    def branchState(self, boardState, graphState, wallList):
+        if self.trailUndo:
+            # Walls are handed down in board order, as deepCopyState does
+            newWallList = sorted(wallList, key=lambda node: (node.y, node.x))
+            return boardState, graphState, newWallList, len(self.trail)
+
+        newBoard, newGraph, newWallList = self.deepCopyState(boardState, wallList)
+        return newBoard, newGraph, newWallList, None
+    # branchState end
+
+    # Find the node at the same position in boardState
+    # Border nodes share their owner's position, which is never a bulb candidate
+    def findNode(self, boardState, node):
+        return boardState[node.y][node.x]
+    # findNode end
 
     def deepCopyState(self, boardState, wallList):
         boardCopy = []
@@ -665,7 +790,7 @@ class ForwardCheckingSolver:
         for rowIdx, row in enumerate(boardState):
             rowCopy = []
             for columnIdx, node in enumerate(row):
-                copyNode = Node(boardState[rowIdx][columnIdx].possibilitySet.copy(), rowIdx, columnIdx)
+                copyNode = Node(node.possibilities, columnIdx, rowIdx)
 
                 if node in wallList:
                     wallListCopy.append(copyNode)
@@ -673,9 +798,23 @@ class ForwardCheckingSolver:
                 rowCopy.append(copyNode)
             boardCopy.append(rowCopy)
 
-        return boardCopy, createGraphFromNodeMatrix(boardCopy, len(boardCopy), len(boardCopy[0])), wallListCopy
+        return boardCopy, createGraphFromNodeMatrix(boardCopy, len(boardCopy[0]), len(boardCopy), Node), wallListCopy
     # deepCopyState end
 
+    # adjacents = list: up, right, down and left neighbours of a wall
+    # Returns (sides that could still take a bulb, sides with a bulb) as 4 bit masks
+    def getWallMasks(self, adjacents):
+        allowed, bulbs = 0, 0
+
+        for side, adjNode in enumerate(adjacents):
+            if adjNode.getDecision() == NodeStates.BULB:
+                bulbs |= 1 << side
+            elif adjNode.possibilities & BULB_BIT:
+                allowed |= 1 << side
+
+        return allowed, bulbs
+    # getWallMasks end
+
     def getNodeAdjacentBulbs(self, graphState, node):
         adjBulbs = set()
 
@@ -686,42 +825,52 @@ class ForwardCheckingSolver:
         return adjBulbs
     # getNodeAdjacentBulbs end
 
-    def countNodeAdjacentBulbs(self, graphState, node):
-        adjBulbs = 0
+    def getCounterState(self):
+        stateStatus = self.counters.checkState()
 
-        for adj in graphState[node]:
-            if adj.getDecision() == NodeStates.BULB:
-                adjBulbs += 1
+        # Every space decided but some left unlit can't be completed
+        if stateStatus == OverallStates.VALID and self.counters.undecidedCount == 0 and self.counters.unlitCount:
+            stateStatus = OverallStates.INVALID
 
-        return adjBulbs
-    # countNodeAdjacentBulbs end
+        # Nor can a space with no bulb left that could light it
+        if stateStatus == OverallStates.VALID and self.visibility and self.deadCells:
+            stateStatus = OverallStates.INVALID
 
-    def checkOverallStates(self, graphState):
-        unlit, lit = self.getUnlitSpaces(graphState) # Not unlitSpacesList = no unlit spaces left
-        isComplete = not unlit
+        return stateStatus
+    # getCounterState end
 
+    # Full rescan of the board by walking rays, independent of the counters it is checked against
+    def scanOverallStates(self, graphState):
+        unlit = False
         settled = True
+
         for node in graphState:
             if not node.getDecision():
                 settled = False
-                break
 
-        for node in graphState:
             if node.getDecision() == NodeStates.BULB:
                 # No bulbs in row or column until wall
-                adjNodes = graphState[node]
-
-                for idx, adjNode in enumerate(adjNodes): # For each direction
-                    rayNode = adjNode # Check each node outwards in a ray in that direction until wall
-
-                    while True: # Graph should be bordered by WALL, so this will always break eventually
+                for idx, adjNode in enumerate(graphState[node]):
+                    rayNode = adjNode
+                    while not self.stateIsWall(rayNode.getDecision()):
                         if rayNode.getDecision() == NodeStates.BULB:
-                            return OverallStates.INVALID # If hit bulb before wall, this state is invalid
-                        elif self.stateIsWall(rayNode.getDecision()):
-                            break # If hit wall, we're done checking in this direction
+                            return OverallStates.INVALID
+                        rayNode = graphState[rayNode][idx]
+            elif node.possibilities & EMPTY_BIT:
+                # Lit if any ray from here reaches a bulb before a wall
+                isLit = False
+                for idx, adjNode in enumerate(graphState[node]):
+                    rayNode = adjNode
+                    while not self.stateIsWall(rayNode.getDecision()) and not isLit:
+                        isLit = rayNode.getDecision() == NodeStates.BULB
+                        rayNode = graphState[rayNode][idx]
+                if not isLit:
+                    unlit = True
 
-                        rayNode = graphState[rayNode][idx] # Get next node in this direction
-            else:
+        isComplete = not unlit
+
+        for node in graphState:
+            if node.getDecision() != NodeStates.BULB:
                 adjBulbs = self.countNodeAdjacentBulbs(graphState, node)
 
                 if node.getDecision() == NodeStates.WALL0:
@@ -755,6 +904,13 @@ class ForwardCheckingSolver:
                     elif adjBulbs != 4:
                         isComplete = False
 
+        # A space nothing could light
+        if self.visibility:
+            canBulb = self.getBulbCandidates(graphState)
+            for sightLine in self.sightLines.values():
+                if not any(seen in canBulb for seen in sightLine):
+                    return OverallStates.INVALID
+
         if settled and unlit:
             return OverallStates.INVALID
 
@@ -762,169 +918,57 @@ class ForwardCheckingSolver:
             return OverallStates.COMPLETE
         else:
             return OverallStates.VALID
-    # checkOverallStates end
+    # scanOverallStates end
 
-    def printState(self, graphState, boardState):
-        unlit, lit = self.getUnlitSpaces(graphState)
+    def printState(self):
+        unlit, lit = self.getUnlitSpaces(self.graph)
 
-        for row in boardState:
+        for row in self.board:
             for node in row:
                 if node.getDecision() == NodeStates.BULB:
-                    colorPrint(AnsiColors.YELLOW, str(node).ljust(4, " "), end="")
+                    self.colorPrint(AnsiColors.YELLOW, str(node).ljust(4, " "), end="")
                 elif node.getDecision() == NodeStates.EMPTY:
                     if node in unlit:
-                        colorPrint(AnsiColors.GRAY, str(node).ljust(4, " "), end="")
+                        self.colorPrint(AnsiColors.GRAY, str(node).ljust(4, " "), end="")
                     else:
-                        colorPrint(AnsiColors.YELLOW, str(node).ljust(4, " "), end="")
+                        self.colorPrint(AnsiColors.YELLOW, str(node).ljust(4, " "), end="")
                 elif node.getDecision() is not None:
-                    colorPrint("", str(node).ljust(4, " "), end="")
+                    self.colorPrint("", str(node).ljust(4, " "), end="")
                 else:
-                    colorPrint(AnsiColors.BLUE, str(node).ljust(4, " "), end="")
+                    self.colorPrint(AnsiColors.BLUE, str(node).ljust(4, " "), end="")
             print()
 # BacktrackingSolver end
 
-####################################
-# Utility Functions
-####################################
-
-# ansi = string: from AnsiColors class
-def colorPrint(ansi, *args, end=None, sep=" "):
-    if USE_COLOR_PRINT:
-        print(ansi, end="")
-        print(*args, end="", sep=sep)
-        print(AnsiColors.RESET, end="")
-        print(end=end)
-    else:
-        print(*args, end=end)
-# colorPrint end
-
 ####################################
 # Core Functions
 ####################################
 
-def createGraphFromNodeMatrix(nodeMatrix, sizeX, sizeY):
-    graph = {}
-
-    for rowIdx in range(sizeY):
-        for columnIdx in range(sizeX):
-            # Gather adjacent nodes of node
-            node = nodeMatrix[rowIdx][columnIdx]
-            adjacencyList = []
-
-            up = None
-            down = None
-            left = None
-            right = None
-
-            if rowIdx-1 >= 0:
-                up = nodeMatrix[rowIdx-1][columnIdx]
-            if rowIdx+1 < sizeY:
-                down = nodeMatrix[rowIdx+1][columnIdx]
-            if columnIdx-1 >= 0:
-                left = nodeMatrix[rowIdx][columnIdx-1]
-            if columnIdx+1 < sizeX:
-                right = nodeMatrix[rowIdx][columnIdx+1]
-
-            if up is not None:
-                adjacencyList.append(up)
-            else:
-                adjacencyList.append(Node({NodeStates.WALL}, rowIdx, columnIdx))
-
-            if right is not None:
-                adjacencyList.append(right)
-            else:
-                adjacencyList.append(Node({NodeStates.WALL}, rowIdx, columnIdx))
-
-            if down is not None:
-                adjacencyList.append(down)
-            else:
-                adjacencyList.append(Node({NodeStates.WALL}, rowIdx, columnIdx))
-
-            if left is not None:
-                adjacencyList.append(left)
-            else:
-                adjacencyList.append(Node({NodeStates.WALL}, rowIdx, columnIdx))
-
-            graph[node] = adjacencyList
-    return graph
-# createGraphFromNodeMatrix end
-
-# mapData = list: strings representing each row of map; its initial state
-# mapSize = list: rows, columns
-def createGraphFromMapData(mapData, mapSize):
-    # Convert mapData to discrete nodes
-    nodes = []
-
-    for y, line in enumerate(mapData):
-        nodeRow = []
-        for x, char in enumerate(line):
-            if char == NodeStates.EMPTY:
-                nodeRow.append(Node({NodeStates.EMPTY, NodeStates.BULB}, x, y))
-            else:
-                nodeRow.append(Node({char}, x, y))
-        nodes.append(nodeRow)
-
-    # Create graph from nodes
-    graph = createGraphFromNodeMatrix(nodes, mapSize[1], mapSize[0])
-
-    return graph, nodes
-# createGraphFromMapData end
-
-# filename = string: filename of input file
-# SolverClass = class: constructor accepting dictionary graph as first argument, implementing solve method
-def parse(filename, SolverClass):
-    if not os.path.isfile(filename):
-        print("File does not exist:", filename)
-        return
-
-    file = open(filename, "r")
-
-    if file.mode == "r":
-        lines = file.readlines()
-        mapSize = [0,0] # Integers x, y
-        mapData = [] # List of strings denoting map rows
-        readingSize = False # Reading first line of map data
-
-        for line in lines:
-            line = line.strip()
-
-            if "# Start" in line:
-                # Begin reading map
-                readingSize = True
-
-            elif "# End" in line:
-                # Solve the puzzle
-                if SolverClass is not None:
-                    graph, board = createGraphFromMapData(mapData, mapSize)
-                    solver = SolverClass(graph, board)
-                    solver.solve()
-
-                # Reset for next map
-                mapSize = [0,0]
-                mapData = []
-                readingSize = False
-
-            elif len(line) > 0 and line[0] != "#":
-                if readingSize:
-                    # Read map size from first line
-                    split = line.split(" ")
-                    mapSize[0] = int(split[0])
-                    mapSize[1] = int(split[1])
-                    readingSize = False
-
-                else:
-                    # Read map data from rest of lines
-                    mapData.append(line)
-
-        file.close()
-    else:
-        print("Failed to read file:", filename)
-# parse end
+# grid = list: strings representing each row of map, or one string with a row per line
+# solver = class: solver to use, ForwardCheckingSolver or one taking the same arguments
+# heuristic = int: from HeuristicMode class, None for HEURISTIC_MODE
+# max_steps = int: search steps allowed before giving up, None for MAX_SEARCH_ITERATIONS
+# time_limit = number: seconds allowed before giving up with the best partial board, 0 for no limit, None for SEARCH_TIME_LIMIT
+# config = SolverConfig: shared options, None for the globals' values
+# options = keyword arguments naming SolverConfig options to change, e.g. splitComponents or useRestarts,
+#   or backjumping, visibility, dynamicOrdering and trailUndo
+# Returns a SolveResult, printing and writing nothing
+def solve(grid, solver=ForwardCheckingSolver, heuristic=None, max_steps=None, time_limit=None, config=None, **options):
+    return solveGrid(grid, solver, heuristic, max_steps, time_limit, config, **options)
+# solve end
+
+# argv = list: command line arguments, None for sys.argv
+# Prompts for a filename like before when none are given
+def main(argv=None):
+    parser = createArgumentParser("Light-up puzzle solver using forward checking with constraint propagation", HEURISTIC_MODE)
+    parser.add_argument("--dynamic-order", action="store_true", help="branch on the wall with the fewest bulb configurations left, then the darkest space, ignoring --heuristic")
+    args = parser.parse_args(argv)
+    runFromArguments(args, ForwardCheckingSolver, dynamicOrdering=USE_DYNAMIC_ORDERING or args.dynamic_order)
+# main end
 
 ####################################
 # Main
 ####################################
 
-filename = input("Enter filename or press enter to use default (lightup puzzles.txt).\n") or 'lightup puzzles.txt'
-parse(filename, ForwardCheckingSolver)
-#input("Completed. Press any key to exit.")
+if __name__ == "__main__":
+    main()
+    #input("Completed. Press any key to exit.")
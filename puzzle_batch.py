@@ -0,0 +1,211 @@
+# Reading puzzle files, and solving their puzzles one after another or on a process pool
+import os.path
+import io
+import contextlib
+import signal
+import multiprocessing
+from collections import deque
+from puzzle_core import AnsiColors
+from puzzle_search import SolverConfig, createSolver, writeCsvRow
+
+####################################
+# Globals
+####################################
+
+USE_BATCH_SOLVE = False # Solve the puzzles of a file on a process pool instead of one after another
+BATCH_WORKERS = 0 # Processes used in batch mode, 0 for one per core
+BATCH_TIMEOUT = 300 # Seconds a puzzle may search for in batch mode before it's stopped, 0 for no limit
+BATCH_IN_FLIGHT = 4 # Puzzles handed to the pool per worker before waiting on the oldest, so files are read only as fast as they're solved
+
+####################################
+# Classes
+####################################
+
+# Raised from the batch mode timer to stop a search that has run too long
+class SearchTimeout(Exception):
+    pass
+# SearchTimeout end
+
+# One puzzle read from a file by readPuzzles
+class PuzzleRecord:
+    __slots__ = ("mapData", "mapSize", "solution")
+
+    def __init__(self):
+        self.mapData = [] # List of strings denoting map rows
+        self.mapSize = [0,0] # Integers rows, columns
+        self.solution = None # List of strings denoting solved map rows, if the file gives them
+    # __init__ end
+# PuzzleRecord end
+
+####################################
+# Utility Functions
+####################################
+
+def raiseSearchTimeout(signum, frame):
+    raise SearchTimeout()
+# raiseSearchTimeout end
+
+####################################
+# Core Functions
+####################################
+
+# filename = string: filename of input file
+# Yields a PuzzleRecord per puzzle, reading a line at a time so large files aren't held in memory
+# Markers may be written "# Start" or "#Start", and a solution block after "# End" may have its rows commented out or not
+def readPuzzles(filename):
+    if not os.path.isfile(filename):
+        print("File does not exist:", filename)
+        return
+
+    with open(filename, "r") as file:
+        puzzle = None # Puzzle whose map is being read
+        finished = None # Puzzle read up to its end marker, held back in case a solution follows
+        readingSize = False # Reading first line of map data
+        readingSolution = False
+
+        for line in file:
+            line = line.strip()
+            isComment = line.startswith("#")
+            text = line.lstrip("#").strip() # Markers and commented out solution rows without their #
+
+            if isComment and text.startswith("Start"):
+                # Begin reading map
+                if finished is not None:
+                    yield finished
+                finished = None
+                puzzle = PuzzleRecord()
+                readingSize = True
+                readingSolution = False
+
+            elif isComment and text.startswith("End"):
+                if puzzle is not None:
+                    finished = puzzle
+                puzzle = None
+
+            elif isComment and text.startswith("Solution"):
+                if finished is not None:
+                    finished.solution = []
+                    readingSolution = True
+
+            elif puzzle is not None:
+                if len(line) > 0 and line[0] != "#":
+                    if readingSize:
+                        # Read map size from first line
+                        split = line.split(" ")
+                        puzzle.mapSize[0] = int(split[0])
+                        puzzle.mapSize[1] = int(split[1])
+                        readingSize = False
+
+                    else:
+                        # Read map data from rest of lines
+                        puzzle.mapData.append(line)
+
+            elif readingSolution and len(text) > 0:
+                finished.solution.append(text)
+
+                if len(finished.solution) == finished.mapSize[0]:
+                    yield finished
+                    finished = None
+                    readingSolution = False
+
+        if finished is not None:
+            yield finished
+# readPuzzles end
+
+# solverOptions = dict: keyword arguments for the strategy, e.g. heuristicMode
+# config = SolverConfig: shared options, None for the globals' values
+def parse(filename, SolverClass, quiet=False, solverOptions=None, config=None):
+    puzzleCount, solvedCount = 0, 0
+    config = config or SolverConfig()
+
+    for puzzle in readPuzzles(filename):
+        # Solve the puzzle
+        if SolverClass is not None:
+            solver = createSolver(SolverClass, puzzle.mapData, puzzle.mapSize, config, **(solverOptions or {}))
+
+            if quiet:
+                solver.search()
+                if config.saveCsv:
+                    writeCsvRow(solver.csvFileName, solver.csvRow)
+            else:
+                solver.solve()
+
+            puzzleCount += 1
+            if solver.csvRow[2] == "yes":
+                solvedCount += 1
+
+    if quiet:
+        print("Solved", solvedCount, "of", puzzleCount, "puzzles in", filename)
+# parse end
+
+# job = tuple: SolverClass, solverOptions, SolverConfig, mapData, mapSize, timeout in seconds, quiet
+# Returns the solver's printed output, csv file name and csv row
+def solveBatchPuzzle(job):
+    SolverClass, solverOptions, config, mapData, mapSize, timeout, quiet = job
+    solver = createSolver(SolverClass, mapData, mapSize, config, **(solverOptions or {}))
+    output = io.StringIO()
+    useTimer = timeout and hasattr(signal, "setitimer") # No interval timers on Windows
+
+    with contextlib.redirect_stdout(output):
+        try:
+            if useTimer:
+                signal.signal(signal.SIGALRM, raiseSearchTimeout)
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+
+            if quiet:
+                solver.search()
+            else:
+                solver.solve()
+        except SearchTimeout:
+            solver.csvRow = [len(solver.board), solver.searchSteps, "no"]
+            if not quiet:
+                solver.colorPrint(AnsiColors.RED, "Exceeded allowed time of", timeout, "seconds")
+                print("Steps taken:", solver.searchSteps)
+                print(flush=True)
+        finally:
+            if useTimer:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return output.getvalue(), solver.csvFileName, solver.csvRow
+# solveBatchPuzzle end
+
+# result = tuple: as solveBatchPuzzle returns
+# saveCsv = bool: write the csv row
+# Prints the output, writes the csv row and returns whether the puzzle was solved
+def reportBatchResult(result, saveCsv):
+    output, csvFileName, csvRow = result
+    print(output, end="", flush=True)
+
+    if saveCsv and csvFileName:
+        writeCsvRow(csvFileName, csvRow)
+
+    return csvRow[2] == "yes"
+# reportBatchResult end
+
+# solverOptions = dict: keyword arguments for the strategy, e.g. heuristicMode
+# config = SolverConfig: shared options, None for the globals' values, handed to every worker with each puzzle
+def parseBatch(filename, SolverClass, workers, timeout, quiet=False, solverOptions=None, config=None):
+    config = config or SolverConfig()
+    workerConfig = config.copy(saveCsv=False) # The parent writes csv rows so workers don't append to the same files at once
+    jobs = ((SolverClass, solverOptions, workerConfig, puzzle.mapData, puzzle.mapSize, timeout, quiet) for puzzle in readPuzzles(filename))
+    puzzleCount, solvedCount = 0, 0
+
+    processCount = workers or os.cpu_count() or 1
+    pending = deque() # Results not reported yet, in file order
+
+    with multiprocessing.Pool(processCount) as pool:
+        # imap would read the whole file into its task queue, so only a window of puzzles is queued at a time
+        for job in jobs:
+            pending.append(pool.apply_async(solveBatchPuzzle, (job,)))
+
+            if len(pending) >= processCount * BATCH_IN_FLIGHT:
+                puzzleCount += 1
+                solvedCount += reportBatchResult(pending.popleft().get(), config.saveCsv)
+
+        while pending:
+            puzzleCount += 1
+            solvedCount += reportBatchResult(pending.popleft().get(), config.saveCsv)
+
+    if quiet:
+        print("Solved", solvedCount, "of", puzzleCount, "puzzles in", filename)
+# parseBatch end
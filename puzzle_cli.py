@@ -0,0 +1,70 @@
+# Command line options every solver script takes
+import argparse
+from puzzle_core import USE_COLOR_PRINT
+from array_board import USE_ARRAY_BOARD
+from solution_cache import USE_SOLUTION_CACHE, SOLUTION_CACHE_FILE, SOLUTION_CACHE_SIZE
+from puzzle_search import SolverConfig, MAX_SEARCH_ITERATIONS, SEARCH_TIME_LIMIT, SAVE_CSV, USE_COMPONENT_SPLIT, COMPONENT_WORKERS, \
+    USE_RESTARTS, RESTART_UNIT, RESTART_SEED
+from puzzle_batch import USE_BATCH_SOLVE, BATCH_WORKERS, BATCH_TIMEOUT, parse, parseBatch
+
+####################################
+# Core Functions
+####################################
+
+# description = string: shown by --help
+# heuristicMode = int: default for --heuristic
+# Returns a parser with the options every solver script takes, which the script may add to
+def createArgumentParser(description, heuristicMode):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("filenames", nargs="*", help="puzzle files to solve")
+    parser.add_argument("--heuristic", type=int, choices=range(4), default=heuristicMode, help="0 none, 1 most constrained, 2 most constraining, 3 hybrid")
+    parser.add_argument("--max-steps", type=int, default=MAX_SEARCH_ITERATIONS, help="search steps allowed per puzzle")
+    parser.add_argument("--time-limit", type=float, default=SEARCH_TIME_LIMIT, help="seconds per puzzle before stopping with the best partial board, 0 for no limit")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print a count of solved puzzles")
+    parser.add_argument("--batch", action="store_true", default=USE_BATCH_SOLVE, help="solve puzzles on a process pool")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="processes in batch mode, 0 for one per core")
+    parser.add_argument("--timeout", type=float, default=BATCH_TIMEOUT, help="seconds a puzzle may search for in batch mode, 0 for no limit")
+    parser.add_argument("--split", action="store_true", help="solve the independent regions of the board one by one instead of searching it all at once")
+    parser.add_argument("--component-workers", type=int, default=COMPONENT_WORKERS, help="processes solving a puzzle's regions at once, 0 for one per core")
+    parser.add_argument("--cache", nargs="?", const=SOLUTION_CACHE_FILE, default=SOLUTION_CACHE_FILE if USE_SOLUTION_CACHE else None, metavar="FILE", help="reuse solutions from an on-disk cache, and add new ones to it")
+    parser.add_argument("--cache-size", type=int, default=SOLUTION_CACHE_SIZE, help="puzzles kept in the cache")
+    parser.add_argument("--array-board", action="store_true", default=USE_ARRAY_BOARD, help="check states with NumPy array operations over the whole board, for large boards")
+    parser.add_argument("--restarts", action="store_true", default=USE_RESTARTS, help="search in restart rounds on Luby step budgets, breaking ties at random after the first")
+    parser.add_argument("--restart-unit", type=int, default=RESTART_UNIT, help="steps a restart round gets per unit of the Luby sequence")
+    parser.add_argument("--restart-seed", type=int, default=RESTART_SEED, help="seed for the tie breaking of restart rounds")
+    parser.add_argument("--no-csv", action="store_true", help="don't write results to csv")
+    parser.add_argument("--no-color", action="store_true", help="print without ANSI escape codes")
+    return parser
+# createArgumentParser end
+
+# args = argparse.Namespace: from a createArgumentParser parser
+# SolverClass = class: PuzzleSolver subclass
+# extraOptions = further keyword arguments for the strategy, from options the script added
+# Prompts for a filename like before when none are given
+def runFromArguments(args, SolverClass, **extraOptions):
+    config = SolverConfig(
+        maxSteps=args.max_steps,
+        timeLimit=args.time_limit,
+        splitComponents=USE_COMPONENT_SPLIT or args.split,
+        componentWorkers=args.component_workers,
+        useCache=args.cache is not None,
+        cacheFile=args.cache,
+        cacheSize=args.cache_size,
+        useArrayBoard=args.array_board,
+        useRestarts=args.restarts,
+        restartUnit=args.restart_unit,
+        restartSeed=args.restart_seed,
+        saveCsv=SAVE_CSV and not args.no_csv,
+        useColor=USE_COLOR_PRINT and not args.no_color,
+    )
+
+    solverOptions = {"heuristicMode": args.heuristic}
+    solverOptions.update(extraOptions)
+    filenames = args.filenames or [input("Enter filename or press enter to use default (lightup puzzles.txt).\n") or "lightup puzzles.txt"]
+
+    for filename in filenames:
+        if args.batch:
+            parseBatch(filename, SolverClass, args.workers, args.timeout, args.quiet, solverOptions, config)
+        else:
+            parse(filename, SolverClass, args.quiet, solverOptions, config)
+# runFromArguments end
@@ -0,0 +1,783 @@
+# Board model, illumination bookkeeping and heuristic scoring shared by every solver
+from array_board import np, ArrayBoard, countAdjacentArray, scoreIlluminatedArray
+
+####################################
+# Enums
+####################################
+
+class AnsiColors:
+    GRAY = "\033[90m"
+    RED = '\033[91m'
+    GREEN = "\033[92m"
+    YELLOW = "\033[93m"
+    BLUE = "\033[94m"
+    RESET = "\033[0m"
+# AnsiColors end
+
+class NodeStates:
+    BULB = "b"
+    WALL = "W"
+    WALL0 = "0"
+    WALL1 = "1"
+    WALL2 = "2"
+    WALL3 = "3"
+    WALL4 = "4"
+    EMPTY = "_"
+# NodeStates end
+
+class OverallStates:
+    INVALID = 0
+    VALID = 1
+    COMPLETE = 2
+    CANNOT_FINISH = 3
+# OverallStates end
+
+class HeuristicMode:
+    NONE = 0
+    MOST_CONSTRAINED = 1
+    MOST_CONSTRAINING = 2
+    HYBRID = 3
+# HeuristicMode end
+
+####################################
+# Globals
+####################################
+
+USE_COLOR_PRINT = True # Disable if terminal doesn't support ANSI escape codes (e.g. prints gibberish)
+USE_NUMPY_SCORING = True # Score every cell for the heuristics with a few array operations when NumPy is installed
+DEBUG_CHECK_STATES = False # Cross-check the incremental state check against a full board scan every step
+
+# Bit of each state in a Node's possibilities
+STATE_BITS = {state: 1 << idx for idx, state in enumerate((NodeStates.BULB, NodeStates.EMPTY, NodeStates.WALL, NodeStates.WALL0,
+                                                            NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3, NodeStates.WALL4))}
+BULB_BIT = STATE_BITS[NodeStates.BULB]
+EMPTY_BIT = STATE_BITS[NodeStates.EMPTY]
+OPEN_BITS = BULB_BIT | EMPTY_BIT # A space nothing has been decided for yet
+WALL_STATES = frozenset((NodeStates.WALL, NodeStates.WALL0, NodeStates.WALL1, NodeStates.WALL2, NodeStates.WALL3, NodeStates.WALL4))
+
+# Sides (0 up, 1 right, 2 down, 3 left) a wall still short of this many bulbs tries them on, in search order
+WALL_SIDE_ORDERS = {
+    1: ((0,), (1,), (2,), (3,)),
+    2: ((0, 1), (1, 2), (2, 3), (3, 0), (3, 1), (0, 2)),
+    3: ((3, 0, 1), (0, 1, 2), (1, 2, 3), (2, 3, 0)),
+    4: ((0, 1, 2, 3),),
+}
+
+####################################
+# Classes
+####################################
+
+# A board tile, holding the states it could still take as a mask of STATE_BITS, so a decided tile holds just one bit
+# Every strategy builds its boards from these; backtracking decides each space up front and changes its decision
+# A mask is an int, so copying, testing and changing one doesn't go through a set
+class Node:
+    __slots__ = ("possibilities", "x", "y")
+
+    # possibilities = int: STATE_BITS of the states the tile could take
+    def __init__(self, possibilities, x, y):
+        self.possibilities = possibilities
+        self.x = x
+        self.y = y
+    # __init__ end
+
+    # char = string: from NodeStates class, as read from a map
+    @classmethod
+    def fromChar(cls, char, x, y):
+        if char == NodeStates.EMPTY:
+            return cls(OPEN_BITS, x, y)
+        return cls(STATE_BITS[char], x, y)
+    # fromChar end
+
+    # Returns the only state left, None while there's a choice or none
+    def getDecision(self):
+        return MASK_DECISIONS[self.possibilities]
+    # getDecision end
+
+    # state = string: from NodeStates class, the only possibility left
+    def setDecision(self, state):
+        self.possibilities = STATE_BITS[state]
+    # setDecision end
+
+    def canBeEmpty(self):
+        return self.possibilities & EMPTY_BIT != 0
+    # canBeEmpty end
+
+    def canBeBulb(self):
+        return self.possibilities & BULB_BIT != 0
+    # canBeBulb end
+
+    # The states left, in STATE_BITS order
+    def getPossibilities(self):
+        return [state for state, bit in STATE_BITS.items() if self.possibilities & bit]
+    # getPossibilities end
+
+    def __str__(self):
+        return "[" + "".join(self.getPossibilities()) + "]"
+    # __str__ end
+
+    def __repr__(self):
+        return "[" + "".join(self.getPossibilities()) + "]"
+    # __repr__ end
+
+    def __unicode__(self):
+        return "[" + "".join(self.getPossibilities()) + "]"
+    # __unicode__ end
+# Node end
+
+# Maximal wall-free row and column runs, built once per puzzle
+# Cells are keyed by (x, y) so copies of the board can share one index
+class SegmentIndex:
+    def __init__(self, node2dArray, isWall):
+        self.segmentsOf = {} # (x, y) -> [row segment, column segment]
+        self.members = [] # Segment -> list of (x, y)
+        self.bulbCounts = [] # Segment -> bulbs currently inside it
+        self.conflicts = 0 # Segments holding more than one bulb
+
+        self.height = height = len(node2dArray)
+        self.width = width = len(node2dArray[0])
+
+        for y in range(height):
+            for x in range(width):
+                if not isWall(node2dArray[y][x]):
+                    self.segmentsOf[(x, y)] = [None, None]
+
+        for axis, (dx, dy) in enumerate(((1, 0), (0, 1))):
+            for (x, y), segments in self.segmentsOf.items():
+                if segments[axis] is not None:
+                    continue
+
+                # Start a run here and extend it until a wall or the border
+                segment = len(self.members)
+                runX, runY = x, y
+                run = []
+                while (runX, runY) in self.segmentsOf:
+                    self.segmentsOf[(runX, runY)][axis] = segment
+                    run.append((runX, runY))
+                    runX, runY = runX + dx, runY + dy
+
+                self.members.append(run)
+                self.bulbCounts.append(0)
+
+        # Lit cells of a bulb at each position, looked up on every cast instead of walking both runs
+        self.rayCells = {}
+        for position, (rowSegment, columnSegment) in self.segmentsOf.items():
+            self.rayCells[position] = tuple(cell for cell in self.members[rowSegment] + self.members[columnSegment] if cell != position)
+    # __init__ end
+
+    def isCell(self, x, y):
+        return (x, y) in self.segmentsOf
+    # isCell end
+
+    def isLit(self, x, y):
+        rowSegment, columnSegment = self.segmentsOf[(x, y)]
+        return self.bulbCounts[rowSegment] > 0 or self.bulbCounts[columnSegment] > 0
+    # isLit end
+
+    # Cells lit by a bulb at (x, y), not counting itself
+    def getRayCells(self, x, y):
+        return self.rayCells[(x, y)]
+    # getRayCells end
+
+    # Number of cells a bulb at (x, y) would light, not counting itself
+    def countRayCells(self, x, y):
+        rowSegment, columnSegment = self.segmentsOf[(x, y)]
+        return len(self.members[rowSegment]) + len(self.members[columnSegment]) - 2
+    # countRayCells end
+
+    # Length of the run starting at (x, y) along the axis of direction (0 up, 1 right, 2 down, 3 left)
+    def countRunCells(self, x, y, direction):
+        if (x, y) not in self.segmentsOf:
+            return 0
+        return len(self.members[self.segmentsOf[(x, y)][(direction + 1) % 2]])
+    # countRunCells end
+
+    def addBulb(self, x, y):
+        for segment in self.segmentsOf[(x, y)]:
+            self.bulbCounts[segment] += 1
+            if self.bulbCounts[segment] == 2:
+                self.conflicts += 1
+    # addBulb end
+
+    def removeBulb(self, x, y):
+        for segment in self.segmentsOf[(x, y)]:
+            self.bulbCounts[segment] -= 1
+            if self.bulbCounts[segment] == 1:
+                self.conflicts -= 1
+    # removeBulb end
+
+    def resetBulbs(self):
+        self.bulbCounts = [0] * len(self.members)
+        self.conflicts = 0
+    # resetBulbs end
+# SegmentIndex end
+
+# Board-wide counters behind the constant time state check, updated only for the runs and walls a changed cell touches
+# Cells are keyed by (x, y) and described by (is bulb, could be empty, is decided)
+class StateCounters:
+    # useArrayBoard = bool: also keep an ArrayBoard and answer state checks from it, when NumPy is installed
+    def __init__(self, segments, wallNumbers, cellStatuses, useArrayBoard=False):
+        self.segments = segments
+        self.wallNumbers = wallNumbers # Numbered wall position -> required adjacent bulbs
+        self.cellStatuses = {}
+        self.litCounts = {} # Cell -> bulbs lighting it, a bulb counting itself once per run
+        self.wallBulbCounts = {} # Numbered wall -> adjacent bulbs
+        self.adjacentWalls = {} # Cell -> adjacent numbered walls
+        self.adjacentCells = {} # Cell -> adjacent cells
+        self.adjacentLitCounts = {} # Cell -> adjacent cells that are lit and could be empty, the most constrained score
+        self.unlitCount = 0 # Cells that could be empty with no bulb in either run
+        self.undecidedCount = 0 # Cells without exactly one possibility
+        self.overfullWalls = 0 # Walls with more adjacent bulbs than their number
+        self.unsatisfiedWalls = 0 # Walls without exactly their number of adjacent bulbs
+
+        # With NumPy the adjacent lit counts are taken in one pass once the statuses are set
+        self.trackAdjacentLit = not (USE_NUMPY_SCORING and np is not None)
+        self.arrays = ArrayBoard(segments, wallNumbers) if useArrayBoard and np is not None else None
+
+        self.segments.resetBulbs()
+
+        for position, number in wallNumbers.items():
+            self.wallBulbCounts[position] = 0
+            if number != 0:
+                self.unsatisfiedWalls += 1
+
+        # Start from an unlit board with no bulbs, then apply the real statuses
+        for (x, y) in segments.segmentsOf:
+            self.cellStatuses[(x, y)] = (False, True, False)
+            self.litCounts[(x, y)] = 0
+            self.adjacentWalls[(x, y)] = [adj for adj in ((x, y-1), (x+1, y), (x, y+1), (x-1, y)) if adj in wallNumbers]
+            self.adjacentCells[(x, y)] = [adj for adj in ((x, y-1), (x+1, y), (x, y+1), (x-1, y)) if adj in segments.segmentsOf]
+            self.adjacentLitCounts[(x, y)] = 0
+            self.unlitCount += 1
+            self.undecidedCount += 1
+
+        for position, status in cellStatuses.items():
+            self.setCellStatus(position, *status)
+
+        if not self.trackAdjacentLit:
+            self.adjacentLitCounts = self.scanAdjacentLit()
+            self.trackAdjacentLit = True
+    # __init__ end
+
+    def setCellStatus(self, position, isBulb, canBeEmpty, isDecided):
+        wasBulb, couldBeEmpty, wasDecided = self.cellStatuses[position]
+        self.cellStatuses[position] = (isBulb, canBeEmpty, isDecided)
+
+        if self.arrays is not None:
+            self.arrays.setCellStatus(position, isBulb, canBeEmpty)
+
+        if wasDecided != isDecided:
+            self.undecidedCount += -1 if isDecided else 1
+
+        if couldBeEmpty != canBeEmpty:
+            if self.litCounts[position] == 0:
+                self.unlitCount += 1 if canBeEmpty else -1
+            else:
+                self.countAdjacentLit(position, 1 if canBeEmpty else -1)
+
+        if wasBulb != isBulb:
+            delta = 1 if isBulb else -1
+            x, y = position
+
+            if isBulb:
+                self.segments.addBulb(x, y)
+            else:
+                self.segments.removeBulb(x, y)
+
+            # Only the bulb's own runs change lighting
+            for segment in self.segments.segmentsOf[position]:
+                for member in self.segments.members[segment]:
+                    litCount = self.litCounts[member]
+                    self.litCounts[member] = litCount + delta
+
+                    if self.cellStatuses[member][1]:
+                        if litCount == 0:
+                            self.unlitCount -= 1 # Newly lit
+                            self.countAdjacentLit(member, 1)
+                        elif litCount + delta == 0:
+                            self.unlitCount += 1 # Newly unlit
+                            self.countAdjacentLit(member, -1)
+
+            # And only its adjacent walls change bulb counts
+            for wall in self.adjacentWalls[position]:
+                number = self.wallNumbers[wall]
+                before = self.wallBulbCounts[wall]
+                after = before + delta
+                self.wallBulbCounts[wall] = after
+
+                self.overfullWalls += (after > number) - (before > number)
+                self.unsatisfiedWalls += (after != number) - (before != number)
+    # setCellStatus end
+
+    # A cell at position became, or stopped being, lit and able to be empty
+    def countAdjacentLit(self, position, delta):
+        if not self.trackAdjacentLit:
+            return
+
+        for adj in self.adjacentCells[position]:
+            self.adjacentLitCounts[adj] += delta
+    # countAdjacentLit end
+
+    # Adjacent lit counts of every cell from a full board array, without following each change
+    def scanAdjacentLit(self):
+        litMask = np.zeros((self.segments.height, self.segments.width), dtype=np.int32)
+        for (x, y), litCount in self.litCounts.items():
+            if litCount and self.cellStatuses[(x, y)][1]:
+                litMask[y, x] = 1
+
+        adjacentLit = countAdjacentArray(litMask).tolist()
+        return {(x, y): adjacentLit[y][x] for (x, y) in self.segments.segmentsOf}
+    # scanAdjacentLit end
+
+    def isLit(self, position):
+        return self.litCounts[position] > 0
+    # isLit end
+
+    def checkState(self):
+        if self.arrays is not None:
+            invalid, complete = self.arrays.checkBoard()
+        else:
+            # No bulbs in row or column until wall, and no wall over its number
+            invalid = self.segments.conflicts or self.overfullWalls
+
+            # No unlit spaces left and every wall exactly satisfied
+            complete = self.unlitCount == 0 and self.unsatisfiedWalls == 0
+
+        if invalid:
+            return OverallStates.INVALID
+        elif complete:
+            return OverallStates.COMPLETE
+        else:
+            return OverallStates.VALID
+    # checkState end
+# StateCounters end
+
+# The board of one puzzle with its runs, state counters, illumination counts and heuristic ordering
+# Subclasses implement scanOverallStates
+class PuzzleBoard:
+    NodeClass = Node # Node type boards are built from, providing fromChar, getDecision and canBeEmpty
+
+    # heuristicMode = int: from HeuristicMode class
+    # useArrayBoard = bool: also keep an ArrayBoard for state checks, when NumPy is installed
+    def __init__(self, graph, node2dArray, heuristicMode, useArrayBoard=False):
+        self.graph = graph
+        self.board = node2dArray
+        self.heuristicMode = heuristicMode
+        self.useArrayBoard = useArrayBoard
+        self.tieRanks = None # Position -> order among equally scored choices, None for board order
+        self.segments = SegmentIndex(node2dArray, lambda node: self.stateIsWall(node.getDecision()))
+
+        # Counters kept in step with every change so state checks don't rescan the board
+        self.counters = self.createCounters(graph)
+        self.illuminatedCounts = {} # Position -> countIlluminatedSpaces, which only depends on the walls
+    # __init__ end
+
+    # Place of (x, y) among equally scored choices, the same for all of them outside of restart rounds
+    def getTieRank(self, x, y):
+        if self.tieRanks is None:
+            return 0
+        return self.tieRanks[(x, y)]
+    # getTieRank end
+
+    # cells = iterable: (x, y) positions of open cells to decide
+    # solution = list: solved map rows, whose top left corner is at board position offset
+    def setCellDecisions(self, cells, solution, offset):
+        minX, minY = offset
+        for x, y in cells:
+            self.board[y][x].setDecision(NodeStates.BULB if solution[y - minY][x - minX] == NodeStates.BULB else NodeStates.EMPTY)
+    # setCellDecisions end
+
+    # The board's starting map rows, as read from a file
+    def getPuzzleRows(self):
+        rows = []
+        for row in self.board:
+            chars = []
+            for node in row:
+                nodeState = node.getDecision()
+                if self.stateIsWall(nodeState) or nodeState == NodeStates.BULB:
+                    chars.append(nodeState)
+                else:
+                    chars.append(NodeStates.EMPTY)
+            rows.append("".join(chars))
+        return rows
+    # getPuzzleRows end
+
+    # Board rows as strings in the input file's format, with b for bulbs
+    def getSolution(self):
+        return ["".join(node.getDecision() or NodeStates.EMPTY for node in row) for row in self.board]
+    # getSolution end
+
+    # Returns the numbered walls in the order the search should try them
+    def orderWalls(self):
+        # Get all numbered tiles
+        wallNode4Count = 0
+        initWallNodes, wallNodes = [], []
+        for n in self.graph:
+            if self.stateIsWall(n.getDecision()):
+                if n.getDecision() == NodeStates.WALL4:
+                    initWallNodes.insert(0, n)
+                    wallNode4Count += 1
+                elif n.getDecision() != NodeStates.WALL0:
+                    initWallNodes.append(n)
+
+        wallNodes.extend(initWallNodes[:wallNode4Count])
+
+        # Restart rounds shuffle which of equally scored walls comes first
+        if self.tieRanks is not None:
+            initWallNodes[wallNode4Count:] = sorted(initWallNodes[wallNode4Count:], key=lambda node: self.getTieRank(node.x, node.y))
+
+        # Sort wall tiles for heuristic
+        if self.heuristicMode == HeuristicMode.MOST_CONSTRAINED:
+            wallNodes += [node for combo in self.getWallCombinations(initWallNodes, wallNodes) for node in combo]
+
+        elif self.heuristicMode == HeuristicMode.MOST_CONSTRAINING:
+            # Walls that could illuminate the most cells first
+            def countIlluminatedSpaces(node):
+                return self.countIlluminatedSpaces(node, self.graph)
+            # countIlluminatedSpaces end
+
+            wallNodes = sorted(initWallNodes, key=countIlluminatedSpaces, reverse=True)
+
+        elif self.heuristicMode == HeuristicMode.HYBRID:
+            # Combine both most constrained and most constraining by generating a score from both sorting methods
+
+            # Constrained, as the first combination each wall is in
+            combinations = self.getWallCombinations(initWallNodes, wallNodes)
+            combinationScores = {}
+            for score, combo in enumerate(combinations):
+                for node in combo:
+                    combinationScores.setdefault(node, score + 1)
+
+            # Constraining
+            maxLitSpaces = 0
+            litSpacesMap = {}
+            for node in self.graph:
+                litSpaces = self.countIlluminatedSpaces(node, self.graph)
+                litSpacesMap[node] = litSpaces
+
+                if litSpaces > maxLitSpaces:
+                    maxLitSpaces = litSpaces
+
+            # Generate score via hybrid
+            def hybridSort(node):
+                litSpaces = litSpacesMap[node]
+                litSpacesPercentage = litSpaces / maxLitSpaces if maxLitSpaces else 0 # A region of lone cells lights nothing
+
+                return combinationScores.get(node, 0) * litSpacesPercentage
+            # hybridSort end
+
+            wallNodes = sorted(initWallNodes, key=hybridSort, reverse=True)
+
+        elif self.heuristicMode == HeuristicMode.NONE:
+            wallNodes = initWallNodes
+
+        return wallNodes
+    # orderWalls end
+
+    # Groups walls by how many ways their bulbs could be placed
+    # Returns [[1 combination], [2 combinations], [3 combinations], [4 combinations], [6 combinations]], WALL4 tiles first
+    def getWallCombinations(self, initWallNodes, wall4Nodes):
+        combinations = [[], [], [], [], []]
+        combinations[0].extend(wall4Nodes)
+        for node in initWallNodes:
+            adjEmptyCells = len([v for v in self.graph[node] if v.getDecision() == NodeStates.EMPTY])
+            if node.getDecision() == NodeStates.WALL3:
+                if adjEmptyCells == 3:
+                    combinations[0].append(node)
+                elif adjEmptyCells == 4:
+                    combinations[3].append(node)
+            elif node.getDecision() == NodeStates.WALL2:
+                if adjEmptyCells == 4:
+                    combinations[4].append(node)
+                elif adjEmptyCells == 3:
+                    combinations[2].append(node)
+                elif adjEmptyCells == 2:
+                    combinations[0].append(node)
+            elif node.getDecision() == NodeStates.WALL1:
+                combinations[adjEmptyCells-1].append(node)
+
+        return combinations
+    # getWallCombinations end
+
+    # Sorts unlit spaces in place into the order the search should try bulbs in them
+    # Scores come from the counters, in step with graphState as getUnlitSpaces leaves them, and the cached
+    # illumination counts, so nothing is rescanned per search node
+    def sortUnlitSpaces(self, unlits, graphState):
+        adjacentLitCounts = self.counters.adjacentLitCounts
+
+        if self.tieRanks is not None:
+            unlits.sort(key=lambda node: self.getTieRank(node.x, node.y))
+
+        if self.heuristicMode == HeuristicMode.MOST_CONSTRAINED:
+            # Most adjacent lit spaces
+            unlits.sort(key=lambda node: adjacentLitCounts[(node.x, node.y)], reverse=True)
+        elif self.heuristicMode == HeuristicMode.MOST_CONSTRAINING:
+            # Lights the most tiles
+            def sortCountIlluminatedSpaces(node):
+                return self.countIlluminatedSpaces(node, graphState)
+            # sortCountIlluminatedSpaces end
+
+            unlits.sort(key=sortCountIlluminatedSpaces, reverse=True)
+        elif self.heuristicMode == HeuristicMode.HYBRID:
+            # Combine scores
+            def hybridSort(node):
+                litSpaces = self.countIlluminatedSpaces(node, graphState)
+                adjLitPercentage = adjacentLitCounts[(node.x, node.y)]/4
+
+                return adjLitPercentage * litSpaces
+            # hybridSort end
+
+            unlits.sort(key=hybridSort, reverse=True)
+    # sortUnlitSpaces end
+
+    def stateIsWall(self, state):
+        return state in WALL_STATES
+    # stateIsWall end
+
+    # Only depends on where the walls are, so each position is counted once per puzzle
+    def countIlluminatedSpaces(self, node, graphState):
+        position = (node.x, node.y)
+        if position in self.illuminatedCounts:
+            return self.illuminatedCounts[position]
+
+        if USE_NUMPY_SCORING and np is not None:
+            # Every position at once the first time one is asked for
+            self.illuminatedCounts = self.scoreIlluminatedSpaces()
+            return self.illuminatedCounts[position]
+
+        numLitCells = 0
+        adjNodes = graphState[node]
+
+        for adjNode in adjNodes: # For each direction
+            if adjNode.getDecision() == NodeStates.WALL: # Border walls aren't in graph
+                continue
+
+            if self.segments.isCell(adjNode.x, adjNode.y):
+                # A bulb here lights the rest of its row and column runs
+                numLitCells += self.segments.countRayCells(adjNode.x, adjNode.y)
+            else:
+                # Rays from a wall light each run it touches
+                for idx, bulbAdjNode in enumerate(graphState[adjNode]):
+                    numLitCells += self.segments.countRunCells(bulbAdjNode.x, bulbAdjNode.y, idx)
+
+        self.illuminatedCounts[position] = numLitCells
+        return numLitCells
+    # countIlluminatedSpaces end
+
+    # countIlluminatedSpaces of every position from run lengths, as position -> count
+    def scoreIlluminatedSpaces(self):
+        openMask = np.zeros((self.segments.height, self.segments.width), dtype=bool)
+        numberedMask = np.zeros_like(openMask)
+
+        for y, row in enumerate(self.board):
+            for x, node in enumerate(row):
+                if self.segments.isCell(x, y):
+                    openMask[y, x] = True
+                elif node.getDecision() != NodeStates.WALL:
+                    numberedMask[y, x] = True
+
+        illuminated = scoreIlluminatedArray(openMask, numberedMask).tolist()
+        return {(x, y): illuminated[y][x] for y in range(self.segments.height) for x in range(self.segments.width)}
+    # scoreIlluminatedSpaces end
+
+    def getUnlitSpaces(self, graphState):
+        unlits = set()
+        lits = set()
+
+        self.syncCounters(graphState)
+
+        arrays = self.counters.arrays
+        if arrays is not None and graphState is self.graph:
+            # Only the spaces that could be empty are visited, found with array operations
+            arrays.refreshLit()
+            unlits = {self.board[y][x] for y, x in np.argwhere(arrays.getUnlitMask()).tolist()}
+            lits = {self.board[y][x] for y, x in np.argwhere(arrays.canEmpty & arrays.lit).tolist()}
+            return unlits, lits
+
+        for node in graphState:
+            if node.canBeEmpty():
+                if self.counters.isLit((node.x, node.y)):
+                    lits.add(node)
+                else:
+                    unlits.add(node)
+
+        return unlits, lits
+    # getUnlitSpaces end
+
+    def countNodeAdjacentBulbs(self, graphState, node):
+        adjBulbs = 0
+
+        for adj in graphState[node]:
+            if adj.getDecision() == NodeStates.BULB:
+                adjBulbs += 1
+
+        return adjBulbs
+    # countNodeAdjacentBulbs end
+
+    # (is bulb, could be empty, is decided) as StateCounters expects
+    def getCellStatus(self, node):
+        possibilities = node.possibilities
+        return possibilities == BULB_BIT, possibilities & EMPTY_BIT != 0, MASK_DECISIONS[possibilities] is not None
+    # getCellStatus end
+
+    def createCounters(self, graphState):
+        wallNumbers, cellStatuses = {}, {}
+
+        for node in graphState:
+            nodeState = node.getDecision()
+            if self.stateIsWall(nodeState):
+                if nodeState != NodeStates.WALL:
+                    wallNumbers[(node.x, node.y)] = int(nodeState)
+            else:
+                cellStatuses[(node.x, node.y)] = self.getCellStatus(node)
+
+        return StateCounters(self.segments, wallNumbers, cellStatuses, self.useArrayBoard)
+    # createCounters end
+
+    # Brings the counters up to date with graphState, for strategies that search on copies of the board
+    def syncCounters(self, graphState):
+        pass
+    # syncCounters end
+
+    # Constant time from the counters kept in step with every change
+    def checkOverallStates(self, graphState):
+        self.syncCounters(graphState)
+        stateStatus = self.getCounterState()
+
+        if DEBUG_CHECK_STATES:
+            scannedStatus = self.scanOverallStates(graphState)
+            if scannedStatus != stateStatus:
+                self.colorPrint(AnsiColors.RED, "State counters disagree with full check:", stateStatus, "!=", scannedStatus)
+                return scannedStatus
+
+        return stateStatus
+    # checkOverallStates end
+
+    def getCounterState(self):
+        return self.counters.checkState()
+    # getCounterState end
+
+    # ansi = string: from AnsiColors class
+    def colorPrint(self, ansi, *args, end=None, sep=" "):
+        colorPrint(ansi, *args, end=end, sep=sep)
+    # colorPrint end
+# PuzzleBoard end
+
+####################################
+# Utility Functions
+####################################
+
+# ansi = string: from AnsiColors class
+# useColor = bool: print the escape codes, None for USE_COLOR_PRINT
+def colorPrint(ansi, *args, end=None, sep=" ", useColor=None):
+    if USE_COLOR_PRINT if useColor is None else useColor:
+        print(ansi, end="")
+        print(*args, end="", sep=sep)
+        print(AnsiColors.RESET, end="")
+        print(end=end)
+    else:
+        print(*args, end=end)
+# colorPrint end
+
+# Returns a table indexed by [wall number][sides that could take a bulb][sides with a bulb], 4 bits each,
+# of the tuples of sides whose bulbs would bring the wall to exactly its number
+def createWallCompletions():
+    completions = []
+
+    for number in range(5):
+        numberTable = []
+        for allowed in range(16):
+            allowedTable = []
+            for bulbs in range(16):
+                missing = number - bin(bulbs).count("1")
+                allowedTable.append(tuple(sides for sides in WALL_SIDE_ORDERS.get(missing, ())
+                                          if all(allowed >> side & 1 and not bulbs >> side & 1 for side in sides)))
+            numberTable.append(allowedTable)
+        completions.append(numberTable)
+
+    return completions
+# createWallCompletions end
+
+WALL_COMPLETIONS = createWallCompletions()
+
+# Returns a table indexed by every possibility mask of the only state it holds, None for masks holding more or fewer
+def createMaskDecisions():
+    decisions = [None] * (1 << len(STATE_BITS))
+    for state, bit in STATE_BITS.items():
+        decisions[bit] = state
+    return decisions
+# createMaskDecisions end
+
+MASK_DECISIONS = createMaskDecisions()
+
+####################################
+# Core Functions
+####################################
+
+# nodeMatrix = list: rows of nodes
+# NodeClass = class: node type, used for the border walls around the board
+def createGraphFromNodeMatrix(nodeMatrix, sizeX, sizeY, NodeClass):
+    graph = {}
+
+    for rowIdx in range(sizeY):
+        for columnIdx in range(sizeX):
+            # Gather adjacent nodes of node
+            node = nodeMatrix[rowIdx][columnIdx]
+            adjacencyList = []
+
+            up = None
+            down = None
+            left = None
+            right = None
+
+            if rowIdx-1 >= 0:
+                up = nodeMatrix[rowIdx-1][columnIdx]
+            if rowIdx+1 < sizeY:
+                down = nodeMatrix[rowIdx+1][columnIdx]
+            if columnIdx-1 >= 0:
+                left = nodeMatrix[rowIdx][columnIdx-1]
+            if columnIdx+1 < sizeX:
+                right = nodeMatrix[rowIdx][columnIdx+1]
+
+            if up is not None:
+                adjacencyList.append(up)
+            else:
+                adjacencyList.append(NodeClass.fromChar(NodeStates.WALL, columnIdx, rowIdx))
+
+            if right is not None:
+                adjacencyList.append(right)
+            else:
+                adjacencyList.append(NodeClass.fromChar(NodeStates.WALL, columnIdx, rowIdx))
+
+            if down is not None:
+                adjacencyList.append(down)
+            else:
+                adjacencyList.append(NodeClass.fromChar(NodeStates.WALL, columnIdx, rowIdx))
+
+            if left is not None:
+                adjacencyList.append(left)
+            else:
+                adjacencyList.append(NodeClass.fromChar(NodeStates.WALL, columnIdx, rowIdx))
+
+            graph[node] = adjacencyList
+
+    return graph
+# createGraphFromNodeMatrix end
+
+# mapData = list: strings representing each row of map; its initial state
+# mapSize = list: rows, columns
+# NodeClass = class: node type to build the board from
+def createGraphFromMapData(mapData, mapSize, NodeClass):
+    # Convert mapData to discrete nodes
+    nodes = []
+
+    for y, line in enumerate(mapData):
+        nodeRow = []
+        for x, char in enumerate(line):
+            nodeRow.append(NodeClass.fromChar(char, x, y))
+        nodes.append(nodeRow)
+
+    # Create graph from nodes
+    graph = createGraphFromNodeMatrix(nodes, mapSize[1], mapSize[0], NodeClass)
+
+    return graph, nodes
+# createGraphFromMapData end
@@ -0,0 +1,593 @@
+# Search limits, partial boards, transposition table, component split and restarts shared by the search strategies
+import os.path
+import csv
+import time
+import multiprocessing
+import random
+from puzzle_core import NodeStates, OverallStates, AnsiColors, PuzzleBoard, colorPrint, createGraphFromMapData, USE_COLOR_PRINT
+from array_board import USE_ARRAY_BOARD
+from solution_cache import USE_SOLUTION_CACHE, SOLUTION_CACHE_FILE, SOLUTION_CACHE_SIZE, openSolutionCache
+
+####################################
+# Globals
+####################################
+
+MAX_SEARCH_ITERATIONS = 100000
+SEARCH_TIME_LIMIT = 0 # Seconds a puzzle may search for before it stops with its best partial board, 0 for no limit
+DEADLINE_CHECK_STEPS = 4 # Search steps between looks at the clock when there's a time limit
+SAVE_CSV = True
+USE_COMPONENT_SPLIT = False # Solve regions of the board that share no run or numbered wall as puzzles of their own
+COMPONENT_WORKERS = 1 # Processes solving a puzzle's regions at once, 1 for one after another, 0 for one per core
+USE_TRANSPOSITION_TABLE = True # Remember states already searched to a dead end and prune them when reached again
+TRANSPOSITION_TABLE_BITS = 16 # The table holds 2 ** this many states, newer ones replacing older
+ZOBRIST_SEED = 0 # Seeds the random state hash keys, so runs are repeatable
+USE_RESTARTS = False # Search in rounds from the starting board on Luby step budgets, breaking heuristic ties at random after the first
+RESTART_UNIT = 100 # Steps a restart round gets per unit of the Luby sequence
+RESTART_SEED = 0 # Seeds the tie breaking of restart rounds, so runs are repeatable
+
+####################################
+# Classes
+####################################
+
+# Outcome of the library solve function
+class SolveResult:
+    __slots__ = ("status", "solved", "steps", "seconds", "solution")
+
+    def __init__(self, status, solved, steps, seconds, solution):
+        self.status = status # From OverallStates class
+        self.solved = solved # Whether the returned board is a complete solution
+        self.steps = steps
+        self.seconds = seconds
+        self.solution = solution # List of strings denoting board rows, b for bulbs, the best partial board if the search ran out, None without either
+    # __init__ end
+
+    def __repr__(self):
+        return "SolveResult(status=%r, solved=%r, steps=%r, seconds=%r)" % (self.status, self.solved, self.steps, self.seconds)
+    # __repr__ end
+# SolveResult end
+
+# Options every search strategy shares, handed to each solver so one process can run several configurations
+# and batch and region workers search with their caller's settings instead of the module defaults
+class SolverConfig:
+    __slots__ = ("maxSteps", "timeLimit", "splitComponents", "componentWorkers", "useCache", "cacheFile", "cacheSize",
+                 "useTranspositionTable", "useArrayBoard", "useRestarts", "restartUnit", "restartSeed", "saveCsv", "useColor")
+
+    # options = keyword arguments naming any of the slots, those left out or None take the globals' values
+    def __init__(self, **options):
+        self.maxSteps = MAX_SEARCH_ITERATIONS # Search steps allowed before giving up
+        self.timeLimit = SEARCH_TIME_LIMIT # Seconds allowed before giving up with the best partial board, 0 for no limit
+        self.splitComponents = USE_COMPONENT_SPLIT
+        self.componentWorkers = COMPONENT_WORKERS
+        self.useCache = USE_SOLUTION_CACHE
+        self.cacheFile = SOLUTION_CACHE_FILE
+        self.cacheSize = SOLUTION_CACHE_SIZE
+        self.useTranspositionTable = USE_TRANSPOSITION_TABLE
+        self.useArrayBoard = USE_ARRAY_BOARD
+        self.useRestarts = USE_RESTARTS
+        self.restartUnit = RESTART_UNIT
+        self.restartSeed = RESTART_SEED
+        self.saveCsv = SAVE_CSV
+        self.useColor = USE_COLOR_PRINT
+        self.update(options)
+    # __init__ end
+
+    # Raises TypeError for a name that isn't an option
+    def update(self, options):
+        for name, value in options.items():
+            if name not in SolverConfig.__slots__:
+                raise TypeError("Unknown solver option: " + name)
+            if value is not None:
+                setattr(self, name, value)
+    # update end
+
+    # Returns a copy with the given options changed
+    def copy(self, **options):
+        config = SolverConfig()
+        config.update({name: getattr(self, name) for name in SolverConfig.__slots__})
+        config.update(options)
+        return config
+    # copy end
+
+    def __repr__(self):
+        return "SolverConfig(" + ", ".join("%s=%r" % (name, getattr(self, name)) for name in SolverConfig.__slots__) + ")"
+    # __repr__ end
+# SolverConfig end
+
+# Fixed size table of state hash keys proven INVALID, each key kept in the slot its low bits pick
+class TranspositionTable:
+    # bits = int: the table holds 2 ** bits keys
+    def __init__(self, bits):
+        self.mask = (1 << bits) - 1
+        self.entries = [None] * (1 << bits)
+        self.hits = 0
+    # __init__ end
+
+    def add(self, key):
+        self.entries[key & self.mask] = key
+    # add end
+
+    # Counts a hit when key is in the table
+    def contains(self, key):
+        if self.entries[key & self.mask] == key:
+            self.hits += 1
+            return True
+        return False
+    # contains end
+# TranspositionTable end
+
+# Search limits, reporting, and the component split, restarts and transposition table around a strategy's search
+# Subclasses set csvFileNames, and implement runSearch, scanOverallStates and printState
+class PuzzleSolver(PuzzleBoard):
+    csvFileNames = {} # HeuristicMode -> csv file results are written to
+
+    # heuristicMode = int: from HeuristicMode class
+    # config = SolverConfig: step and time limits and the other shared options, None for the globals' values
+    def __init__(self, graph, node2dArray, heuristicMode, config=None):
+        self.config = SolverConfig() if config is None else config
+        super().__init__(graph, node2dArray, heuristicMode, self.config.useArrayBoard)
+        self.maxSteps = self.config.maxSteps
+        self.solved = False
+        self.searchSteps = 0
+        self.csvFileName = ""
+        self.timeTaken = 0
+        self.csvRow = None
+        self.aborted = False
+        self.timeLimit = self.config.timeLimit
+        self.deadline = None # time.time() the search stops at, set from timeLimit when it starts unless given
+        self.timedOut = False
+        self.bestUnlit = None # Fewest unlit spaces of a state without violations reached so far
+        self.bestPartial = None # That state's board rows
+        self.splitComponents = self.config.splitComponents
+        self.useCache = self.config.useCache
+        self.useRestarts = self.config.useRestarts
+        self.solverOptions = {} # Strategy options createSolver was given besides the config, handed on to the solvers of regions and restart rounds
+
+        # Zobrist hash of the decisions made so far, kept in step by the subclass as cells change
+        self.zobristKeys = self.createZobristKeys()
+        self.stateHash = 0
+        self.transpositions = TranspositionTable(TRANSPOSITION_TABLE_BITS) if self.config.useTranspositionTable else None
+    # __init__ end
+
+    # Returns the csv file this solver's results are written to
+    def getCsvFileName(self):
+        return self.csvFileNames.get(self.heuristicMode, "")
+    # getCsvFileName end
+
+    # Orders the walls and runs the search without printing or saving anything
+    def search(self):
+        self.csvFileName = self.getCsvFileName()
+        cache = openSolutionCache(self.config.cacheFile, self.config.cacheSize) if self.useCache else None
+        puzzleRows = self.getPuzzleRows() if cache else None
+        result = None
+        if self.deadline is None and self.timeLimit:
+            self.deadline = time.time() + self.timeLimit
+
+        if cache:
+            startTime = time.time()
+            solution = cache.lookup(puzzleRows)
+
+            if solution is not None:
+                # Already solved, possibly turned or mirrored
+                self.setCellDecisions(self.segments.segmentsOf, solution, (0, 0))
+                self.counters = self.createCounters(self.graph)
+                result = self.checkOverallStates(self.graph)
+
+        if result is None:
+            components = self.findComponents() if self.splitComponents else []
+
+            if len(components) > 1:
+                startTime = time.time()
+                result = self.searchComponents(components)
+            elif self.useRestarts:
+                startTime = time.time()
+                result = self.searchRestarts()
+            else:
+                self.prepareSearch()
+                wallNodes = self.orderWalls()
+
+                startTime = time.time()
+                result = self.runSearch(wallNodes)
+
+                if result == OverallStates.CANNOT_FINISH:
+                    self.restoreBestPartial()
+
+            if cache and self.isSolved(result):
+                cache.store(puzzleRows, self.getSolution())
+
+        self.timeTaken = time.time() - startTime
+        if result == OverallStates.CANNOT_FINISH and self.deadline is not None and time.time() >= self.deadline:
+            self.timedOut = True # Also when a region or restart round ran out of time
+
+        if self.isSolved(result):
+            self.csvRow = [len(self.board), self.searchSteps, "yes"]
+        else:
+            self.csvRow = [len(self.board), self.searchSteps, "no"]
+
+        return result
+    # search end
+
+    # Search, then print the outcome and write it to csv
+    def solve(self):
+        result = self.search()
+
+        # Print results
+        if result == OverallStates.CANNOT_FINISH:
+            if self.timedOut:
+                self.colorPrint(AnsiColors.RED, "Exceeded allowed time of", self.timeLimit, "seconds")
+            else:
+                self.colorPrint(AnsiColors.RED, "Exceeded allowed steps")
+            if self.bestUnlit is not None:
+                print("Unlit spaces left on the best partial board:", self.counters.unlitCount)
+        elif not self.isSolved(result):
+            self.colorPrint(AnsiColors.RED, "No solution")
+        else:
+            self.colorPrint(AnsiColors.GREEN, "Finished")
+
+        # Write results to csv
+        if self.config.saveCsv:
+            writeCsvRow(self.csvFileName, self.csvRow)
+
+        print("Steps taken:", self.searchSteps)
+        if self.transpositions is not None:
+            print("Transposition table hits:", self.transpositions.hits)
+        print("Seconds taken:", self.timeTaken)
+        self.printState()
+        print(flush=True)
+    # solve end
+
+    # Groups the open cells into regions that share no run and no numbered wall, so a failure in one can't undo choices in another
+    # Returns a (cell positions, numbered wall nodes) pair per region, in board order
+    def findComponents(self):
+        parents = {position: position for position in self.segments.segmentsOf}
+
+        def findRoot(position):
+            while parents[position] != position:
+                parents[position] = parents[parents[position]] # Halve the path as we go
+                position = parents[position]
+            return position
+        # findRoot end
+
+        def join(a, b):
+            parents[findRoot(a)] = findRoot(b)
+        # join end
+
+        for run in self.segments.members:
+            for position in run[1:]:
+                join(position, run[0])
+
+        wallCells = {}
+        for node in self.graph:
+            nodeState = node.getDecision()
+            if self.stateIsWall(nodeState) and nodeState != NodeStates.WALL:
+                wallCells[node] = [(adj.x, adj.y) for adj in self.graph[node] if self.segments.isCell(adj.x, adj.y)]
+
+                # A 0 only rules out bulbs next to it one cell at a time, so it doesn't tie its neighbours together
+                if nodeState != NodeStates.WALL0:
+                    for position in wallCells[node][1:]:
+                        join(position, wallCells[node][0])
+
+        regions = {}
+        for position in self.segments.segmentsOf:
+            regions.setdefault(findRoot(position), ([], []))[0].append(position)
+        components = list(regions.values())
+
+        for node, adjCells in wallCells.items():
+            if adjCells:
+                for root in dict.fromkeys(findRoot(position) for position in adjCells):
+                    regions[root][1].append(node)
+            elif components:
+                components[0][1].append(node) # Walls without open neighbours still have to be checked somewhere
+
+        return components
+    # findComponents end
+
+    # Solves each region from findComponents as a puzzle of its own, then writes the solved ones back onto this board
+    def searchComponents(self, components):
+        grids = [self.createComponentGrid(cells, walls) for cells, walls in components]
+        results = []
+
+        solverOptions = dict(self.solverOptions, heuristicMode=self.heuristicMode)
+        workers = self.config.componentWorkers
+
+        if workers != 1 and not multiprocessing.current_process().daemon: # Batch workers can't start processes
+            # Workers can't share one step budget, so each region gets all of it
+            jobs = [(type(self), solverOptions, self.config.copy(maxSteps=self.maxSteps), mapData, self.deadline) for mapData, _ in grids]
+            with multiprocessing.Pool(workers or None) as pool:
+                results = pool.map(solveComponent, jobs)
+        else:
+            usedSteps = 0
+            for mapData, _ in grids:
+                job = (type(self), solverOptions, self.config.copy(maxSteps=self.maxSteps - usedSteps), mapData, self.deadline)
+                results.append(solveComponent(job))
+                usedSteps += results[-1][1]
+
+                if results[-1][0] != OverallStates.COMPLETE:
+                    break # The whole puzzle fails with this region
+
+        # Regions that ran out hold their best partial boards, if they reached one
+        for (cells, _), (_, offset), (status, _, solution) in zip(components, grids, results):
+            if status in (OverallStates.COMPLETE, OverallStates.CANNOT_FINISH) and solution is not None:
+                self.setCellDecisions(cells, solution, offset)
+
+        self.counters = self.createCounters(self.graph)
+        self.searchSteps = sum(steps for _, steps, _ in results)
+        if any(solution is not None for _, _, solution in results):
+            self.bestUnlit = self.counters.unlitCount
+
+        statuses = [status for status, _, _ in results]
+        if OverallStates.CANNOT_FINISH in statuses:
+            return OverallStates.CANNOT_FINISH
+        elif len(statuses) == len(components) and all(status == OverallStates.COMPLETE for status in statuses):
+            return self.checkOverallStates(self.graph)
+        else:
+            return OverallStates.INVALID
+    # searchComponents end
+
+    # Searches the board in rounds, each a fresh solver given the config's restartUnit times the next Luby term in steps,
+    # until one finishes or maxSteps or the time limit run out, then writes the last round's board back onto this one,
+    # or the best partial board of any round if none finished. Rounds after the first break heuristic ties in their own random order, and each takes over what the one before learned
+    def searchRestarts(self):
+        generator = random.Random(self.config.restartSeed)
+        mapData = self.getPuzzleRows()
+        usedSteps = 0
+        previous = None
+        bestRound = None # Round whose best partial board has the fewest unlit spaces
+        roundIdx = 1
+
+        while True:
+            remaining = self.maxSteps - usedSteps
+            budget = self.config.restartUnit * getLubyTerm(roundIdx)
+            if budget + 2 >= remaining:
+                budget = remaining # Last round, which gets whatever is left
+
+            roundConfig = self.config.copy(maxSteps=budget, splitComponents=False, useCache=False, useRestarts=False)
+            solver = createSolver(type(self), mapData, [len(mapData), len(mapData[0])], roundConfig, **dict(self.solverOptions, heuristicMode=self.heuristicMode))
+            solver.deadline = self.deadline
+            if previous is not None:
+                solver.shuffleTies(generator)
+                solver.keepLearned(previous)
+
+            result = solver.search()
+            usedSteps += solver.searchSteps
+
+            if result != OverallStates.CANNOT_FINISH or budget == remaining or solver.timedOut:
+                break
+            if solver.bestUnlit is not None and (bestRound is None or solver.bestUnlit < bestRound.bestUnlit):
+                bestRound = solver
+            previous = solver
+            roundIdx += 1
+
+        if result == OverallStates.CANNOT_FINISH and bestRound is not None and \
+                (solver.bestUnlit is None or bestRound.bestUnlit < solver.bestUnlit):
+            solver = bestRound
+
+        self.setCellDecisions(self.segments.segmentsOf, solver.getSolution(), (0, 0))
+        self.counters = self.createCounters(self.graph)
+        self.searchSteps = usedSteps
+        self.bestUnlit = solver.bestUnlit
+        self.keepRound(solver)
+
+        if solver.isSolved(result):
+            return self.checkOverallStates(self.graph)
+        return result
+    # searchRestarts end
+
+    # generator = random.Random: shared by the rounds of a restart search
+    # Gives every position a random place among equally scored choices
+    def shuffleTies(self, generator):
+        positions = [(x, y) for y, row in enumerate(self.board) for x in range(len(row))]
+        ranks = list(range(len(positions)))
+        generator.shuffle(ranks)
+        self.tieRanks = dict(zip(positions, ranks))
+    # shuffleTies end
+
+    # previous = PuzzleSolver: the restart round before this one, on the same board
+    # Takes over anything the previous round learned that still holds, nothing by default
+    def keepLearned(self, previous):
+        pass
+    # keepLearned end
+
+    # solver = PuzzleSolver: the restart round whose board was written back onto this one
+    # Takes over whatever else the round found, nothing by default
+    def keepRound(self, solver):
+        pass
+    # keepRound end
+
+    # Counts a search step, stopping the search once maxSteps are taken or, looking every DEADLINE_CHECK_STEPS steps, the deadline passes
+    def countStep(self):
+        if self.searchSteps > self.maxSteps:
+            self.aborted = True
+        elif self.deadline is not None and self.searchSteps % DEADLINE_CHECK_STEPS == 0 and time.time() > self.deadline:
+            self.aborted = True
+            self.timedOut = True
+        self.searchSteps += 1
+    # countStep end
+
+    # boardState = list: 2d array of nodes in a state without violations, whose counters are in sync
+    # Keeps the state's board rows if it has fewer unlit spaces than any before it
+    def recordPartial(self, boardState):
+        unlitCount = self.counters.unlitCount
+        if self.bestUnlit is None or unlitCount < self.bestUnlit:
+            self.bestUnlit = unlitCount
+            self.bestPartial = ["".join(node.getDecision() or NodeStates.EMPTY for node in row) for row in boardState]
+    # recordPartial end
+
+    # Writes the best partial board onto this one after the search ran out, undecided spaces left empty
+    def restoreBestPartial(self):
+        if self.bestPartial is not None:
+            self.setCellDecisions(self.segments.segmentsOf, self.bestPartial, (0, 0))
+            self.counters = self.createCounters(self.graph)
+    # restoreBestPartial end
+
+    # result = int: from OverallStates class, as search returned it
+    # Returns the solved map rows, the best partial board's if the search ran out after reaching one, None otherwise
+    def getResultRows(self, result):
+        if self.isSolved(result) or (result == OverallStates.CANNOT_FINISH and self.bestUnlit is not None):
+            return self.getSolution()
+        return None
+    # getResultRows end
+
+    # Crops the board to one region, with every cell outside it made a plain wall
+    # Returns the region's map rows and the board position of their top left corner
+    def createComponentGrid(self, cells, walls):
+        wallStates = {(node.x, node.y): node.getDecision() for node in walls}
+        positions = cells + list(wallStates)
+        minX, maxX = min(x for x, _ in positions), max(x for x, _ in positions)
+        minY, maxY = min(y for _, y in positions), max(y for _, y in positions)
+        cellSet = set(cells)
+
+        mapData = []
+        for y in range(minY, maxY + 1):
+            row = []
+            for x in range(minX, maxX + 1):
+                if (x, y) in cellSet:
+                    row.append(NodeStates.BULB if self.board[y][x].getDecision() == NodeStates.BULB else NodeStates.EMPTY)
+                elif (x, y) in wallStates:
+                    row.append(wallStates[(x, y)])
+                else:
+                    row.append(NodeStates.WALL)
+            mapData.append("".join(row))
+
+        return mapData, (minX, minY)
+    # createComponentGrid end
+
+    # Whether the board left by a search with this result is a solution
+    def isSolved(self, result):
+        return result == OverallStates.COMPLETE
+    # isSolved end
+
+    # Called before the walls are ordered
+    def prepareSearch(self):
+        pass
+    # prepareSearch end
+
+    # A random key for each decision an open cell can take, and for each wall
+    def createZobristKeys(self):
+        generator = random.Random(ZOBRIST_SEED)
+        keys = {}
+
+        for (x, y) in self.segments.segmentsOf:
+            keys[(x, y, NodeStates.BULB)] = generator.getrandbits(64)
+            keys[(x, y, NodeStates.EMPTY)] = generator.getrandbits(64)
+
+        for node in self.graph:
+            nodeState = node.getDecision()
+            if self.stateIsWall(nodeState):
+                keys[(node.x, node.y, nodeState)] = generator.getrandbits(64)
+
+        return keys
+    # createZobristKeys end
+
+    # stateHash combined with the walls still to branch on, which the search hands down in a fixed order
+    def getStateKey(self, wallNodes):
+        key = self.stateHash
+        for node in wallNodes:
+            key ^= self.zobristKeys[(node.x, node.y, node.getDecision())]
+        return key
+    # getStateKey end
+
+    # colorPrint with this solver's useColor option
+    def colorPrint(self, ansi, *args, end=None, sep=" "):
+        colorPrint(ansi, *args, end=end, sep=sep, useColor=self.config.useColor)
+    # colorPrint end
+# PuzzleSolver end
+
+####################################
+# Utility Functions
+####################################
+
+# csvFileName = string: results file, created with a header row if missing
+# row = list: board_size, steps_taken, solved
+def writeCsvRow(csvFileName, row):
+    if not os.path.isfile(csvFileName):
+        with open(csvFileName, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["board_size", "steps_taken", "solved"])
+            writer.writerow(row)
+    else:
+        with open(csvFileName, 'a') as f:
+            writer = csv.writer(f)
+            writer.writerow(row)
+# writeCsvRow end
+
+# The i-th term of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..., counting from i = 1
+def getLubyTerm(i):
+    while True:
+        # Smallest k with i <= 2^k - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+
+        if i == (1 << k) - 1:
+            return 1 << (k - 1)
+        i -= (1 << (k - 1)) - 1 # Same as the term that far into the sequence
+# getLubyTerm end
+
+# createFrame = generator function: yields the arguments of a child search, is sent back its result and returns its own
+# Frames live on an explicit stack, so search depth isn't bounded by Python's recursion limit
+def runSearchFrames(createFrame, *args):
+    stack = [createFrame(*args)]
+    result = None
+
+    while stack:
+        try:
+            childArgs = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value # Hand the finished frame's result to its parent
+        else:
+            stack.append(createFrame(*childArgs))
+            result = None
+
+    return result
+# runSearchFrames end
+
+####################################
+# Core Functions
+####################################
+
+# SolverClass = class: PuzzleSolver subclass
+# config = SolverConfig: shared options, None for the globals' values
+# solverOptions = keyword arguments for the strategy, e.g. heuristicMode, or countSolutions for dancing links
+def createSolver(SolverClass, mapData, mapSize, config=None, **solverOptions):
+    graph, board = createGraphFromMapData(mapData, mapSize, SolverClass.NodeClass)
+    solver = SolverClass(graph, board, config=config, **solverOptions)
+    solver.solverOptions = solverOptions
+    return solver
+# createSolver end
+
+# job = tuple: SolverClass, solverOptions, SolverConfig, mapData of one region from PuzzleSolver.createComponentGrid, and the whole puzzle's deadline
+# Returns the region's search result, steps taken and solved map rows, or its best partial rows if it ran out
+def solveComponent(job):
+    SolverClass, solverOptions, config, mapData, deadline = job
+    solver = createSolver(SolverClass, mapData, [len(mapData), len(mapData[0])], config, **solverOptions)
+    solver.deadline = deadline
+    result = solver.search()
+    status = OverallStates.COMPLETE if solver.isSolved(result) else result
+
+    return status, solver.searchSteps, solver.getResultRows(result)
+# solveComponent end
+
+# grid = list: strings representing each row of map, or one string with a row per line
+# SolverClass = class: PuzzleSolver subclass
+# heuristic = int: from HeuristicMode class, None for the solver's default
+# maxSteps = int: search steps allowed before giving up, None for the config's
+# timeLimit = number: seconds allowed before giving up with the best partial board, 0 for no limit, None for the config's
+# config = SolverConfig: shared options, None for the globals' values
+# options = keyword arguments naming SolverConfig options to change, e.g. splitComponents or useRestarts,
+#   or options of the strategy, e.g. backjumping for forward checking
+# Returns a SolveResult, printing and writing nothing
+def solveGrid(grid, SolverClass, heuristic=None, maxSteps=None, timeLimit=None, config=None, **options):
+    mapData = grid.split() if isinstance(grid, str) else list(grid)
+    mapSize = [len(mapData), len(mapData[0]) if mapData else 0]
+
+    configOptions = {name: options.pop(name) for name in list(options) if name in SolverConfig.__slots__}
+    config = (config or SolverConfig()).copy(maxSteps=maxSteps, timeLimit=timeLimit, **configOptions)
+
+    solver = createSolver(SolverClass, mapData, mapSize, config, heuristicMode=heuristic, **options)
+    result = solver.search()
+    solved = solver.isSolved(result)
+    status = OverallStates.COMPLETE if solved else result
+
+    return SolveResult(status, solved, solver.searchSteps, solver.timeTaken, solver.getResultRows(result))
+# solveGrid end
@@ -0,0 +1,145 @@
+# Solved puzzles kept in an sqlite database on disk, shared by every solver and batch worker
+import os
+import time
+import contextlib
+import sqlite3
+import hashlib
+import itertools
+from puzzle_core import NodeStates
+
+####################################
+# Globals
+####################################
+
+USE_SOLUTION_CACHE = False # Look puzzles up in a cache of earlier solutions on disk before searching, and add new solutions to it
+SOLUTION_CACHE_FILE = "solution_cache.db"
+SOLUTION_CACHE_SIZE = 100000 # Puzzles kept in the cache, the least recently used are dropped past this
+
+# (transpose, flip rows, flip columns) for each rotation and reflection of a grid
+DIHEDRAL_TRANSFORMS = list(itertools.product((False, True), repeat=3))
+
+solutionCaches = {} # (file, process id) -> SolutionCache, so forked workers don't share a connection
+
+####################################
+# Classes
+####################################
+
+# Solved puzzles kept on disk, keyed by a hash of the smallest encoding of the puzzle's 8 rotations and reflections
+# so turned or mirrored copies of a puzzle find the same entry
+# Every process opens its own connection and sqlite's file locking keeps concurrent batch workers safe
+class SolutionCache:
+    # filename = string: sqlite database, created if missing
+    # maxEntries = int: puzzles kept before the least recently used are dropped
+    def __init__(self, filename, maxEntries):
+        self.maxEntries = maxEntries
+        self.connection = sqlite3.connect(filename, timeout=60, isolation_level=None)
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutions (puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL, lastUsed REAL NOT NULL)")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS solutionsByUse ON solutions (lastUsed)")
+
+        # Entries counted in a table of their own so a store never counts the whole cache, seeded once for older files
+        self.connection.execute("CREATE TABLE IF NOT EXISTS solutionCount (entries INTEGER NOT NULL)")
+        with self.transaction():
+            self.connection.execute("INSERT INTO solutionCount SELECT COUNT(*) FROM solutions WHERE NOT EXISTS (SELECT 1 FROM solutionCount)")
+    # __init__ end
+
+    # Runs the statements of a with block as one write transaction, rolled back if anything stops it part way,
+    # so an exception such as a batch SearchTimeout can't leave the database locked
+    @contextlib.contextmanager
+    def transaction(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self.connection.execute("COMMIT")
+        finally:
+            if self.connection.in_transaction:
+                self.connection.execute("ROLLBACK")
+    # transaction end
+
+    # puzzleRows = list: strings denoting map rows
+    # Returns the solved rows in the puzzle's own orientation, or None
+    def lookup(self, puzzleRows):
+        key, transform = getCanonicalForm(puzzleRows)
+
+        try:
+            row = self.connection.execute("SELECT solution FROM solutions WHERE puzzle = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE solutions SET lastUsed = ? WHERE puzzle = ?", (time.time(), key))
+        except sqlite3.OperationalError:
+            return None # Locked for too long, search instead
+
+        solution = transformRows(row[0].split("/"), transform, inverse=True)
+
+        # Walls must line up, in case the file was edited
+        if len(solution) != len(puzzleRows) or any(len(solved) != len(row) for solved, row in zip(solution, puzzleRows)):
+            return None
+        for solvedRow, row in zip(solution, puzzleRows):
+            for solvedChar, char in zip(solvedRow, row):
+                if solvedChar != char and char != NodeStates.EMPTY:
+                    return None
+
+        return solution
+    # lookup end
+
+    # puzzleRows, solution = list: strings denoting map rows and solved map rows
+    def store(self, puzzleRows, solution):
+        key, transform = getCanonicalForm(puzzleRows)
+        canonicalSolution = "/".join(transformRows(solution, transform))
+
+        try:
+            with self.transaction():
+                cursor = self.connection.execute("INSERT OR IGNORE INTO solutions VALUES (?, ?, ?)", (key, canonicalSolution, time.time()))
+                if cursor.rowcount:
+                    self.connection.execute("UPDATE solutionCount SET entries = entries + 1")
+                else:
+                    self.connection.execute("UPDATE solutions SET solution = ?, lastUsed = ? WHERE puzzle = ?", (canonicalSolution, time.time(), key))
+
+                # Drop the least recently used past maxEntries, found through the lastUsed index
+                (count,) = self.connection.execute("SELECT entries FROM solutionCount").fetchone()
+                if count > self.maxEntries:
+                    cursor = self.connection.execute("DELETE FROM solutions WHERE puzzle IN (SELECT puzzle FROM solutions ORDER BY lastUsed LIMIT ?)", (count - self.maxEntries,))
+                    self.connection.execute("UPDATE solutionCount SET entries = entries - ?", (cursor.rowcount,))
+        except sqlite3.OperationalError:
+            pass # Locked for too long, leave this one uncached
+    # store end
+# SolutionCache end
+
+####################################
+# Utility Functions
+####################################
+
+# rows = list: strings denoting map rows
+# transform = tuple: from DIHEDRAL_TRANSFORMS
+# inverse = bool: undo transform instead of applying it
+def transformRows(rows, transform, inverse=False):
+    transpose, flipRows, flipColumns = transform
+
+    if transpose and not inverse:
+        rows = ["".join(column) for column in zip(*rows)]
+    if flipRows:
+        rows = rows[::-1]
+    if flipColumns:
+        rows = [row[::-1] for row in rows]
+    if transpose and inverse:
+        rows = ["".join(column) for column in zip(*rows)]
+
+    return list(rows)
+# transformRows end
+
+# rows = list: strings denoting map rows
+# Returns a hash of the smallest encoding over every rotation and reflection of the rows, and the transform giving it
+def getCanonicalForm(rows):
+    encoding, transform = min(("/".join(transformRows(rows, transform)), transform) for transform in DIHEDRAL_TRANSFORMS)
+    return hashlib.sha256(encoding.encode()).hexdigest(), transform
+# getCanonicalForm end
+
+# filename = string: sqlite database, created if missing
+# maxEntries = int: puzzles kept before the least recently used are dropped
+# Returns this process's connection to the cache in filename
+def openSolutionCache(filename, maxEntries):
+    key = (filename, os.getpid())
+    if key not in solutionCaches:
+        solutionCaches[key] = SolutionCache(filename, maxEntries)
+    solutionCaches[key].maxEntries = maxEntries
+    return solutionCaches[key]
+# openSolutionCache end
@@ -0,0 +1,502 @@
+import io
+import os
+import random
+import itertools
+import tempfile
+import unittest
+import contextlib
+import puzzle_search
+import solution_cache
+from puzzle_core import NodeStates, OverallStates, HeuristicMode
+from puzzle_search import SolverConfig, solveGrid, createSolver
+from puzzle_batch import readPuzzles, parse, parseBatch
+from backtrack import BacktrackingSolver
+from forward_checking import ForwardCheckingSolver
+from dancing_links import DancingLinksSolver, countSolutions
+from cdcl import CdclSolver
+from solution_cache import DIHEDRAL_TRANSFORMS, SolutionCache, transformRows
+
+####################################
+# Globals
+####################################
+
+LIGHTUP_PUZZLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lightup puzzles.txt")
+SMALL_PUZZLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small_size_puzzles.txt")
+
+SOLVERS = (BacktrackingSolver, ForwardCheckingSolver, DancingLinksSolver, CdclSolver)
+HEURISTIC_MODES = (HeuristicMode.NONE, HeuristicMode.MOST_CONSTRAINED, HeuristicMode.MOST_CONSTRAINING, HeuristicMode.HYBRID)
+
+# Splits into regions one of which is only lone cells, so it lights nothing
+LONE_CELL_REGION_PUZZLE = ["_W___00", "W_31_1W", "W______"]
+LONE_CELL_REGION_SOLUTION = ["bWb__00", "Wb31b1W", "W_b____"]
+
+# Open enough for many solutions
+MANY_SOLUTIONS_PUZZLE = ["_____", "_W_W_", "_____"]
+
+# Each 1 wall needs the cell between them, and then the end cells can't be lit
+UNSOLVABLE_PUZZLE = ["_1_1_"]
+
+# Two solvable puzzles from small_size_puzzles.txt and UNSOLVABLE_PUZZLE
+PUZZLE_FILE_TEXT = """#Start
+6 6
+1_11_2
+1_0___
+__2___
+2__3_0
+_13_10
+1___00
+#End
+#Start
+6 6
+__0___
+100020
+00_1__
+_0_03_
+_2_3_3
+102_3_
+#End
+#Start
+1 5
+_1_1_
+#End
+"""
+
+# Too large for any solver to finish in a single step
+UNFINISHED_PUZZLE = [
+    "__1________00____0", "_2___2___1_____3__", "__________________", "_____2____00__0000", "______1_________0_", "____2__1_300____1_",
+    "_00____0___0_2____", "_______________2__", "0____1_____2___1__", "_______0___020____", "_0__1______1__01__", "_3_2________2____1",
+    "_________0______2_", "_2____0_010__2____", "___2_0__3_____1___", "_2___0_3___1______", "1_11_0___1___3____", "________1_1_______",
+]
+
+####################################
+# Utility Functions
+####################################
+
+# seed = int: for random.Random, so the grids are the same every run
+# count, size = int: grids to make and their width and height
+# Returns square grids with about a third of the cells walls, around half of them solvable
+def createRandomGrids(seed, count, size):
+    generator = random.Random(seed)
+    return [["".join(generator.choice("WW001122") if generator.random() < 0.3 else "_" for _ in range(size)) for _ in range(size)]
+            for _ in range(count)]
+# createRandomGrids end
+
+# solution = list: strings denoting solved map rows
+# Returns whether the board is complete, checked by the backtracking solver's own rules
+def isValidSolution(solution):
+    checker = createSolver(BacktrackingSolver, solution, [len(solution), len(solution[0])])
+    return checker.checkOverallStates(checker.graph) == OverallStates.COMPLETE
+# isValidSolution end
+
+# grid = list: strings denoting map rows, small enough to try every set of bulbs
+# Returns how many sets of bulbs on the open cells solve the grid
+def countSolutionsByBruteForce(grid):
+    openCells = [(y, x) for y, row in enumerate(grid) for x, char in enumerate(row) if char == NodeStates.EMPTY]
+    count = 0
+
+    for bulbs in itertools.product((False, True), repeat=len(openCells)):
+        rows = [list(row) for row in grid]
+        for (y, x), isBulb in zip(openCells, bulbs):
+            if isBulb:
+                rows[y][x] = NodeStates.BULB
+        count += isValidSolution(["".join(row) for row in rows])
+
+    return count
+# countSolutionsByBruteForce end
+
+####################################
+# Tests
+####################################
+
+class KnownPuzzlesTest(unittest.TestCase):
+    def testEverySolverFindsTheGivenSolutions(self):
+        puzzles = list(readPuzzles(SMALL_PUZZLE_FILE))[:4]
+        for SolverClass in SOLVERS:
+            for puzzle in puzzles:
+                with self.subTest(solver=SolverClass.__name__, puzzle=puzzle.mapData[0]):
+                    result = solveGrid(puzzle.mapData, SolverClass, maxSteps=3000, saveCsv=False)
+                    self.assertTrue(result.solved)
+                    self.assertEqual(result.status, OverallStates.COMPLETE)
+                    self.assertEqual(result.solution, puzzle.solution)
+    # testEverySolverFindsTheGivenSolutions end
+
+    def testEverySolverRejectsAnUnsolvablePuzzle(self):
+        for grid in (UNSOLVABLE_PUZZLE, list(UNSOLVABLE_PUZZLE[0])):
+            for SolverClass in SOLVERS:
+                with self.subTest(solver=SolverClass.__name__, rows=len(grid)):
+                    result = solveGrid(grid, SolverClass, maxSteps=3000, saveCsv=False)
+                    self.assertFalse(result.solved)
+                    self.assertEqual(result.status, OverallStates.INVALID)
+    # testEverySolverRejectsAnUnsolvablePuzzle end
+# KnownPuzzlesTest end
+
+class ComponentSplitTest(unittest.TestCase):
+    def testLoneCellRegionSolves(self):
+        for SolverClass in SOLVERS:
+            for heuristic in HEURISTIC_MODES:
+                with self.subTest(solver=SolverClass.__name__, heuristic=heuristic):
+                    result = solveGrid(LONE_CELL_REGION_PUZZLE, SolverClass, heuristic, 3000, splitComponents=True)
+                    self.assertTrue(result.solved)
+                    self.assertEqual(result.solution, LONE_CELL_REGION_SOLUTION)
+    # testLoneCellRegionSolves end
+# ComponentSplitTest end
+
+class PartialBoardTest(unittest.TestCase):
+    def testRunningOutGivesAPartialBoard(self):
+        for SolverClass in SOLVERS:
+            for heuristic in HEURISTIC_MODES:
+                with self.subTest(solver=SolverClass.__name__, heuristic=heuristic):
+                    result = solveGrid(UNFINISHED_PUZZLE, SolverClass, heuristic, 1)
+                    self.assertEqual(result.status, OverallStates.CANNOT_FINISH)
+                    self.assertIsNotNone(result.solution)
+                    self.assertTrue(any(NodeStates.BULB in row for row in result.solution))
+
+                    # Bulbs the search placed, not ones that break a rule
+                    checker = createSolver(BacktrackingSolver, result.solution, [len(result.solution), len(result.solution[0])])
+                    self.assertNotEqual(checker.checkOverallStates(checker.graph), OverallStates.INVALID)
+    # testRunningOutGivesAPartialBoard end
+# PartialBoardTest end
+
+class RestartTest(unittest.TestCase):
+    def testRoundsKeepSolverOptions(self):
+        counts = []
+        for useRestarts in (False, True):
+            # Rounds short enough that the count takes several
+            config = SolverConfig(useRestarts=useRestarts, restartUnit=4)
+            solver = createSolver(DancingLinksSolver, MANY_SOLUTIONS_PUZZLE, [len(MANY_SOLUTIONS_PUZZLE), len(MANY_SOLUTIONS_PUZZLE[0])], config, countSolutions=True)
+            solver.search()
+            counts.append(solver.solutionCount)
+
+        self.assertGreater(counts[0], 1)
+        self.assertEqual(counts[1], counts[0])
+    # testRoundsKeepSolverOptions end
+
+    def testBacktrackingRoundsShareTheirTable(self):
+        mapSize = [len(UNFINISHED_PUZZLE), len(UNFINISHED_PUZZLE[0])]
+        previous = createSolver(BacktrackingSolver, UNFINISHED_PUZZLE, mapSize)
+        nextRound = createSolver(BacktrackingSolver, UNFINISHED_PUZZLE, mapSize)
+        nextRound.keepLearned(previous)
+        self.assertIs(nextRound.transpositions, previous.transpositions)
+
+        # Every round must key the same state the same way
+        self.assertEqual(nextRound.zobristKeys, previous.zobristKeys)
+    # testBacktrackingRoundsShareTheirTable end
+
+    def testRoundsFollowTheLubySequence(self):
+        terms = [puzzle_search.getLubyTerm(i) for i in range(1, 32)]
+        self.assertEqual(terms[:15], [1, 1, 2, 1, 1, 2, 4, 1, 1, 2, 1, 1, 2, 4, 8])
+        self.assertEqual(terms[15:], terms[:15] + [16])
+    # testRoundsFollowTheLubySequence end
+
+    def testRoundsStayWithinTheStepLimit(self):
+        for SolverClass in SOLVERS:
+            with self.subTest(solver=SolverClass.__name__):
+                result = solveGrid(UNFINISHED_PUZZLE, SolverClass, maxSteps=50, saveCsv=False, useRestarts=True, restartUnit=3)
+                self.assertLessEqual(result.steps, 50 + 2) # As far as a single search may run over
+    # testRoundsStayWithinTheStepLimit end
+# RestartTest end
+
+class ConfigurationTest(unittest.TestCase):
+    def testOptionsStayWithTheirSolver(self):
+        limited = createSolver(BacktrackingSolver, MANY_SOLUTIONS_PUZZLE, [3, 5], SolverConfig(maxSteps=7, useTranspositionTable=False))
+        default = createSolver(BacktrackingSolver, MANY_SOLUTIONS_PUZZLE, [3, 5])
+        self.assertEqual(limited.maxSteps, 7)
+        self.assertIsNone(limited.transpositions)
+        self.assertEqual(default.maxSteps, puzzle_search.MAX_SEARCH_ITERATIONS)
+        self.assertEqual(default.transpositions is not None, puzzle_search.USE_TRANSPOSITION_TABLE)
+    # testOptionsStayWithTheirSolver end
+
+    def testUnknownOptionIsRejected(self):
+        with self.assertRaises(TypeError):
+            SolverConfig(maxStep=5)
+    # testUnknownOptionIsRejected end
+# ConfigurationTest end
+
+class DynamicOrderingTest(unittest.TestCase):
+    def testResultsGoToTheirOwnCsv(self):
+        fileNames = set()
+        for heuristic in HEURISTIC_MODES:
+            solver = createSolver(ForwardCheckingSolver, MANY_SOLUTIONS_PUZZLE, [3, 5], heuristicMode=heuristic, dynamicOrdering=False)
+            fileNames.add(solver.getCsvFileName())
+            solver = createSolver(ForwardCheckingSolver, MANY_SOLUTIONS_PUZZLE, [3, 5], heuristicMode=heuristic, dynamicOrdering=True)
+            self.assertEqual(solver.getCsvFileName(), ForwardCheckingSolver.dynamicCsvFileName)
+
+        self.assertEqual(len(fileNames), len(HEURISTIC_MODES))
+        self.assertNotIn(ForwardCheckingSolver.dynamicCsvFileName, fileNames)
+    # testResultsGoToTheirOwnCsv end
+# DynamicOrderingTest end
+
+class SolutionCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cacheFile = os.path.join(self.directory.name, "cache.db")
+    # setUp end
+
+    def tearDown(self):
+        for key in [key for key in solution_cache.solutionCaches if key[0] == self.cacheFile]:
+            solution_cache.solutionCaches.pop(key).connection.close()
+        self.directory.cleanup()
+    # tearDown end
+
+    def testTurnedAndMirroredCopiesHit(self):
+        cache = SolutionCache(self.cacheFile, 10)
+        cache.store(LONE_CELL_REGION_PUZZLE, LONE_CELL_REGION_SOLUTION)
+        for transform in DIHEDRAL_TRANSFORMS:
+            with self.subTest(transform=transform):
+                solution = cache.lookup(transformRows(LONE_CELL_REGION_PUZZLE, transform))
+                self.assertEqual(solution, transformRows(LONE_CELL_REGION_SOLUTION, transform))
+        cache.connection.close()
+    # testTurnedAndMirroredCopiesHit end
+
+    def testSolvedPuzzleIsAnsweredFromTheCache(self):
+        first = solveGrid(LONE_CELL_REGION_PUZZLE, BacktrackingSolver, useCache=True, cacheFile=self.cacheFile)
+        mirrored = [row[::-1] for row in LONE_CELL_REGION_PUZZLE]
+        second = solveGrid(mirrored, ForwardCheckingSolver, useCache=True, cacheFile=self.cacheFile)
+        self.assertTrue(first.solved)
+        self.assertTrue(second.solved)
+        self.assertGreater(first.steps, 0)
+        self.assertEqual(second.steps, 0)
+        self.assertEqual(second.solution, [row[::-1] for row in LONE_CELL_REGION_SOLUTION])
+    # testSolvedPuzzleIsAnsweredFromTheCache end
+
+    def testLeastRecentlyUsedAreDropped(self):
+        puzzles = [["_" * width] for width in range(1, 5)]
+        cache = SolutionCache(self.cacheFile, 2)
+        for puzzle in puzzles[:3]:
+            cache.store(puzzle, puzzle)
+        self.assertIsNone(cache.lookup(puzzles[0]))
+
+        # A lookup makes an entry the most recently used, so the other one goes next
+        self.assertIsNotNone(cache.lookup(puzzles[1]))
+        cache.store(puzzles[3], puzzles[3])
+        self.assertIsNotNone(cache.lookup(puzzles[1]))
+        self.assertIsNone(cache.lookup(puzzles[2]))
+        self.assertIsNotNone(cache.lookup(puzzles[3]))
+        cache.connection.close()
+
+        # The running count survives reopening the file
+        cache = SolutionCache(self.cacheFile, 2)
+        (count,) = cache.connection.execute("SELECT entries FROM solutionCount").fetchone()
+        (rows,) = cache.connection.execute("SELECT COUNT(*) FROM solutions").fetchone()
+        self.assertEqual(count, 2)
+        self.assertEqual(rows, 2)
+        cache.connection.close()
+    # testLeastRecentlyUsedAreDropped end
+
+    def testInterruptedWriteIsRolledBack(self):
+        cache = SolutionCache(self.cacheFile, 10)
+        with self.assertRaises(KeyboardInterrupt):
+            with cache.transaction():
+                cache.connection.execute("UPDATE solutionCount SET entries = entries + 1")
+                raise KeyboardInterrupt
+        self.assertFalse(cache.connection.in_transaction)
+
+        # Another connection can still write
+        other = SolutionCache(self.cacheFile, 10)
+        other.store(LONE_CELL_REGION_PUZZLE, LONE_CELL_REGION_SOLUTION)
+        (count,) = cache.connection.execute("SELECT entries FROM solutionCount").fetchone()
+        self.assertEqual(count, 1)
+        other.connection.close()
+        cache.connection.close()
+    # testInterruptedWriteIsRolledBack end
+# SolutionCacheTest end
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.puzzleFile = os.path.join(self.directory.name, "puzzles.txt")
+        with open(self.puzzleFile, "w") as file:
+            file.write(PUZZLE_FILE_TEXT)
+    # setUp end
+
+    def tearDown(self):
+        self.directory.cleanup()
+    # tearDown end
+
+    def testWorkersSolveWhatASingleProcessDoes(self):
+        summary = "Solved 2 of 3 puzzles in " + self.puzzleFile
+        config = SolverConfig(saveCsv=False)
+
+        for SolverClass in SOLVERS:
+            with self.subTest(solver=SolverClass.__name__):
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    parse(self.puzzleFile, SolverClass, quiet=True, config=config)
+                self.assertEqual(output.getvalue().strip(), summary)
+
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    parseBatch(self.puzzleFile, SolverClass, 2, 30, quiet=True, config=config)
+                self.assertEqual(output.getvalue().strip(), summary)
+    # testWorkersSolveWhatASingleProcessDoes end
+
+    def testOutputStaysInFileOrder(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            parseBatch(self.puzzleFile, BacktrackingSolver, 3, 30, config=SolverConfig(saveCsv=False, useColor=False))
+        lines = output.getvalue().splitlines()
+
+        # First row of each printed board
+        self.assertLess(lines.index("1b11b2"), lines.index("b_0_b_"))
+        self.assertLess(lines.index("b_0_b_"), lines.index(UNSOLVABLE_PUZZLE[0]))
+    # testOutputStaysInFileOrder end
+# BatchTest end
+
+class ReadPuzzlesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.puzzleFile = os.path.join(self.directory.name, "puzzles.txt")
+    # setUp end
+
+    def tearDown(self):
+        self.directory.cleanup()
+    # tearDown end
+
+    def readText(self, text):
+        with open(self.puzzleFile, "w") as file:
+            file.write(text)
+        return list(readPuzzles(self.puzzleFile))
+    # readText end
+
+    def testSolutionsAndMarkerSpellings(self):
+        puzzles = self.readText(
+            "# from size 2x3\n"
+            "#Start\n2 3\n_1_\n___\n#End\n"
+            "#  Solution\n#   b1b\n#   ___\n"
+            "\n"
+            "# Start\n1 5\n_1_1_\n# End\n"
+            "#Start\n1 2\n0_\n#End\n")
+
+        self.assertEqual(len(puzzles), 3)
+        self.assertEqual([puzzle.mapSize for puzzle in puzzles], [[2, 3], [1, 5], [1, 2]])
+        self.assertEqual([puzzle.mapData for puzzle in puzzles], [["_1_", "___"], UNSOLVABLE_PUZZLE, ["0_"]])
+        self.assertEqual([puzzle.solution for puzzle in puzzles], [["b1b", "___"], None, None])
+    # testSolutionsAndMarkerSpellings end
+
+    def testPuzzlesComeOutOneAtATime(self):
+        with open(self.puzzleFile, "w") as file:
+            file.write(PUZZLE_FILE_TEXT)
+
+        puzzles = readPuzzles(self.puzzleFile)
+        self.assertEqual(next(puzzles).mapData[0], "1_11_2")
+        self.assertEqual(next(puzzles).mapData[0], "__0___")
+        self.assertEqual(next(puzzles).mapData, UNSOLVABLE_PUZZLE)
+        self.assertIsNone(next(puzzles, None))
+    # testPuzzlesComeOutOneAtATime end
+
+    def testMissingFileGivesNoPuzzles(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            puzzles = list(readPuzzles(os.path.join(self.directory.name, "missing.txt")))
+        self.assertEqual(puzzles, [])
+        self.assertIn("File does not exist", output.getvalue())
+    # testMissingFileGivesNoPuzzles end
+# ReadPuzzlesTest end
+
+class CdclTest(unittest.TestCase):
+    def testSolvesPuzzlesTheSearchesRunOutOn(self):
+        for puzzle in readPuzzles(LIGHTUP_PUZZLE_FILE):
+            with self.subTest(size=puzzle.mapSize):
+                result = solveGrid(puzzle.mapData, CdclSolver, maxSteps=3000, saveCsv=False)
+                self.assertTrue(result.solved)
+                self.assertTrue(isValidSolution(result.solution))
+    # testSolvesPuzzlesTheSearchesRunOutOn end
+
+    def testAgreesWithDancingLinks(self):
+        for grid in createRandomGrids(1, 40, 4):
+            with self.subTest(grid=grid):
+                expected = solveGrid(grid, DancingLinksSolver, maxSteps=3000, saveCsv=False)
+                result = solveGrid(grid, CdclSolver, maxSteps=3000, saveCsv=False)
+                self.assertEqual(result.status, expected.status)
+                if result.solved:
+                    self.assertTrue(isValidSolution(result.solution))
+    # testAgreesWithDancingLinks end
+# CdclTest end
+
+class DancingLinksTest(unittest.TestCase):
+    def testCountsMatchEveryBulbPlacement(self):
+        for grid in createRandomGrids(2, 20, 3):
+            with self.subTest(grid=grid):
+                self.assertEqual(countSolutions(grid, 3000), countSolutionsByBruteForce(grid))
+    # testCountsMatchEveryBulbPlacement end
+
+    def testCounts(self):
+        puzzle = next(readPuzzles(SMALL_PUZZLE_FILE))
+        self.assertEqual(countSolutions(puzzle.mapData, 3000), 1)
+        self.assertEqual(countSolutions(UNSOLVABLE_PUZZLE, 3000), 0)
+        self.assertGreater(countSolutions(MANY_SOLUTIONS_PUZZLE, 3000), 1)
+
+        # Running out before every solution is found gives no count
+        self.assertIsNone(countSolutions(MANY_SOLUTIONS_PUZZLE, 1))
+    # testCounts end
+
+    def testSolvesTheLargePuzzles(self):
+        for puzzle in readPuzzles(LIGHTUP_PUZZLE_FILE):
+            with self.subTest(size=puzzle.mapSize):
+                result = solveGrid(puzzle.mapData, DancingLinksSolver, maxSteps=3000, saveCsv=False)
+                self.assertTrue(result.solved)
+                self.assertTrue(isValidSolution(result.solution))
+    # testSolvesTheLargePuzzles end
+# DancingLinksTest end
+
+class TranspositionTableTest(unittest.TestCase):
+    def testTableOnlyCutsDeadEnds(self):
+        grids = createRandomGrids(3, 40, 4)
+        expected = [solveGrid(grid, DancingLinksSolver, maxSteps=3000, saveCsv=False).status for grid in grids]
+
+        searches = (
+            (BacktrackingSolver, {}, (False, True)),
+            (BacktrackingSolver, {"useRestarts": True, "restartUnit": 4}, (True,)), # Each round takes over the table of the one before
+            (ForwardCheckingSolver, {}, (False, True)),
+            (ForwardCheckingSolver, {"visibility": False, "backjumping": False}, (False, True)),
+        )
+        for SolverClass, options, tableSettings in searches:
+            for useTranspositionTable in tableSettings:
+                with self.subTest(solver=SolverClass.__name__, options=options, useTranspositionTable=useTranspositionTable):
+                    for grid, status in zip(grids, expected):
+                        result = solveGrid(grid, SolverClass, maxSteps=100000, saveCsv=False, useTranspositionTable=useTranspositionTable, **options)
+                        self.assertEqual(result.status, status, grid)
+                        if result.solved:
+                            self.assertTrue(isValidSolution(result.solution))
+    # testTableOnlyCutsDeadEnds end
+
+    def testTableSavesSteps(self):
+        steps = []
+        for useTranspositionTable in (False, True):
+            # Every way of filling the open rows fails on the last one
+            result = solveGrid(["_____", "_____", "WWWWW"] + UNSOLVABLE_PUZZLE, BacktrackingSolver, maxSteps=100000, saveCsv=False, useTranspositionTable=useTranspositionTable)
+            self.assertEqual(result.status, OverallStates.INVALID)
+            steps.append(result.steps)
+        self.assertLess(steps[1], steps[0])
+    # testTableSavesSteps end
+# TranspositionTableTest end
+
+class BackjumpingTest(unittest.TestCase):
+    def testJumpsAndNogoodsKeepEverySolution(self):
+        grids = createRandomGrids(4, 30, 5)
+        expected = [solveGrid(grid, DancingLinksSolver, maxSteps=3000, saveCsv=False).status for grid in grids]
+
+        # Without the table or visibility propagation the search branches enough to backjump and match nogoods
+        searches = (
+            {"backjumping": False},
+            {"backjumping": True},
+            {"backjumping": True, "dynamicOrdering": True},
+            {"backjumping": True, "useRestarts": True, "restartUnit": 2}, # Nogoods carried from round to round
+        )
+        steps = []
+        for options in searches:
+            with self.subTest(options=options):
+                steps.append(0)
+                for grid, status in zip(grids, expected):
+                    result = solveGrid(grid, ForwardCheckingSolver, maxSteps=100000, saveCsv=False, useTranspositionTable=False, visibility=False, **options)
+                    self.assertEqual(result.status, status, grid)
+                    if result.solved:
+                        self.assertTrue(isValidSolution(result.solution))
+                    steps[-1] += result.steps
+
+        self.assertLess(steps[1], steps[0])
+    # testJumpsAndNogoodsKeepEverySolution end
+# BackjumpingTest end
+
+if __name__ == "__main__":
+    unittest.main()